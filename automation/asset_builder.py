@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+TerraLogic Tech - Asset Builder
+Minifies, fingerprints and precompresses the site's CSS/JS and inlines critical CSS
+"""
+
+import os
+import re
+import glob
+import gzip
+import hashlib
+from typing import Dict, List, Optional, Set, Tuple
+
+from file_utils import write_file_atomic, atomic_write
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; .gz siblings are always written
+    brotli = None
+
+
+CRITICAL_CSS_START = '<!-- critical-css:start -->'
+CRITICAL_CSS_END = '<!-- critical-css:end -->'
+# Pages pointed at the built assets: the root pages, then category pages (with
+# their later pages) and product pages, in the site root and in locale directories
+DEFAULT_PAGES = ['*.html', 'categories/*.html', 'categories/*/*.html', 'products/*/*.html',
+                 '*/categories/*.html', '*/categories/*/*.html', '*/products/*/*.html']
+# The first of these found in a page marks the end of its first screen
+FOLD_MARKERS = ('<!-- Product Card 2 -->', '<!-- products:end -->')
+
+CSS_COMMENT_RE = re.compile(r'/\*.*?\*/', re.DOTALL)
+CLASS_ATTR_RE = re.compile(r'\bclass\s*=\s*["\']([^"\']*)["\']', re.IGNORECASE)
+ID_ATTR_RE = re.compile(r'\bid\s*=\s*["\']([^"\']*)["\']', re.IGNORECASE)
+TAG_RE = re.compile(r'<([a-zA-Z][a-zA-Z0-9]*)')
+STYLESHEET_LINK_RE = re.compile(r'<link\b[^>]*\brel=["\']stylesheet["\'][^>]*>', re.IGNORECASE)
+SELECTOR_CLASS_RE = re.compile(r'\.([\w-]+)')
+SELECTOR_ID_RE = re.compile(r'#([\w-]+)')
+SELECTOR_TAG_RE = re.compile(r'(?:^|[\s>+~(,])([a-zA-Z][a-zA-Z0-9]*)')
+# A '/' after one of these (or at the start) begins a regex literal rather than a division
+JS_REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+JS_REGEX_KEYWORDS = {'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void', 'throw', 'case',
+                     'do', 'else', 'yield', 'await'}
+
+
+def minify_css(css: str) -> str:
+    """Strip comments and insignificant whitespace from a stylesheet"""
+    css = CSS_COMMENT_RE.sub('', css)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    css = css.replace(';}', '}')
+    return css.strip()
+
+
+def minify_js(js: str) -> str:
+    """
+    Strip comments and collapse whitespace outside strings, template literals and regexes
+
+    A line break is only dropped after '{', ';', ',', '(' or '[' or before a
+    closing bracket, where it can't change automatic semicolon insertion.
+    """
+    out: List[str] = []
+    gap = ''        # whitespace and comments skipped since the last token: '', ' ' or '\n'
+    previous = ''   # last character written
+    word = ''       # last identifier or keyword written
+    templates: List[int] = []  # brace depth inside each open ${...} substitution
+    position, length = 0, len(js)
+    while position < length:
+        char = js[position]
+        if char.isspace():
+            end = position + 1
+            while end < length and js[end].isspace():
+                end += 1
+            gap = '\n' if gap == '\n' or '\n' in js[position:end] else ' '
+            position = end
+            continue
+        if js.startswith('//', position):
+            end = js.find('\n', position)
+            position = length if end == -1 else end
+            gap = gap or ' '
+            continue
+        if js.startswith('/*', position):
+            end = js.find('*/', position + 2)
+            end = length if end == -1 else end + 2
+            # A comment spanning lines counts as a line break for semicolon insertion
+            gap = '\n' if gap == '\n' or '\n' in js[position:end] else ' '
+            position = end
+            continue
+
+        if gap and previous:
+            out.append(_js_separator(previous, char, gap))
+        gap = ''
+
+        if char in '"\'':
+            end = _skip_js_string(js, position)
+        elif char == '`' or (char == '}' and templates and templates[-1] == 0):
+            # Template text runs to the closing backtick or the next ${
+            if char == '}':
+                templates.pop()
+            end = position + 1
+            while end < length and js[end] != '`' and not js.startswith('${', end):
+                end += 2 if js[end] == '\\' else 1
+            if js.startswith('${', end):
+                templates.append(0)
+                end += 2
+            else:
+                end += 1
+        elif char == '/' and (not previous or previous in JS_REGEX_PRECEDERS or word in JS_REGEX_KEYWORDS):
+            end = _skip_js_regex(js, position)
+        elif _is_js_word(char):
+            end = position + 1
+            while end < length and _is_js_word(js[end]):
+                end += 1
+        else:
+            end = position + 1
+            if templates and char == '{':
+                templates[-1] += 1
+            elif templates and char == '}':
+                templates[-1] -= 1
+
+        token = js[position:end]
+        out.append(token)
+        word = token if _is_js_word(char) else ''
+        previous = token[-1]
+        position = end
+    return ''.join(out) + '\n'
+
+
+def _is_js_word(char: str) -> bool:
+    return char.isalnum() or char in '_$\\' or ord(char) > 127
+
+
+def _js_separator(previous: str, following: str, gap: str) -> str:
+    """What the whitespace between two tokens must shrink to"""
+    if gap == '\n':
+        return '' if previous in '{;,([' or following in '}])' else '\n'
+    # "a + +b" must not become "a++b"
+    if (_is_js_word(previous) and _is_js_word(following)) or (previous == following and previous in '+-/'):
+        return ' '
+    return ''
+
+
+def _skip_js_string(js: str, position: int) -> int:
+    """End of the quoted string starting at position"""
+    quote = js[position]
+    end = position + 1
+    while end < len(js) and js[end] != quote and js[end] != '\n':
+        end += 2 if js[end] == '\\' else 1
+    return end + 1
+
+
+def _skip_js_regex(js: str, position: int) -> int:
+    """End of the regex literal (with its flags) starting at position"""
+    end = position + 1
+    in_class = False
+    while end < len(js) and js[end] != '\n':
+        if js[end] == '\\':
+            end += 1
+        elif js[end] == '[':
+            in_class = True
+        elif js[end] == ']':
+            in_class = False
+        elif js[end] == '/' and not in_class:
+            break
+        end += 1
+    end += 1
+    while end < len(js) and _is_js_word(js[end]):
+        end += 1
+    return end
+
+
+def split_css_rules(css: str) -> List[Tuple[str, str]]:
+    """Split minified CSS into top-level (prelude, body) pairs"""
+    rules = []
+    position = 0
+    while position < len(css):
+        brace = css.find('{', position)
+        if brace == -1:
+            break
+        depth = 0
+        for end in range(brace, len(css)):
+            if css[end] == '{':
+                depth += 1
+            elif css[end] == '}':
+                depth -= 1
+                if depth == 0:
+                    break
+        rules.append((css[position:brace].strip(), css[brace + 1:end]))
+        position = end + 1
+    return rules
+
+
+class AssetBuilder:
+    """Builds fingerprinted, precompressed CSS/JS and rewrites the pages that use them"""
+
+    def __init__(self, config: Dict):
+        asset_config = config.get('assets', {}) or {}
+        self.css_source = asset_config.get('css', 'css/styles.css')
+        self.js_source = asset_config.get('js', 'js/main.js')
+        self.pages = asset_config.get('pages', DEFAULT_PAGES)
+        self.critical_pages = asset_config.get('critical_css_pages', DEFAULT_PAGES[1:])
+
+    def build(self) -> Dict[str, str]:
+        """Run the whole asset stage; returns {source: built file}"""
+        print("\nBuilding static assets...")
+
+        with open(self.css_source, 'r', encoding='utf-8') as f:
+            css = minify_css(f.read())
+        with open(self.js_source, 'r', encoding='utf-8') as f:
+            js = minify_js(f.read())
+
+        built = {
+            self.css_source: self.write_fingerprinted(self.css_source, css, 'min.css'),
+            self.js_source: self.write_fingerprinted(self.js_source, js, 'min.js'),
+        }
+
+        critical_pages = {page for pattern in self.critical_pages for page in glob.glob(pattern)}
+        rewritten = 0
+        for pattern in self.pages:
+            for page in sorted(glob.glob(pattern)):
+                critical_css = css if page in critical_pages else None
+                if self.rewrite_page(page, built, critical_css):
+                    rewritten += 1
+
+        print(f"  ✓ {os.path.basename(built[self.css_source])}, {os.path.basename(built[self.js_source])} "
+              f"({rewritten} pages rewritten)")
+        return built
+
+    def write_fingerprinted(self, source: str, content: str, suffix: str) -> str:
+        """Write content as <name>.<hash>.<suffix> with .gz/.br siblings, removing stale builds"""
+        directory, filename = os.path.split(source)
+        stem = os.path.splitext(filename)[0]
+        data = content.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()[:10]
+        target = os.path.join(directory, f'{stem}.{digest}.{suffix}')
+
+        for stale in glob.glob(os.path.join(directory, f'{stem}.*.{suffix}*')):
+            if not stale.startswith(target):
+                os.remove(stale)
+
+        if not os.path.exists(target):
+            write_file_atomic(target, content)
+            with atomic_write(f'{target}.gz', 'wb') as f:
+                # mtime=0 keeps the compressed output byte-identical between builds
+                f.write(gzip.compress(data, compresslevel=9, mtime=0))
+            if brotli:
+                with atomic_write(f'{target}.br', 'wb') as f:
+                    f.write(brotli.compress(data, quality=11))
+
+        return target
+
+    def rewrite_page(self, page: str, built: Dict[str, str], full_css: Optional[str]) -> bool:
+        """Point a page at the built assets (and inline its critical CSS). Returns True if it changed."""
+        with open(page, 'r', encoding='utf-8', newline='') as f:
+            html = f.read()
+
+        prefix = '../' * page.replace('\\', '/').count('/')
+        updated = html
+        for source, target in built.items():
+            updated = self.asset_pattern(source, prefix).sub(
+                lambda m: f'{m.group(1)}{prefix}{target}{m.group(1)}', updated
+            )
+
+        if full_css is not None:
+            updated = self.inline_critical_css(updated, full_css, f'{prefix}{built[self.css_source]}')
+
+        if updated == html:
+            return False
+
+        write_file_atomic(page, updated)
+        return True
+
+    @staticmethod
+    def asset_pattern(source: str, prefix: str):
+        """Match a quoted reference to a source asset or any fingerprinted build of it"""
+        directory, filename = os.path.split(source)
+        stem, extension = os.path.splitext(filename)
+        return re.compile(
+            r'(["\'])' + re.escape(f'{prefix}{directory}/{stem}')
+            + r'(?:\.[0-9a-f]{10}\.min)?' + re.escape(extension) + r'\1'
+        )
+
+    def inline_critical_css(self, html: str, full_css: str, stylesheet_href: str) -> str:
+        """
+        Inline the CSS rules needed by the page's above-the-fold markup
+
+        The blocking <link> is replaced by a marked block holding the inlined
+        rules and a non-blocking load of the full stylesheet, so re-running the
+        build regenerates the block in place.
+        """
+        start = html.find(CRITICAL_CSS_START)
+        if start != -1:
+            end = html.find(CRITICAL_CSS_END, start) + len(CRITICAL_CSS_END)
+        else:
+            match = STYLESHEET_LINK_RE.search(html)
+            if not match or stylesheet_href not in match.group(0):
+                return html
+            start, end = match.span()
+
+        critical = self.critical_css(full_css, self.above_the_fold(html))
+        if not critical:
+            return html
+
+        indent = html[html.rfind('\n', 0, start) + 1:start]
+        block = '\n'.join([
+            CRITICAL_CSS_START,
+            f'<style>{critical}</style>',
+            f'<link href="{stylesheet_href}" rel="stylesheet" media="print" onload="this.media=\'all\'"/>',
+            f'<noscript><link href="{stylesheet_href}" rel="stylesheet"/></noscript>',
+            CRITICAL_CSS_END
+        ]).replace('\n', '\n' + indent)
+        return html[:start] + block + html[end:]
+
+    @staticmethod
+    def above_the_fold(html: str) -> str:
+        """The markup the browser paints first: everything up to the second product card"""
+        for marker in FOLD_MARKERS:
+            fold = html.find(marker)
+            if fold != -1:
+                return html[:fold]
+        return html
+
+    def critical_css(self, css: str, html: str) -> str:
+        """Select the rules whose selectors only use classes, ids and tags present in the markup"""
+        classes = {name for value in CLASS_ATTR_RE.findall(html) for name in value.split()}
+        ids = set(ID_ATTR_RE.findall(html))
+        tags = {tag.lower() for tag in TAG_RE.findall(html)} | {'html', 'body'}
+
+        selected = []
+        for prelude, body in split_css_rules(css):
+            if prelude.startswith('@media'):
+                inner = ''.join(
+                    f'{p}{{{b}}}' for p, b in split_css_rules(body) if self._matches(p, classes, ids, tags)
+                )
+                if inner:
+                    selected.append(f'{prelude}{{{inner}}}')
+            elif prelude.startswith('@'):
+                continue  # keyframes, font-face: not needed for the first paint
+            elif self._matches(prelude, classes, ids, tags):
+                selected.append(f'{prelude}{{{body}}}')
+        return ''.join(selected)
+
+    @staticmethod
+    def _matches(prelude: str, classes: Set[str], ids: Set[str], tags: Set[str]) -> bool:
+        """Whether any selector in a rule's selector list could match the markup"""
+        for selector in prelude.split(','):
+            bare = re.sub(r'::?[\w-]+(\([^)]*\))?', '', selector)
+            if (set(SELECTOR_CLASS_RE.findall(bare)) <= classes
+                    and set(SELECTOR_ID_RE.findall(bare)) <= ids
+                    and {tag.lower() for tag in SELECTOR_TAG_RE.findall(bare)} <= tags):
+                return True
+        return False
+
+
+def main():
+    """Main execution function"""
+    import yaml
+
+    with open("automation/config.yaml", 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    AssetBuilder(config).build()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+TerraLogic Tech - Benchmarks
+Times the automation hot paths on a synthetic catalogue and flags regressions
+
+    python automation/benchmark.py --products 10000 --categories 20
+    python automation/benchmark.py --products 10000 --save-baseline
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+import yaml
+
+from file_utils import write_file_atomic
+from manual_updater import ManualProductUpdater
+from paapi_stub import make_items
+from product_finder import AmazonProductFinder
+from product_store import ProductStore
+from signer import SigV4Signer
+from website_updater import WebsiteUpdater
+
+
+DEFAULT_BASELINE = "automation/benchmarks/baseline.json"
+PAGE_TEMPLATE = "categories/chairs.html"
+
+ADJECTIVES = ['Ergonomic', 'Compact', 'Premium', 'Adjustable', 'Wireless', 'Portable', 'Heavy-Duty', 'Modern']
+NOUNS = ['Chair', 'Desk', 'Monitor', 'Lamp', 'Webcam', 'Headset', 'Keyboard', 'Stand', 'Speaker', 'Mat']
+FEATURES = ['Adjustable height', 'Lumbar support', 'USB-C charging', 'Tool-free assembly', 'Anti-glare coating',
+            'Cable management', 'Memory foam', 'Dimmable LED', 'Noise cancelling', '5-year warranty']
+TIERS = ['budget', 'mid', 'premium']
+
+
+def generate_catalogue(products: int, categories: int, seed: int = 42) -> Dict[str, List[Dict]]:
+    """Synthetic catalogue shaped like the store's products, spread evenly over categories"""
+    rng = random.Random(seed)
+    catalogue = {f'bench-{c:03d}': [] for c in range(categories)}
+    keys = list(catalogue)
+
+    for n in range(products):
+        asin = f'B{n:09d}'
+        low = rng.randint(20, 900)
+        price_range = f'${low}-{low + rng.randint(10, 200)}'
+        catalogue[keys[n % categories]].append({
+            'name': f'{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {n} with {rng.choice(FEATURES)}',
+            'asin': asin,
+            'price': price_range,
+            'price_range': price_range,
+            'description': f'Synthetic benchmark product number {n} & friends <for> escaping.',
+            'features': rng.sample(FEATURES, 4),
+            'image_url': '',
+            'tier': rng.choice(TIERS),
+            'affiliate_url': f'https://www.amazon.com/dp/{asin}?tag=bench-20',
+            'rating': round(rng.uniform(3.5, 5.0), 1),
+            'review_count': rng.randint(10, 50000)
+        })
+    return catalogue
+
+
+def generate_pages(catalogue: Dict[str, List[Dict]], root: str, template_path: str = PAGE_TEMPLATE):
+    """Write one category page per synthetic category, copied from a real page"""
+    os.makedirs(os.path.join(root, 'categories'), exist_ok=True)
+    for category in catalogue:
+        shutil.copyfile(template_path, os.path.join(root, 'categories', f'{category}.html'))
+
+
+class BenchmarkSuite:
+    """Runs each hot-path benchmark on one synthetic catalogue"""
+
+    def __init__(self, products: int = 10000, categories: int = 20, repeat: int = 3,
+                 config_path: str = "automation/config.yaml"):
+        self.products = products
+        self.categories = categories
+        self.repeat = repeat
+        self.config_path = os.path.abspath(config_path)
+        self.catalogue = generate_catalogue(products, categories)
+        self.flat = [product for items in self.catalogue.values() for product in items]
+        self.workdir = tempfile.mkdtemp(prefix='terralogic-bench-')
+        generate_pages(self.catalogue, self.workdir)
+
+    @property
+    def key(self) -> str:
+        """Baseline key: results are only comparable for the same catalogue size"""
+        return f'products={self.products},categories={self.categories}'
+
+    def benchmarks(self) -> Dict[str, Callable[[], Callable[[], int]]]:
+        """Name -> setup function returning the timed callable (which returns the item count)"""
+        return {
+            'sign_request': self.setup_sign_request,
+            'parse_products': self.setup_parse_products,
+            'generate_product_card_html': self.setup_card_html,
+            'update_category_page': self.setup_update_category_page,
+            'store_save': self.setup_store_save,
+            'store_load': self.setup_store_load,
+            'legacy_json_load': self.setup_legacy_json_load,
+            'manual_load': self.setup_manual_load,
+            'manual_process_products': self.setup_manual_process,
+        }
+
+    def _finder(self) -> AmazonProductFinder:
+        finder = AmazonProductFinder(self.config_path)
+        finder.associate_tag = 'bench-20'
+        finder.signer = SigV4Signer('AKIDEXAMPLE', 'bench-secret', finder.host, finder.region)
+        return finder
+
+    def _updater(self) -> WebsiteUpdater:
+        updater = WebsiteUpdater(self.config_path)
+        website_config = updater.config.setdefault('website', {})
+        website_config['card_template'] = os.path.abspath(
+            website_config.get('card_template', "automation/templates/product-card.html"))
+        website_config['product_page_template'] = os.path.abspath(
+            website_config.get('product_page_template', "automation/templates/product-page.html"))
+        updater.images = None
+        updater.history = None
+        updater.manifest = {'pages': {}}
+        updater.manifest_path = os.path.join(self.workdir, 'build-manifest.json')
+        return updater
+
+    def setup_sign_request(self):
+        finder = self._finder()
+        params = {'Keywords': 'ergonomic office chair', 'SearchIndex': 'OfficeProducts', 'ItemCount': 10}
+        count = min(self.products, 5000)
+
+        def run():
+            for n in range(count):
+                finder._sign_request('GET', '/paapi5/searchitems', dict(params, ItemPage=n % 10 + 1))
+            return count
+        return run
+
+    def setup_parse_products(self):
+        finder = self._finder()
+        response = {'SearchResult': {'Items': make_items('bench product', self.products)}}
+        return lambda: len(finder._parse_products(response))
+
+    def setup_card_html(self):
+        updater = self._updater()
+        template = updater.get_card_template()
+
+        def run():
+            for category, products in self.catalogue.items():
+                for index, product in enumerate(products):
+                    updater.generate_product_card_html(product, index, category, template)
+            return len(self.flat)
+        return run
+
+    def setup_update_category_page(self):
+        updater = self._updater()
+
+        def run():
+            for category, products in self.catalogue.items():
+                updater.update_category_page(category, products, force=True)
+            return len(self.flat)
+        return run
+
+    def setup_store_save(self):
+        store = ProductStore(os.path.join(self.workdir, 'store'))
+
+        def run():
+            store.replace_all(self.catalogue, source='benchmark')
+            store.export_legacy(os.path.join(self.workdir, 'products.json'))
+            return len(self.flat)
+        return run
+
+    def setup_store_load(self):
+        store = ProductStore(os.path.join(self.workdir, 'store'))
+        store.replace_all(self.catalogue, source='benchmark')
+        return lambda: sum(1 for _ in ProductStore(store.root).iter_all())
+
+    def setup_legacy_json_load(self):
+        path = os.path.join(self.workdir, 'products.json')
+        ProductStore(os.path.join(self.workdir, 'store')).export_legacy(path)
+
+        def run():
+            with open(path, 'r', encoding='utf-8') as f:
+                return sum(len(items) for items in json.load(f)['products'].values())
+        return run
+
+    def _manual_yaml(self) -> str:
+        path = os.path.join(self.workdir, 'products-manual.yaml')
+        if not os.path.exists(path):
+            products = {
+                category: [{key: product[key] for key in ('name', 'asin', 'price_range', 'tier', 'description',
+                                                          'features', 'affiliate_url', 'rating', 'review_count')}
+                           for product in items]
+                for category, items in self.catalogue.items()
+            }
+            write_file_atomic(path, yaml.safe_dump({'products': products}, sort_keys=False, allow_unicode=True))
+        return path
+
+    def setup_manual_load(self):
+        path = self._manual_yaml()
+        return lambda: sum(len(items) for items in ManualProductUpdater(path).products.values())
+
+    def setup_manual_process(self):
+        updater = ManualProductUpdater(self._manual_yaml())
+
+        def run():
+            return sum(len(items) for items in updater.process_products().values())
+        return run
+
+    def run(self, only: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """Run the benchmarks (best of `repeat`), returning {name: {seconds, median, items, per_second}}"""
+        results = {}
+        cwd = os.getcwd()
+        try:
+            # Pages, manifests and stores are written inside the scratch directory
+            os.chdir(self.workdir)
+            for name, setup in self.benchmarks().items():
+                if only and name not in only:
+                    continue
+                with contextlib.redirect_stdout(io.StringIO()):
+                    os.chdir(cwd)
+                    timed = setup()
+                    os.chdir(self.workdir)
+                    times = []
+                    for _ in range(self.repeat):
+                        started = time.perf_counter()
+                        items = timed()
+                        times.append(time.perf_counter() - started)
+
+                best = min(times)
+                results[name] = {
+                    'seconds': round(best, 6),
+                    'median': round(statistics.median(times), 6),
+                    'items': items,
+                    'per_second': round(items / best) if best else None
+                }
+                print(f"  {name:28} {best * 1000:10.1f} ms  {results[name]['per_second'] or 0:>12,}/s")
+        finally:
+            os.chdir(cwd)
+        return results
+
+    def cleanup(self):
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+def load_baseline(path: str) -> Dict:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_baseline(path: str, key: str, results: Dict[str, Dict]):
+    """Store these results as the baseline for this catalogue size"""
+    baseline = load_baseline(path)
+    baseline[key] = {
+        'python': sys.version.split()[0],
+        'recorded': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results
+    }
+    write_file_atomic(path, json.dumps(baseline, indent=2, sort_keys=True) + '\n')
+
+
+def find_regressions(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    """Benchmarks that got slower than the baseline by more than `threshold` (0.25 = 25%)"""
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous and result['seconds'] > previous['seconds'] * (1 + threshold):
+            ratio = result['seconds'] / previous['seconds']
+            regressions.append(f"{name}: {previous['seconds'] * 1000:.1f} ms -> "
+                               f"{result['seconds'] * 1000:.1f} ms ({ratio:.2f}x)")
+    return regressions
+
+
+def main():
+    """Main execution function"""
+    parser = argparse.ArgumentParser(description="TerraLogic Tech - Benchmarks")
+    parser.add_argument('--products', type=int, default=10000, help="synthetic catalogue size (1k-100k)")
+    parser.add_argument('--categories', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=3, help="runs per benchmark; the best one counts")
+    parser.add_argument('--only', nargs='+', help="run just these benchmarks")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help="store these results as the new baseline")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="flag benchmarks more than this fraction slower than the baseline")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"TerraLogic Tech - Benchmarks ({args.products:,} products, {args.categories} categories)")
+    print("=" * 60)
+
+    suite = BenchmarkSuite(args.products, args.categories, args.repeat)
+    try:
+        results = suite.run(args.only)
+    finally:
+        suite.cleanup()
+
+    if args.save_baseline:
+        save_baseline(args.baseline, suite.key, results)
+        print(f"\nBaseline saved to {args.baseline}")
+        return
+
+    baseline = load_baseline(args.baseline).get(suite.key)
+    if not baseline:
+        print(f"\nNo baseline for {suite.key} in {args.baseline} (run with --save-baseline)")
+        return
+
+    regressions = find_regressions(results, baseline['results'], args.threshold)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) against the baseline:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print("\n✓ No regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+TerraLogic Tech - Product Card Templates
+Compiled, cached templates for rendering product cards
+"""
+
+import os
+import re
+import hashlib
+from html import escape
+from typing import Dict, List, Tuple
+
+
+DEFAULT_CARD_TEMPLATE = "automation/templates/product-card.html"
+
+# {{ field }} is HTML-escaped (safe in text and quoted attributes); {{ field|raw }} is inserted as-is
+PLACEHOLDER_RE = re.compile(r'{{\s*(\w+)\s*(\|\s*raw\s*)?}}')
+
+
+class CardTemplate:
+    """A card template compiled once into a Python function over its static fragments"""
+
+    def __init__(self, source: str):
+        self.source = source
+        self.fingerprint = hashlib.sha256(source.encode('utf-8')).hexdigest()
+        self.render = self._compile(source)
+
+    @staticmethod
+    def _compile(source: str):
+        """
+        Turn the template into a function that escapes each field once and joins the pieces
+
+        Fields get generated local names (_v0, _v1, ...) and are looked up by
+        string literal, so any placeholder name ("class", "get") is safe.
+        """
+        variables: Dict[Tuple[str, bool], str] = {}
+        pieces: List[str] = []
+        position = 0
+        for match in PLACEHOLDER_RE.finditer(source):
+            field = (match.group(1), bool(match.group(2)))
+            variable = variables.setdefault(field, f'_v{len(variables)}')
+            pieces.append(repr(source[position:match.start()]))
+            pieces.append(variable)
+            position = match.end()
+        pieces.append(repr(source[position:]))
+
+        lines = ['def render(fields):', '    get = fields.get']
+        for (name, raw), variable in variables.items():
+            value = f"get({name!r}, '')"
+            lines.append(f'    {variable} = {value if raw else f"escape_html({value})"}')
+        lines.append(f"    return ''.join(({', '.join(pieces)},))")
+
+        namespace = {'escape_html': escape_html}
+        exec('\n'.join(lines), namespace)
+        return namespace['render']
+
+    def __getstate__(self) -> Dict:
+        # The compiled function cannot be pickled (e.g. for worker processes); rebuild it instead
+        return {'source': self.source}
+
+    def __setstate__(self, state: Dict):
+        self.__init__(state['source'])
+
+
+def escape_html(value) -> str:
+    """HTML-escape a value for text or a quoted attribute, skipping the work for clean strings"""
+    value = str(value)
+    if '&' in value or '<' in value or '>' in value or '"' in value or "'" in value:
+        return escape(value)
+    return value
+
+
+_template_cache: Dict[str, Tuple[int, CardTemplate]] = {}
+
+
+def load_card_template(path: str = DEFAULT_CARD_TEMPLATE) -> CardTemplate:
+    """Load and compile a card template, reusing the compiled copy until the file changes"""
+    mtime = os.stat(path).st_mtime_ns
+    cached = _template_cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    with open(path, 'r', encoding='utf-8') as f:
+        # Each card starts on its own line in the products grid
+        template = CardTemplate('\n' + f.read().rstrip('\n'))
+
+    _template_cache[path] = (mtime, template)
+    return template
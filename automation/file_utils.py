@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+TerraLogic Tech - File Utilities
+Helpers shared by the automation scripts for writing output files safely
+"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import IO, Iterable, Iterator
+
+from metrics import get_metrics
+
+
+@contextmanager
+def atomic_write(path: str, mode: str = 'w') -> Iterator[IO]:
+    """Open a temporary file next to `path` and rename it into place once the block succeeds"""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f'.{os.path.basename(path)}.', suffix='.tmp')
+    try:
+        if 'b' in mode:
+            f = os.fdopen(fd, mode)
+        else:
+            f = os.fdopen(fd, mode, encoding='utf-8', newline='')
+        with f:
+            yield f
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+        metrics = get_metrics()
+        metrics.count('files_written')
+        metrics.count('bytes_written', os.path.getsize(path))
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+def write_file_atomic(path: str, content: str):
+    """Write a file via a temporary file and rename, so readers never see a partial write"""
+    with atomic_write(path) as f:
+        f.write(content)
+
+
+def write_chunks_atomic(path: str, chunks: Iterable[str]):
+    """Stream pieces of a file (e.g. rendered cards, as they are produced) through a temporary file and rename"""
+    with atomic_write(path) as f:
+        for chunk in chunks:
+            f.write(chunk)
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+TerraLogic Tech - Image Pipeline
+Fetches product images once and generates responsive WebP/JPEG variants
+"""
+
+import os
+import io
+import json
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+from file_utils import atomic_write, write_file_atomic
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; without it cards keep the remote image URL
+    Image = None
+
+
+class ImagePipeline:
+    """
+    Content-addressed image cache with resized variants
+
+    Originals are stored under cache_dir by the SHA-256 of their bytes and
+    variants are written to output_dir (served with the site). A manifest
+    maps each source URL to its processed record, so an image that has been
+    processed before is never downloaded or resized again.
+    """
+
+    def __init__(self, output_dir: str = "images/products", cache_dir: str = "automation/.cache/images",
+                 widths: Iterable[int] = (240, 480, 720), quality: int = 80, max_workers: int = 4):
+        self.output_dir = output_dir
+        self.cache_dir = cache_dir
+        self.widths = sorted(widths)
+        self.quality = quality
+        self.max_workers = max_workers
+        self.manifest_path = os.path.join(output_dir, 'manifest.json')
+        self.manifest = self._load_manifest()
+        # Content hash -> record, so a picture served from several URLs is resized once
+        self.by_hash = {record['hash']: record for record in self.manifest.values()}
+        self.lock = threading.Lock()
+        self._session = None
+
+    @classmethod
+    def from_config(cls, config: Dict) -> Optional['ImagePipeline']:
+        """Build the pipeline from the `images` section of config.yaml (None when disabled or no Pillow)"""
+        image_config = config.get('images', {}) or {}
+        if not image_config.get('enabled', True):
+            return None
+        if Image is None:
+            print("Warning: Pillow not installed; product images will not be resized")
+            return None
+        return cls(
+            output_dir=image_config.get('output_dir', "images/products"),
+            cache_dir=image_config.get('cache_dir', "automation/.cache/images"),
+            widths=image_config.get('widths', (240, 480, 720)),
+            quality=image_config.get('quality', 80)
+        )
+
+    def _load_manifest(self) -> Dict:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def save_manifest(self):
+        write_file_atomic(self.manifest_path, json.dumps(self.manifest, indent=2, sort_keys=True) + '\n')
+
+    def process_all(self, urls: Iterable[str]) -> Dict[str, Dict]:
+        """Process many image URLs concurrently; returns {url: record} for the ones that succeeded"""
+        unique_urls = [url for url in dict.fromkeys(urls) if url]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            records = dict(zip(unique_urls, executor.map(self.process, unique_urls)))
+
+        self.save_manifest()
+        return {url: record for url, record in records.items() if record}
+
+    def process(self, url: str) -> Optional[Dict]:
+        """Fetch (if needed) and resize one image; returns its record or None on failure"""
+        with self.lock:
+            record = self.manifest.get(url)
+        if record and self._variants_exist(record):
+            return record
+
+        try:
+            data = self._fetch(url)
+            content_hash = hashlib.sha256(data).hexdigest()[:20]
+
+            # The same picture may be served from several URLs
+            with self.lock:
+                existing = self.by_hash.get(content_hash)
+            if existing and self._variants_exist(existing):
+                record = existing
+            else:
+                record = self._make_variants(content_hash, data)
+        except Exception as e:
+            print(f"Warning: could not process image {url}: {e}")
+            return None
+
+        with self.lock:
+            self.manifest[url] = record
+            self.by_hash[record['hash']] = record
+        return record
+
+    def _fetch(self, url: str) -> bytes:
+        """Download an image, or read it from the content-addressed cache"""
+        url_key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        pointer = os.path.join(self.cache_dir, 'urls', url_key)
+        if os.path.exists(pointer):
+            with open(pointer, 'r') as f:
+                cached = os.path.join(self.cache_dir, f.read().strip())
+            if os.path.exists(cached):
+                with open(cached, 'rb') as f:
+                    return f.read()
+
+        if self._session is None:
+            import requests
+            self._session = requests.Session()
+        response = self._session.get(url, timeout=(5, 30))
+        response.raise_for_status()
+        data = response.content
+
+        content_hash = hashlib.sha256(data).hexdigest()
+        relative = os.path.join(content_hash[:2], content_hash)
+        with atomic_write(os.path.join(self.cache_dir, relative), 'wb') as f:
+            f.write(data)
+        with atomic_write(pointer) as f:
+            f.write(relative)
+        return data
+
+    def _make_variants(self, content_hash: str, data: bytes) -> Dict:
+        """Write WebP and JPEG variants at each configured width (never upscaling)"""
+        with Image.open(io.BytesIO(data)) as source:
+            image = source.convert('RGB')
+
+        width, height = image.size
+        variants = []
+        for target in self.widths:
+            if target >= width and variants:
+                break
+            variant_width = min(target, width)
+            variant_height = max(1, round(height * variant_width / width))
+            resized = image if variant_width == width else image.resize((variant_width, variant_height), Image.LANCZOS)
+
+            # Forward slashes: these paths are used as URLs in the pages
+            base = f'{self.output_dir}/{content_hash[:2]}/{content_hash}-{variant_width}'
+            for extension, image_format in (('webp', 'WEBP'), ('jpg', 'JPEG')):
+                with atomic_write(f'{base}.{extension}', 'wb') as f:
+                    resized.save(f, image_format, quality=self.quality, optimize=image_format == 'JPEG')
+
+            variants.append({'width': variant_width, 'height': variant_height,
+                             'webp': f'{base}.webp', 'jpeg': f'{base}.jpg'})
+
+        return {'hash': content_hash, 'width': width, 'height': height, 'variants': variants}
+
+    @staticmethod
+    def _variants_exist(record: Dict) -> bool:
+        return all(os.path.exists(v['webp']) and os.path.exists(v['jpeg']) for v in record.get('variants', []))
+
+
+def picture_html(record: Dict, alt: str, prefix: str = '../', sizes: str = '(max-width: 600px) 100vw, 360px') -> str:
+    """Responsive, lazily loaded <picture> markup for a processed image"""
+    variants: List[Dict] = record['variants']
+    webp_srcset = ', '.join(f"{prefix}{v['webp']} {v['width']}w" for v in variants)
+    jpeg_srcset = ', '.join(f"{prefix}{v['jpeg']} {v['width']}w" for v in variants)
+    default = variants[len(variants) // 2]
+    return (
+        f'<picture>'
+        f'<source type="image/webp" srcset="{webp_srcset}" sizes="{sizes}">'
+        f'<img src="{prefix}{default["jpeg"]}" srcset="{jpeg_srcset}" sizes="{sizes}" '
+        f'width="{default["width"]}" height="{default["height"]}" alt="{alt}" loading="lazy" decoding="async">'
+        f'</picture>'
+    )
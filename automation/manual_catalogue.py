@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+TerraLogic Tech - Manual Catalogue Loader
+Loads products-manual.yaml with the libyaml parser, validates it in one pass and caches the result
+"""
+
+import os
+import hashlib
+import pickle
+from typing import Dict, List, Optional, Tuple
+
+import yaml
+from yaml.nodes import MappingNode, Node, ScalarNode, SequenceNode
+
+from file_utils import atomic_write
+
+# libyaml's C parser is many times faster; fall back to the pure-Python one without it
+SafeLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# Bump whenever validation or normalisation changes, so old caches are ignored
+CACHE_VERSION = 1
+DEFAULT_CACHE_PATH = "automation/.cache/manual-products.pickle"
+
+REQUIRED_FIELDS = ('name', 'asin', 'price_range')
+TIERS = ('budget', 'mid', 'premium')
+
+# Field -> default, in the order products are written out
+PRODUCT_DEFAULTS = {
+    'name': 'Product Name',
+    'asin': '',
+    'price': 'Check Amazon',
+    'price_range': 'Check Amazon',
+    'description': '',
+    'features': [],
+    'image_url': '',
+    'tier': 'mid',
+    'affiliate_url': '#',
+    'rating': 4.5,
+    'review_count': 100,
+}
+
+
+class CatalogueError(Exception):
+    """Raised when the manual catalogue is invalid; `errors` lists every problem found"""
+
+    def __init__(self, path: str, errors: List[str]):
+        self.path = path
+        self.errors = errors
+        super().__init__(f"{path}: {len(errors)} error(s)\n" + '\n'.join(errors))
+
+
+def _mapping(node: MappingNode) -> Dict[str, Tuple[Node, Node]]:
+    """Key text -> (key node, value node) for a mapping node"""
+    return {key.value: (key, value) for key, value in node.value if isinstance(key, ScalarNode)}
+
+
+def validate_document(root: Optional[Node], path: str) -> List[str]:
+    """
+    Check the whole document in one pass over the YAML node tree
+
+    Returns every problem found as "path:line: message"; an empty list
+    means the catalogue is valid.
+    """
+    errors = []
+
+    def error(node: Node, message: str):
+        errors.append(f"{path}:{node.start_mark.line + 1}: {message}")
+
+    if not isinstance(root, MappingNode) or 'products' not in _mapping(root):
+        return [f"{path}:1: expected a top-level 'products' mapping"]
+
+    _, categories = _mapping(root)['products']
+    if not isinstance(categories, MappingNode):
+        error(categories, "'products' must map category keys to lists of products")
+        return errors
+
+    for category_node, products in categories.value:
+        category = category_node.value
+        if isinstance(products, ScalarNode) and products.tag == 'tag:yaml.org,2002:null':
+            continue  # an empty category is fine
+        if not isinstance(products, SequenceNode):
+            error(products, f"{category}: expected a list of products")
+            continue
+
+        for position, product in enumerate(products.value, 1):
+            where = f"{category}[{position}]"
+            if not isinstance(product, MappingNode):
+                error(product, f"{where}: expected a mapping of product fields")
+                continue
+
+            fields = _mapping(product)
+            for field in REQUIRED_FIELDS:
+                value = fields.get(field, (None, None))[1]
+                if value is None or not isinstance(value, ScalarNode) or not str(value.value).strip():
+                    error(value or product, f"{where}: missing required field '{field}'")
+
+            if 'tier' in fields:
+                tier = fields['tier'][1]
+                if not isinstance(tier, ScalarNode) or str(tier.value).lower() not in TIERS:
+                    error(tier, f"{where}: tier must be one of {', '.join(TIERS)}")
+
+            if 'features' in fields:
+                features = fields['features'][1]
+                if not isinstance(features, SequenceNode) or not all(isinstance(f, ScalarNode) for f in features.value):
+                    error(features, f"{where}: features must be a list of strings")
+
+            if 'rating' in fields:
+                rating = fields['rating'][1]
+                try:
+                    valid = isinstance(rating, ScalarNode) and 0 <= float(rating.value) <= 5
+                except ValueError:
+                    valid = False
+                if not valid:
+                    error(rating, f"{where}: rating must be a number between 0 and 5")
+
+            if 'review_count' in fields:
+                count = fields['review_count'][1]
+                if not isinstance(count, ScalarNode) or not str(count.value).isdigit():
+                    error(count, f"{where}: review_count must be a whole number")
+
+    return errors
+
+
+def normalize(products: Dict) -> Dict[str, List[Dict]]:
+    """Build the website's product dicts (defaults filled in) straight from the parsed YAML"""
+    catalogue = {}
+    for category, items in products.items():
+        normalized = []
+        for product in items or []:
+            formatted = {field: product.get(field, default) for field, default in PRODUCT_DEFAULTS.items()}
+            formatted['price'] = formatted['price_range']
+            formatted['tier'] = str(formatted['tier']).lower()
+            normalized.append(formatted)
+        catalogue[category] = normalized
+    return catalogue
+
+
+def parse_catalogue(text: str, path: str) -> Dict[str, List[Dict]]:
+    """Parse, validate and normalise catalogue YAML (raises CatalogueError)"""
+    loader = SafeLoader(text)
+    try:
+        root = loader.get_single_node()
+        errors = validate_document(root, path)
+        if errors:
+            raise CatalogueError(path, errors)
+        return normalize(loader.construct_document(root)['products'] or {})
+    except yaml.MarkedYAMLError as e:
+        mark = e.problem_mark or e.context_mark
+        line = mark.line + 1 if mark else 1
+        raise CatalogueError(path, [f"{path}:{line}: {e.problem or e}"]) from None
+    finally:
+        loader.dispose()
+
+
+def load_catalogue(path: str, cache_path: Optional[str] = DEFAULT_CACHE_PATH) -> Dict[str, List[Dict]]:
+    """
+    Load the manual catalogue, reusing the validated copy cached from the last run
+
+    The cache is keyed by the file's mtime and size, then by its SHA-256,
+    so a file that was only touched is not parsed again.
+    """
+    stat = os.stat(path)
+    source = os.path.abspath(path)
+    cached = _read_cache(cache_path)
+    if cached and cached['source'] != source:
+        cached = None
+    if cached and (cached['mtime_ns'], cached['size']) == (stat.st_mtime_ns, stat.st_size):
+        return cached['products']
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+
+    if cached and cached['sha256'] == digest:
+        products = cached['products']
+    else:
+        products = parse_catalogue(data.decode('utf-8'), path)
+
+    if cache_path:
+        with atomic_write(cache_path, 'wb') as f:
+            pickle.dump({'version': CACHE_VERSION, 'source': source, 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size,
+                         'sha256': digest, 'products': products}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return products
+
+
+def _read_cache(cache_path: Optional[str]) -> Optional[Dict]:
+    if not cache_path:
+        return None
+    try:
+        with open(cache_path, 'rb') as f:
+            cached = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+        return None
+    return cached if isinstance(cached, dict) and cached.get('version') == CACHE_VERSION else None
@@ -4,91 +4,105 @@ TerraLogic Tech - Manual Product Updater
 Simple tool to update products without PA-API
 """
 
+import argparse
 import yaml
 import os
+import sys
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+from manual_catalogue import CatalogueError, load_catalogue
+from metrics import get_metrics
+from price_history import PriceHistory
+from product_store import ProductStore
 from website_updater import WebsiteUpdater
 
+def load_config(config_path: str = "automation/config.yaml") -> Dict:
+    """Load config.yaml ({} when it is missing)"""
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            return yaml.safe_load(f) or {}
+    except FileNotFoundError:
+        return {}
+
+
 class ManualProductUpdater:
     """Updates website with manually configured products"""
 
-    def __init__(self, manual_config_path: str = "automation/products-manual.yaml"):
+    def __init__(self, manual_config_path: str = "automation/products-manual.yaml", config: Optional[Dict] = None):
         self.manual_config_path = manual_config_path
-        self.products = self.load_manual_products()
+        self.config = config if config is not None else load_config()
+        self.errors = []
+        self.metrics = get_metrics()
+        with self.metrics.span('load'):
+            self.products = self.load_manual_products()
 
     def load_manual_products(self):
-        """Load manually configured products from YAML"""
+        """Load manually configured products from YAML (validated, and cached between runs)"""
         if not os.path.exists(self.manual_config_path):
             print(f"❌ Manual products file not found: {self.manual_config_path}")
             print("📝 Please create it using products-manual.example.yaml as a template")
             return {}
 
         try:
-            with open(self.manual_config_path, 'r') as f:
-                data = yaml.safe_load(f)
-                return data.get('products', {})
+            return load_catalogue(self.manual_config_path)
+        except CatalogueError as e:
+            self.errors = e.errors
+            print(f"❌ {self.manual_config_path} is invalid ({len(e.errors)} error(s)):")
+            for error in e.errors:
+                print(f"   {error}")
+            return {}
         except Exception as e:
+            self.errors = [str(e)]
             print(f"❌ Error loading manual products: {e}")
             return {}
 
-    def validate_product(self, product, category):
-        """Validate that product has required fields"""
-        required = ['name', 'asin', 'price_range', 'affiliate_url']
-        missing = [field for field in required if not product.get(field)]
-
-        if missing:
-            print(f"⚠️  Warning: Product in {category} missing: {', '.join(missing)}")
-            return False
-        return True
-
     def generate_affiliate_url(self, asin: str, tag: str = None) -> str:
         """Generate Amazon affiliate URL from ASIN"""
-        # Get tag from environment or config
+        # Get tag from environment or config (each marketplace names its own variable)
+        amazon_config = self.config.get('amazon', {}) or {}
         if not tag:
-            tag = os.getenv('AMAZON_ASSOCIATE_TAG', 'yourname-20')
+            tag = os.getenv(amazon_config.get('associate_tag_env', 'AMAZON_ASSOCIATE_TAG'), 'yourname-20')
 
-        return f"https://www.amazon.com/dp/{asin}?tag={tag}"
+        return f"https://{amazon_config.get('marketplace', 'www.amazon.com')}/dp/{asin}?tag={tag}"
 
     def process_products(self):
-        """Process and format products for website updater"""
-        processed = {}
+        """
+        Process and format products for website updater
+
+        The loader already validated the products and built the website's
+        product dicts, so this only fills in affiliate links, in place.
+        """
+        amazon_config = self.config.get('amazon', {}) or {}
+        tag = os.getenv(amazon_config.get('associate_tag_env', 'AMAZON_ASSOCIATE_TAG'))
+        marketplace = amazon_config.get('marketplace', 'www.amazon.com')
 
         for category, products in self.products.items():
-            processed[category] = []
-
-            for idx, product in enumerate(products, 1):
-                # Skip invalid products
-                if not self.validate_product(product, category):
-                    continue
-
-                # Auto-generate affiliate URL if not provided
-                if not product.get('affiliate_url') and product.get('asin'):
-                    tag = os.getenv('AMAZON_ASSOCIATE_TAG')
-                    if tag:
-                        product['affiliate_url'] = self.generate_affiliate_url(
-                            product['asin'],
-                            tag
-                        )
-
-                # Format product for website updater
-                formatted = {
-                    'name': product.get('name', 'Product Name'),
-                    'asin': product.get('asin', ''),
-                    'price': product.get('price_range', 'Check Amazon'),
-                    'price_range': product.get('price_range', 'Check Amazon'),
-                    'description': product.get('description', ''),
-                    'features': product.get('features', []),
-                    'image_url': product.get('image_url', ''),
-                    'tier': product.get('tier', 'mid'),
-                    'affiliate_url': product.get('affiliate_url', '#'),
-                    'rating': product.get('rating', 4.5),
-                    'review_count': product.get('review_count', 100)
-                }
-
-                processed[category].append(formatted)
-
-            print(f"✅ Processed {len(processed[category])} products for {category}")
-
-        return processed
+            for product in products:
+                # Auto-generate affiliate URL if not provided (or if it is for another marketplace)
+                host = urlparse(product['affiliate_url']).netloc
+                other_marketplace = host.startswith('www.amazon.') and host != marketplace
+                if (product['affiliate_url'] in ('', '#') or other_marketplace) and product['asin'] and tag:
+                    product['affiliate_url'] = self.generate_affiliate_url(product['asin'], tag)
+
+            print(f"✅ Processed {len(products)} products for {category}")
+
+        return self.products
+
+    def save_products(self, products: Dict[str, List[Dict]]):
+        """Save processed products to the product store and record what moved in the price history"""
+        with self.metrics.span('save'):
+            store = ProductStore.from_config(self.config)
+            store.replace_all(products, source='manual')
+            store.export_legacy(self.config.get('storage', {}).get('legacy_path', "automation/products.json"))
+
+        print(f"\n✅ Saved products to {store.root}")
+
+        # Record what moved, so only those product cards are re-rendered
+        history = PriceHistory.from_config(self.config)
+        if history is not None:
+            with self.metrics.span('history'):
+                changed = history.record(product for items in products.values() for product in items)
+            print(f"✅ Price history: {len(changed)} products changed")
 
     def update_website(self):
         """Update website HTML files with products"""
@@ -96,38 +110,34 @@ class ManualProductUpdater:
         print("Manual Product Updater - Updating Website")
         print("=" * 60)
 
+        # Invalid catalogues stop here, before any data or HTML is touched
+        if self.errors:
+            print(f"❌ Fix the {len(self.errors)} error(s) in {self.manual_config_path} and run again")
+            return
+
         # Load products
         if not self.products:
             print("❌ No products to update. Please add products to products-manual.yaml")
             return
 
         # Process products
-        processed_products = self.process_products()
-
-        # Save to products.json (so website_updater can use it)
-        import json
-        from datetime import datetime
-
-        output_data = {
-            'last_updated': datetime.now().isoformat(),
-            'products': processed_products,
-            'source': 'manual'
-        }
+        with self.metrics.span('process'):
+            processed_products = self.process_products()
 
-        products_file = "automation/products.json"
-        with open(products_file, 'w') as f:
-            json.dump(output_data, f, indent=2)
+        # Save to the product store (so website_updater can use it later)
+        self.save_products(processed_products)
 
-        print(f"\n✅ Saved products to {products_file}")
-
-        # Use website updater to update HTML
+        # Use website updater to update HTML, handing the products over in memory
         print("\n" + "=" * 60)
         print("Updating HTML Files")
         print("=" * 60)
 
-        updater = WebsiteUpdater()
-        updater.products_data = processed_products
-        updater.update_all_categories()
+        updater = WebsiteUpdater(config=self.config, products=processed_products)
+        with self.metrics.span('build', profile=True):
+            updater.update_all_categories()
+        updater.build_search_index()
+        updater.build_assets()
+        updater.build_feeds()
 
         print("\n" + "=" * 60)
         print("✅ Website Updated Successfully!")
@@ -144,9 +154,21 @@ class ManualProductUpdater:
 
 def main():
     """Main execution"""
-    updater = ManualProductUpdater()
+    parser = argparse.ArgumentParser(description="TerraLogic Tech - Manual Product Updater")
+    parser.add_argument('--profile', action='store_true',
+                        help="build the category pages under cProfile and dump the stats")
+    args = parser.parse_args()
+
+    config = load_config()
+    metrics = get_metrics().configure(config, name='manual_updater', profile=args.profile)
+
+    updater = ManualProductUpdater(config=config)
     updater.update_website()
 
+    metrics.report()
+    if updater.errors:
+        sys.exit(1)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+TerraLogic Tech - Marketplaces
+Per-locale configs and the fan-out that fetches every Amazon marketplace over shared resources
+"""
+
+import copy
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+
+DEFAULT_LOCALE = 'default'
+
+# Marketplace -> (PA-API host, region, currency)
+KNOWN_MARKETPLACES = {
+    'www.amazon.com': ('webservices.amazon.com', 'us-east-1', 'USD'),
+    'www.amazon.ca': ('webservices.amazon.ca', 'us-east-1', 'CAD'),
+    'www.amazon.com.mx': ('webservices.amazon.com.mx', 'us-east-1', 'MXN'),
+    'www.amazon.co.uk': ('webservices.amazon.co.uk', 'eu-west-1', 'GBP'),
+    'www.amazon.de': ('webservices.amazon.de', 'eu-west-1', 'EUR'),
+    'www.amazon.fr': ('webservices.amazon.fr', 'eu-west-1', 'EUR'),
+    'www.amazon.it': ('webservices.amazon.it', 'eu-west-1', 'EUR'),
+    'www.amazon.es': ('webservices.amazon.es', 'eu-west-1', 'EUR'),
+    'www.amazon.in': ('webservices.amazon.in', 'eu-west-1', 'INR'),
+    'www.amazon.co.jp': ('webservices.amazon.co.jp', 'us-west-2', 'JPY'),
+    'www.amazon.com.au': ('webservices.amazon.com.au', 'us-west-2', 'AUD'),
+}
+
+# Currency -> display format; amounts use a decimal comma where listed
+CURRENCY_FORMATS = {
+    'USD': '${amount}', 'CAD': 'C${amount}', 'AUD': 'A${amount}', 'MXN': 'MX${amount}',
+    'GBP': '£{amount}', 'EUR': '{amount} €', 'INR': '₹{amount}', 'JPY': '¥{amount}',
+}
+DECIMAL_COMMA = {'EUR'}
+NO_DECIMALS = {'JPY'}
+
+
+def format_price(amount: float, currency: str = 'USD') -> str:
+    """Display price in the marketplace's style ($12.99, 12,99 €, ¥1299)"""
+    text = f'{amount:.0f}' if currency in NO_DECIMALS else f'{amount:.2f}'
+    if currency in DECIMAL_COMMA:
+        text = text.replace('.', ',')
+    return CURRENCY_FORMATS.get(currency, '{amount} ' + currency).format(amount=text)
+
+
+def locale_configs(config: Dict) -> Dict[str, Dict]:
+    """
+    Locale key -> the full config used to fetch and build that marketplace
+
+    The default locale is config.yaml as it is (the `amazon` section, built
+    into the site root). Each entry under `marketplaces` gets a copy whose
+    amazon, storage, history, website and feeds settings point at its own
+    marketplace, data files and output directory.
+    """
+    locales = {DEFAULT_LOCALE: config}
+    for key, locale in (config.get('marketplaces') or {}).items():
+        if not locale or key == DEFAULT_LOCALE:
+            continue
+        locales[key] = _locale_config(config, key, locale)
+    return locales
+
+
+def _locale_config(config: Dict, key: str, locale: Dict) -> Dict:
+    overlay = copy.deepcopy({name: value for name, value in config.items() if name != 'marketplaces'})
+    marketplace = locale.get('marketplace', 'www.amazon.com')
+    host, region, currency = KNOWN_MARKETPLACES.get(marketplace, ('webservices.amazon.com', 'us-east-1', 'USD'))
+    output_dir = locale.get('output_dir', key)
+
+    amazon = overlay.setdefault('amazon', {})
+    amazon.update({
+        'marketplace': marketplace,
+        'host': locale.get('host', host),
+        'region': locale.get('region', region),
+        'associate_tag_env': locale.get('associate_tag_env', f'AMAZON_ASSOCIATE_TAG_{key.upper()}'),
+    })
+
+    storage = overlay.setdefault('storage', {})
+    storage['path'] = os.path.join(storage.get('path', "automation/products"), key)
+    storage['legacy_path'] = f"automation/products.{key}.json"
+    history = overlay.setdefault('history', {})
+    history['path'] = os.path.join(history.get('path', "automation/history"), key)
+
+    website = overlay.setdefault('website', {})
+    default_currency = website.get('currency', 'USD')
+    currency = locale.get('currency', currency)
+    _localize_filters(overlay.get('categories') or {}, key, locale, default_currency, currency)
+    website.update({
+        'output_dir': output_dir,
+        'currency': currency,
+        'manifest_path': f"automation/build-manifest.{key}.json",
+    })
+    if locale.get('lang'):
+        website['lang'] = locale['lang']
+
+    # The search box on every page reads the root index, so only the default locale builds one
+    overlay['search'] = dict(overlay.get('search') or {}, enabled=False)
+    feeds = overlay.setdefault('feeds', {})
+    feeds.update({
+        'sitemap': f'{output_dir}/sitemap.xml',
+        'feed': f'{output_dir}/feed.xml',
+        'state_path': f"automation/site-feeds.{key}.json",
+        'pages': [],
+    })
+    return overlay
+
+
+def _localize_filters(categories: Dict, key: str, locale: Dict, default_currency: str, currency: str):
+    """
+    Restate the categories' price filters in the locale's currency
+
+    price_min/price_max are written in the default locale's currency; a
+    marketplace in another currency multiplies them by its `exchange_rate`
+    (local units per default unit), and `filters: {<category>: {...}}`
+    replaces them outright. Without either, the price bounds are dropped
+    rather than rejecting every candidate.
+    """
+    rate = locale.get('exchange_rate')
+    overrides = locale.get('filters') or {}
+    unconverted = []
+    for category_key, category in categories.items():
+        filters = dict(category.get('filters') or {})
+        own = overrides.get(category_key) or {}
+        if currency != default_currency:
+            for bound in ('price_min', 'price_max'):
+                if bound not in filters or bound in own:
+                    continue
+                if rate:
+                    filters[bound] = filters[bound] * rate
+                else:
+                    del filters[bound]
+                    unconverted.append(category_key)
+        filters.update(own)
+        category['filters'] = filters
+    if unconverted:
+        print(f"⚠ [{key}] No exchange_rate from {default_currency} to {currency}: "
+              f"price filters ignored for {', '.join(dict.fromkeys(unconverted))}")
+
+
+class MarketplaceFanout:
+    """
+    Fetches every locale over one worker pool, rate limiter, response cache and HTTP session
+
+    Category searches for all locales are submitted to the same pool up
+    front, so a second marketplace adds its own requests to the queue
+    rather than a second sequential run. The shared token bucket keeps the
+    combined request rate within the account's PA-API quota.
+    """
+
+    def __init__(self, config: Dict, locales: Optional[Dict[str, Dict]] = None):
+        # Imported here so that rendering-only runs never load the PA-API client
+        import requests
+        from product_finder import AmazonProductFinder, RateLimiter
+        from response_cache import ResponseCache
+
+        amazon_config = config.get('amazon', {})
+        self.locales = locales or locale_configs(config)
+        self.max_workers = amazon_config.get('max_workers', 4)
+        self.rate_limiter = RateLimiter(
+            requests_per_second=amazon_config.get('requests_per_second', 1),
+            requests_per_day=amazon_config.get('requests_per_day', 8640)
+        )
+        self.cache = ResponseCache.from_config(config)
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=len(self.locales), pool_maxsize=self.max_workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self.finders = {
+            key: AmazonProductFinder(config=locale_config, rate_limiter=self.rate_limiter,
+                                     cache=self.cache, session=self.session)
+            for key, locale_config in self.locales.items()
+        }
+
+    def fetch(self) -> Dict[str, Dict[str, List[Dict]]]:
+        """Search every category of every locale, saving each locale's products as they arrive"""
+        products = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = {key: finder.submit_searches(executor) for key, finder in self.finders.items()}
+            for key, finder in self.finders.items():
+                if len(self.finders) > 1:
+                    print(f"\n[{key}] {finder.marketplace}")
+                products[key] = finder.save_products(finder.collect_searches(pending[key]))
+        return products
+
+    def refresh_prices(self) -> int:
+        """Refresh saved prices of every locale, batching GetItems calls over the shared pool"""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return sum(finder.refresh_prices(executor) for finder in self.finders.values())
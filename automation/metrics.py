@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+TerraLogic Tech - Metrics
+Nested timing spans, counters and optional cProfile dumps for the automation scripts
+"""
+
+import os
+import io
+import json
+import time
+import pstats
+import cProfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, Optional
+
+
+class Metrics:
+    """
+    Timing spans and counters for one run of an automation script
+
+    Spans nest per thread and are aggregated by path ("build/page" adds up
+    every page), so a run produces a small, stable report however many
+    items it processes. Spans opened in worker threads start a path of
+    their own under the name of the thread's first span.
+    """
+
+    def __init__(self, name: str = 'automation', output_dir: Optional[str] = "automation/.cache/metrics",
+                 step_summary: bool = True, profile_dir: Optional[str] = None):
+        self.name = name
+        self.output_dir = output_dir
+        self.step_summary = step_summary
+        self.profile_dir = profile_dir
+        self.started = time.perf_counter()
+        self.spans: Dict[str, Dict[str, float]] = {}
+        self.counters: Dict[str, float] = {}
+        self.lock = threading.Lock()
+        self._local = threading.local()
+        self._profiling = False
+
+    def configure(self, config: Dict, name: Optional[str] = None, profile: bool = False):
+        """Apply the `metrics` section of config.yaml (and the --profile switch)"""
+        metrics_config = config.get('metrics', {}) or {}
+        if name:
+            self.name = name
+        if not metrics_config.get('enabled', True):
+            self.output_dir = None
+            self.step_summary = False
+        else:
+            self.output_dir = metrics_config.get('output_dir', self.output_dir)
+            self.step_summary = metrics_config.get('step_summary', self.step_summary)
+        if profile:
+            self.profile_dir = metrics_config.get('profile_dir', "automation/.cache/profiles")
+        return self
+
+    @contextmanager
+    def span(self, name: str, profile: bool = False) -> Iterator[None]:
+        """
+        Time a block; nested spans are recorded under their parent's path
+
+        With profile=True and --profile given, the block also runs under
+        cProfile (outermost profiled span only) and its stats are dumped.
+        """
+        stack = self._stack()
+        stack.append(name)
+        path = '/'.join(stack)
+
+        profiler = None
+        if profile and self.profile_dir and not self._profiling:
+            self._profiling = True
+            profiler = cProfile.Profile()
+            profiler.enable()
+
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            stack.pop()
+            if profiler:
+                profiler.disable()
+                self._profiling = False
+                self._dump_profile(path, profiler)
+            self._add(path, elapsed)
+
+    def record(self, name: str, seconds: float):
+        """Record a span timed elsewhere (e.g. in a worker process) under the current span"""
+        self._add('/'.join(self._stack() + [name]), seconds)
+
+    def _add(self, path: str, seconds: float):
+        with self.lock:
+            span = self.spans.setdefault(path, {'count': 0, 'seconds': 0.0, 'max': 0.0})
+            span['count'] += 1
+            span['seconds'] += seconds
+            span['max'] = max(span['max'], seconds)
+
+    def count(self, name: str, value: float = 1):
+        """Add to a counter (requests, cache_hits, bytes_written, ...)"""
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def gauge(self, name: str, value: float):
+        """Set a counter to an absolute value (e.g. totals read from another component)"""
+        with self.lock:
+            self.counters[name] = value
+
+    def _stack(self) -> list:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _dump_profile(self, path: str, profiler: cProfile.Profile):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        target = os.path.join(self.profile_dir, f"{self.name}.{path.replace('/', '.')}.prof")
+        profiler.dump_stats(target)
+
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats('cumulative').print_stats(15)
+        print(f"\nProfile of {path} (saved to {target}):")
+        print(report.getvalue())
+
+    def to_dict(self) -> Dict:
+        """Machine-readable snapshot of the run"""
+        with self.lock:
+            return {
+                'name': self.name,
+                'finished': datetime.now().isoformat(),
+                'wall_seconds': round(time.perf_counter() - self.started, 6),
+                'spans': {
+                    path: {'count': span['count'], 'seconds': round(span['seconds'], 6), 'max': round(span['max'], 6)}
+                    for path, span in sorted(self.spans.items())
+                },
+                'counters': dict(sorted(self.counters.items()))
+            }
+
+    def summary_markdown(self, data: Optional[Dict] = None) -> str:
+        """Markdown tables of spans and counters for $GITHUB_STEP_SUMMARY"""
+        data = data or self.to_dict()
+        lines = [f"### {data['name']} ({data['wall_seconds']:.2f}s)", '',
+                 '| Stage | Calls | Total (s) | Max (s) |', '|---|---:|---:|---:|']
+        for path, span in data['spans'].items():
+            indent = '&nbsp;&nbsp;' * path.count('/')
+            lines.append(f"| {indent}{path.rsplit('/', 1)[-1]} | {span['count']} | "
+                         f"{span['seconds']:.3f} | {span['max']:.3f} |")
+        if data['counters']:
+            lines += ['', '| Counter | Value |', '|---|---:|']
+            lines += [f'| {name} | {value:g} |' for name, value in data['counters'].items()]
+        return '\n'.join(lines) + '\n\n'
+
+    def report(self) -> Dict:
+        """Write the JSON file and step summary (when configured) and print a short summary"""
+        data = self.to_dict()
+
+        if self.output_dir:
+            # Imported here: file_utils reports bytes written to these metrics
+            from file_utils import write_file_atomic
+            path = os.path.join(self.output_dir, f'{self.name}.json')
+            write_file_atomic(path, json.dumps(data, indent=2) + '\n')
+            print(f"\nMetrics written to {path}")
+
+        summary_path = os.getenv('GITHUB_STEP_SUMMARY')
+        if self.step_summary and summary_path:
+            with open(summary_path, 'a', encoding='utf-8') as f:
+                f.write(self.summary_markdown(data))
+
+        slowest = sorted(data['spans'].items(), key=lambda item: item[1]['seconds'], reverse=True)[:5]
+        for path, span in slowest:
+            print(f"  {span['seconds'] * 1000:10.1f} ms  {path} (x{span['count']})")
+        return data
+
+
+_metrics = Metrics()
+
+
+def get_metrics() -> Metrics:
+    """The metrics shared by every component of the running script"""
+    return _metrics
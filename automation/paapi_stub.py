@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+TerraLogic Tech - PA-API Stub Server
+Local stand-in for the PA-API endpoint that simulates latency and throttling
+
+Point the finder at it by setting `amazon.endpoint` in config.yaml, e.g.
+    python automation/paapi_stub.py --port 8000 --latency 0.2 --throttle 0.3
+    endpoint: "http://127.0.0.1:8000"
+"""
+
+import argparse
+import json
+import random
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import urlparse, parse_qs
+
+
+def make_items(keywords: str, count: int, offset: int = 0) -> list:
+    """Generate fake PA-API items for a search"""
+    items = []
+    for n in range(offset, offset + count):
+        asin = f'B{zlib.crc32(keywords.encode()) % 10000:04d}{n:05d}'
+        items.append({
+            'ASIN': asin,
+            'ItemInfo': {
+                'Title': {'DisplayValue': f'{keywords.title()} #{n + 1}'},
+                'Features': {'DisplayValues': [f'Feature {i + 1}' for i in range(4)]}
+            },
+            'Images': {'Primary': {'Large': {'URL': ''}}},
+            'Offers': {'Listings': [{'Price': {'Amount': 50 + (n * 37) % 900, 'Currency': 'USD'},
+                                     'Availability': {'Type': 'Backorder' if n % 11 == 10 else 'Now'}}]},
+            'CustomerReviews': {'StarRating': {'Value': 3.5 + (n % 15) / 10}, 'Count': 20 + n * 13}
+        })
+    return items
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers SearchItems/GetItems with recorded or generated responses"""
+
+    latency = 0.0
+    throttle = 0.0
+    recorded: Optional[Dict] = None
+
+    def _params(self) -> Dict:
+        if self.command == 'POST':
+            length = int(self.headers.get('Content-Length', 0))
+            return json.loads(self.rfile.read(length) or b'{}')
+        return {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+
+    def _respond(self):
+        params = self._params()
+        time.sleep(self.latency)
+
+        if random.random() < self.throttle:
+            self.send_response(429)
+            self.send_header('Retry-After', '1')
+            self.end_headers()
+            return
+
+        operation = urlparse(self.path).path.rsplit('/', 1)[-1].lower()
+        if self.recorded and operation in self.recorded:
+            body = self.recorded[operation]
+        elif operation == 'getitems':
+            item_ids = params.get('ItemIds', [])
+            if isinstance(item_ids, str):
+                item_ids = item_ids.split(',')
+            items = make_items('item', len(item_ids))
+            for item, asin in zip(items, item_ids):
+                item['ASIN'] = asin
+            body = {'ItemsResult': {'Items': items}}
+        else:
+            count = int(params.get('ItemCount', 10))
+            page = int(params.get('ItemPage', 1))
+            body = {'SearchResult': {'Items': make_items(params.get('Keywords', 'product'), count, (page - 1) * count)}}
+
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = _respond
+    do_POST = _respond
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port: int = 8000, latency: float = 0.0, throttle: float = 0.0,
+          recorded_path: Optional[str] = None) -> ThreadingHTTPServer:
+    """Create the stub server (call serve_forever() on the result)"""
+    StubHandler.latency = latency
+    StubHandler.throttle = throttle
+    if recorded_path:
+        with open(recorded_path, 'r') as f:
+            StubHandler.recorded = json.load(f)
+    return ThreadingHTTPServer(('127.0.0.1', port), StubHandler)
+
+
+def main():
+    """Main execution function"""
+    parser = argparse.ArgumentParser(description="Local PA-API stub server")
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument('--throttle', type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument('--recorded', help="JSON file mapping operation (searchitems/getitems) to a response")
+    args = parser.parse_args()
+
+    server = serve(args.port, args.latency, args.throttle, args.recorded)
+    print(f"PA-API stub listening on http://127.0.0.1:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
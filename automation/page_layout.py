@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+TerraLogic Tech - Page Layout
+Where paginated category pages and per-product pages live, and how links are rebased between them
+"""
+
+import hashlib
+import posixpath
+import re
+from html import escape
+from typing import Dict, NamedTuple
+
+from product_index import normalize_title
+
+
+PRODUCT_PAGES_DIR = 'products'
+# Product pages are spread over 16^SHARD_LENGTH directories by a hash of their id
+SHARD_LENGTH = 2
+
+# Attribute values leaving the page's directory ("../css/...", "../index.html")
+PARENT_URL_RE = re.compile(r'(\b(?:href|src|srcset)\s*=\s*["\'])(?=\.\./)', re.IGNORECASE)
+URL_ATTR_RE = re.compile(r'(\b(?:href|src)\s*=\s*)(["\'])([^"\']*)\2', re.IGNORECASE)
+SRCSET_ATTR_RE = re.compile(r'(\bsrcset\s*=\s*)(["\'])([^"\']*)\2', re.IGNORECASE)
+ABSOLUTE_URL_RE = re.compile(r'^(?:[a-z][a-z0-9+.-]*:|/|#|\?|$)', re.IGNORECASE)
+URL_SUFFIX_RE = re.compile(r'([^?#]*)(.*)', re.DOTALL)
+TITLE_RE = re.compile(r'(<title\b[^>]*>\s*)(.*?)(\s*</title>)', re.IGNORECASE | re.DOTALL)
+META_DESCRIPTION_RE = re.compile(r'<meta\b[^>]*\bname\s*=\s*["\']description["\'][^>]*>', re.IGNORECASE)
+CONTENT_ATTR_RE = re.compile(r'(\bcontent\s*=\s*)(["\'])[^"\']*\2', re.IGNORECASE)
+
+
+class PageShell(NamedTuple):
+    """A page split around its product cards: everything written before them, and everything after"""
+    path: str
+    head: str
+    tail: str
+
+    def moved_to(self, path: str) -> 'PageShell':
+        """The same shell with its relative links rewritten for another location"""
+        return PageShell(path, relocate_urls(self.head, self.path, path), relocate_urls(self.tail, self.path, path))
+
+
+def page_id(product: Dict) -> str:
+    """File name of a product's page: its ASIN, or its normalised title"""
+    asin = str(product.get('asin') or '').strip()
+    return asin or normalize_title(product.get('name', '')).replace('_', '-') or 'product'
+
+
+def category_page_path(category_key: str, number: int = 1, output_dir: str = '') -> str:
+    """Page 1 keeps the category's URL; later pages go in a directory named after it"""
+    if number <= 1:
+        return posixpath.join(output_dir, 'categories', f'{category_key}.html')
+    return posixpath.join(output_dir, 'categories', category_key, f'page-{number}.html')
+
+
+def product_page_path(identifier: str, output_dir: str = '') -> str:
+    """products/<shard>/<id>.html for a page_id, the shard being the first hex digits of the id's hash"""
+    shard = hashlib.sha1(identifier.encode('utf-8')).hexdigest()[:SHARD_LENGTH]
+    return posixpath.join(output_dir, PRODUCT_PAGES_DIR, shard, f'{identifier}.html')
+
+
+def relative_url(from_page: str, to_page: str) -> str:
+    """Link from one site path to another"""
+    return posixpath.relpath(to_page, posixpath.dirname(from_page) or '.')
+
+
+def root_prefix(page: str) -> str:
+    """'../' repeated up to the site root from a page's directory"""
+    return '../' * page.count('/')
+
+
+def rebase_relative_urls(html: str, depth: int) -> str:
+    """
+    Point the links of a page that climb out of its directory at the same
+    targets from `depth` directories further down (links to sibling pages
+    and absolute URLs are left as they are)
+    """
+    if depth <= 0:
+        return html
+    return PARENT_URL_RE.sub(lambda m: m.group(1) + '../' * depth, html)
+
+
+def relocate_urls(html: str, from_page: str, to_page: str) -> str:
+    """Rewrite every relative href/src/srcset of a page written for `from_page` so it works at `to_page`"""
+    if posixpath.dirname(from_page) == posixpath.dirname(to_page):
+        return html
+    base = posixpath.dirname(from_page)
+    cache: Dict[str, str] = {}
+
+    def move(url: str) -> str:
+        if ABSOLUTE_URL_RE.match(url):
+            return url
+        if url not in cache:
+            path, suffix = URL_SUFFIX_RE.match(url).groups()
+            target = posixpath.normpath(posixpath.join(base, path))
+            cache[url] = relative_url(to_page, target) + suffix
+        return cache[url]
+
+    def move_srcset(value: str) -> str:
+        candidates = []
+        for candidate in value.split(','):
+            parts = candidate.strip().split(None, 1)
+            if parts:
+                candidates.append(' '.join([move(parts[0])] + parts[1:]))
+        return ', '.join(candidates)
+
+    html = URL_ATTR_RE.sub(lambda m: f'{m.group(1)}{m.group(2)}{move(m.group(3))}{m.group(2)}', html)
+    return SRCSET_ATTR_RE.sub(lambda m: f'{m.group(1)}{m.group(2)}{move_srcset(m.group(3))}{m.group(2)}', html)
+
+
+def set_title(html: str, title: str) -> str:
+    """Replace the text of the page's <title>"""
+    return TITLE_RE.sub(lambda m: m.group(1) + escape(title, quote=False) + m.group(3), html, count=1)
+
+
+def page_title(html: str) -> str:
+    """The text of the page's <title> ('' when it has none)"""
+    match = TITLE_RE.search(html)
+    return ' '.join(match.group(2).split()) if match else ''
+
+
+def set_meta_description(html: str, description: str) -> str:
+    """Replace the content of the page's meta description"""
+    def replace(match):
+        return CONTENT_ATTR_RE.sub(lambda m: f'{m.group(1)}{m.group(2)}{escape(description)}{m.group(2)}',
+                                   match.group(0), count=1)
+    return META_DESCRIPTION_RE.sub(replace, html, count=1)
+
+
+def pagination_html(category_key: str, number: int, count: int, output_dir: str = '') -> str:
+    """Previous/next links for page `number` of `count` (empty for a single page)"""
+    if count <= 1:
+        return ''
+    here = category_page_path(category_key, number, output_dir)
+    links = []
+    if number > 1:
+        href = relative_url(here, category_page_path(category_key, number - 1, output_dir))
+        links.append(f'<a class="pagination-prev" href="{href}" rel="prev">← Previous</a>')
+    links.append(f'<span class="pagination-status">Page {number} of {count}</span>')
+    if number < count:
+        href = relative_url(here, category_page_path(category_key, number + 1, output_dir))
+        links.append(f'<a class="pagination-next" href="{href}" rel="next">Next →</a>')
+    return ('\n        <nav class="pagination" aria-label="Pages">\n          '
+            + '\n          '.join(links) + '\n        </nav>')
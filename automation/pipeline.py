@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+TerraLogic Tech - Pipeline
+Runs fetch → render → search → assets → feeds in one process, passing products along in memory
+(for the default Amazon marketplace and every locale under `marketplaces` in config.yaml)
+
+    python automation/pipeline.py                         # full weekly run
+    python automation/pipeline.py --source prices         # daily price refresh
+    python automation/pipeline.py --stages render assets  # rebuild pages from saved data
+"""
+
+import argparse
+import sys
+from typing import Dict, List, Optional, Sequence
+
+import yaml
+
+from marketplaces import DEFAULT_LOCALE, locale_configs
+from metrics import get_metrics
+
+
+STAGES = ('fetch', 'render', 'search', 'assets', 'feeds')
+SOURCES = ('amazon', 'prices', 'manual')
+
+
+class PipelineError(Exception):
+    """Raised when a stage cannot produce what the next stage needs"""
+
+
+class Pipeline:
+    """
+    The whole product update as one run over a shared config and product set
+
+    config.yaml is read once and handed to every component. Each stage
+    imports its modules when it starts, so a render-only run never loads
+    the PA-API client (requests, signing) and a fetch-only run never loads
+    the page builders. Products fetched in this run go straight to the
+    renderer; stages run without a fetch read them from the product store.
+    Every marketplace locale is fetched over one worker pool, rate limiter
+    and response cache, and its pages share one image pipeline.
+    """
+
+    def __init__(self, config_path: str = "automation/config.yaml", config: Optional[Dict] = None):
+        self.config = config if config is not None else self.load_config(config_path)
+        self.locales = locale_configs(self.config)
+        # Locale -> products fetched in this run
+        self.products: Dict[str, Dict[str, List[Dict]]] = {}
+        self.metrics = get_metrics()
+        self._updaters: Dict[str, object] = {}
+
+    @staticmethod
+    def load_config(config_path: str) -> Dict:
+        """Load configuration from YAML"""
+        try:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                return yaml.safe_load(f) or {}
+        except FileNotFoundError:
+            print(f"Warning: Config file not found at {config_path}")
+            return {}
+
+    def run(self, stages: Sequence[str] = STAGES, source: str = 'amazon', force: bool = False,
+            workers: Optional[int] = None):
+        """Run the given stages, always in pipeline order"""
+        unknown = set(stages) - set(STAGES)
+        if unknown:
+            raise PipelineError(f"Unknown stage(s): {', '.join(sorted(unknown))} (expected {', '.join(STAGES)})")
+
+        for stage in STAGES:
+            if stage not in stages:
+                continue
+            print("\n" + "=" * 60)
+            print(f"Stage: {stage}")
+            print("=" * 60)
+            with self.metrics.span(stage, profile=True):
+                if stage == 'fetch':
+                    self.fetch(source)
+                elif stage == 'render':
+                    self.render(force, workers)
+                elif stage == 'search':
+                    for locale in self.each_locale():
+                        self.updater_for(locale).build_search_index()
+                elif stage == 'assets':
+                    # One build covers the pages of every locale
+                    self.updater.build_assets()
+                elif stage == 'feeds':
+                    for locale in self.each_locale():
+                        self.updater_for(locale).build_feeds()
+
+    def each_locale(self):
+        """Locale keys in config order, announcing each one when there are several"""
+        for locale, config in self.locales.items():
+            if len(self.locales) > 1:
+                print(f"\n[{locale}] {config.get('amazon', {}).get('marketplace', 'www.amazon.com')}")
+            yield locale
+
+    def fetch(self, source: str = 'amazon'):
+        """Search, rank and save products (or refresh saved prices), keeping them for the next stages"""
+        if source == 'manual':
+            from manual_updater import ManualProductUpdater
+
+            # One catalogue, with each locale's marketplace and associate tag in its links
+            for locale in self.each_locale():
+                manual = ManualProductUpdater(config=self.locales[locale])
+                if manual.errors or not manual.products:
+                    raise PipelineError(f"No valid products in {manual.manual_config_path}")
+                self.products[locale] = manual.process_products()
+                manual.save_products(self.products[locale])
+            return
+
+        from marketplaces import MarketplaceFanout
+
+        fanout = MarketplaceFanout(self.config, self.locales)
+        if source == 'prices':
+            # Prices are patched in the store; render reads them back lazily, category by category
+            fanout.refresh_prices()
+        else:
+            # Candidates are ranked per category as their searches complete
+            self.products = fanout.fetch()
+            for locale, products_data in self.products.items():
+                for category, products in products_data.items():
+                    print(f"  {category}: {len(products)} products" if len(self.products) == 1
+                          else f"  {locale}/{category}: {len(products)} products")
+
+    @property
+    def updater(self):
+        """The website updater of the default locale"""
+        return self.updater_for(DEFAULT_LOCALE)
+
+    def updater_for(self, locale: str):
+        """A locale's website updater, built once over this run's products"""
+        if locale not in self._updaters:
+            from website_updater import WebsiteUpdater
+            updater = WebsiteUpdater(config=self.locales[locale], products=self.products.get(locale))
+            if self._updaters:
+                # An image used by several marketplaces is fetched and resized once
+                shared = next(iter(self._updaters.values()))
+                updater.images, updater.image_records = shared.images, shared.image_records
+            self._updaters[locale] = updater
+        return self._updaters[locale]
+
+    def render(self, force: bool = False, workers: Optional[int] = None):
+        """Rewrite the category pages whose products changed"""
+        for locale in self.each_locale():
+            self.updater_for(locale).update_all_categories(force=force, workers=workers)
+        self.updater.update_homepage_stats()
+
+
+def main():
+    """Main execution function"""
+    parser = argparse.ArgumentParser(description="TerraLogic Tech - Pipeline")
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=list(STAGES),
+                        help="run only these stages (they always run in pipeline order)")
+    parser.add_argument('--source', choices=SOURCES, default='amazon',
+                        help="fetch from PA-API searches, refresh saved prices, or read products-manual.yaml")
+    parser.add_argument('--force', action='store_true',
+                        help="rewrite every category page even if its content is unchanged")
+    parser.add_argument('--workers', type=int,
+                        help="number of processes used to build pages (default: website.build_workers)")
+    parser.add_argument('--profile', action='store_true',
+                        help="run each stage under cProfile and dump the stats")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("TerraLogic Tech - Pipeline")
+    print("=" * 60)
+
+    pipeline = Pipeline()
+    metrics = pipeline.metrics.configure(pipeline.config, name='pipeline', profile=args.profile)
+
+    try:
+        pipeline.run(args.stages, source=args.source, force=args.force, workers=args.workers)
+    except PipelineError as e:
+        print(f"\n❌ {e}")
+        metrics.report()
+        sys.exit(1)
+
+    print("\n" + "=" * 60)
+    print("Pipeline Complete!")
+    print("=" * 60)
+
+    metrics.report()
+
+
+if __name__ == "__main__":
+    main()
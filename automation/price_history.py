@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+TerraLogic Tech - Price History
+Append-only, array-backed history of product prices, ratings and availability
+"""
+
+import os
+import sys
+import time
+from array import array
+from bisect import bisect_right
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from ranking import parse_price
+
+
+# PA-API Offers.Listings.Availability.Type values; anything else is stored as 0
+AVAILABILITY_TYPES = ('', 'Now', 'Backorder', 'Preorder', 'OutOfStock', 'Unavailable')
+
+# Column name -> array typecode; every column holds one value per history row
+COLUMNS = {
+    'time': 'I',          # seconds since the epoch
+    'asin': 'I',          # index into asins.txt
+    'price': 'i',         # cents, -1 when unknown (low end of a price range)
+    'price_high': 'i',    # cents, -1 when unknown or not recorded (high end; equal to price for a single price)
+    'rating': 'B',        # tenths of a star
+    'reviews': 'I',
+    'availability': 'B',  # index into AVAILABILITY_TYPES
+}
+
+
+class Snapshot(NamedTuple):
+    """One history row"""
+    time: int
+    price: int          # cents, -1 when unknown
+    price_high: int     # cents, -1 when unknown
+    rating: int         # tenths of a star
+    reviews: int
+    availability: int   # index into AVAILABILITY_TYPES
+
+    @property
+    def tracked(self) -> Tuple[int, int, int, int]:
+        """The values whose change earns a new row (review counts ride along)"""
+        return self.price, self.price_high, self.rating, self.availability
+
+    def matches(self, values: Tuple[int, int, int, int, int]) -> bool:
+        """Whether snapshot_values() of a product equal this row's tracked values (an unknown price_high matches any)"""
+        price, price_high, rating, _, availability = values
+        return ((self.price, self.rating, self.availability) == (price, rating, availability)
+                and self.price_high in (-1, price_high))
+
+
+def snapshot_values(product: Dict) -> Tuple[int, int, int, int, int]:
+    """Reduce a product to the (low and high price cents, rating tenths, reviews, availability code) that are tracked"""
+    low, high = parse_price(product.get('price_range') or product.get('price'))
+    availability = product.get('availability') or ''
+    return (
+        -1 if low is None else round(low * 100),
+        -1 if high is None else round(high * 100),
+        max(0, min(255, round(float(product.get('rating') or 0) * 10))),
+        max(0, int(product.get('review_count') or 0)),
+        AVAILABILITY_TYPES.index(availability) if availability in AVAILABILITY_TYPES else 0
+    )
+
+
+class PriceHistory:
+    """
+    Delta-only price history keyed by ASIN
+
+    Each column lives in its own flat binary file and rows are only ever
+    appended, and only when a product's price, rating or availability moved
+    since its previous row, so years of daily runs stay a few MB and load
+    with a handful of array.fromfile calls. Rows are in time order, which
+    makes "what changed since run X" a binary search.
+    """
+
+    def __init__(self, root: str = "automation/history"):
+        self.root = root
+        self.asins: List[str] = []
+        self.asin_ids: Dict[str, int] = {}
+        self.columns = {name: array(code) for name, code in COLUMNS.items()}
+        self.runs = array('I')
+        self._latest: Optional[Dict[int, int]] = None
+        self._load()
+
+    @classmethod
+    def from_config(cls, config: Dict) -> Optional['PriceHistory']:
+        """Build the history from the `history` section of config.yaml (None when disabled)"""
+        history_config = config.get('history', {}) or {}
+        if not history_config.get('enabled', True):
+            return None
+        return cls(history_config.get('path', "automation/history"))
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def _load(self):
+        try:
+            with open(self._path('asins.txt'), 'r', encoding='utf-8') as f:
+                self.asins = f.read().split()
+        except FileNotFoundError:
+            return
+        self.asin_ids = {asin: i for i, asin in enumerate(self.asins)}
+
+        for name, column in list(self.columns.items()) + [('runs', self.runs)]:
+            self._read_column(name, column)
+
+        # Histories written before price_high existed don't know it: -1 matches any high end (see Snapshot.matches)
+        price, price_high = self.columns['price'], self.columns['price_high']
+        if len(price_high) < len(price):
+            price_high.extend([-1] * (len(price) - len(price_high)))
+            self._append_column('price_high', price_high, mode='wb')
+
+        # An interrupted append can leave some columns one row longer than others
+        rows = min(len(column) for column in self.columns.values())
+        for column in self.columns.values():
+            del column[rows:]
+
+    def _read_column(self, name: str, column: array):
+        path = self._path(f'{name}.bin')
+        try:
+            size = os.path.getsize(path)
+            with open(path, 'rb') as f:
+                column.fromfile(f, size // column.itemsize)
+        except FileNotFoundError:
+            return
+        if sys.byteorder == 'big':
+            column.byteswap()
+
+    def _append_column(self, name: str, values: array, mode: str = 'ab'):
+        if sys.byteorder == 'big':
+            values = array(values.typecode, values)
+            values.byteswap()
+        with open(self._path(f'{name}.bin'), mode) as f:
+            values.tofile(f)
+
+    def __len__(self) -> int:
+        return len(self.columns['time'])
+
+    @property
+    def latest_rows(self) -> Dict[int, int]:
+        """Row number of the newest row of every ASIN id (built on first use)"""
+        if self._latest is None:
+            self._latest = {asin_id: row for row, asin_id in enumerate(self.columns['asin'])}
+        return self._latest
+
+    def latest(self, asin: str) -> Optional[Snapshot]:
+        """The most recent recorded snapshot of an ASIN"""
+        row = self.latest_rows.get(self.asin_ids.get(asin, -1))
+        return None if row is None else self._row(row)
+
+    def series(self, asin: str) -> List[Snapshot]:
+        """Every recorded snapshot of an ASIN, oldest first"""
+        asin_id = self.asin_ids.get(asin)
+        if asin_id is None:
+            return []
+        return [self._row(row) for row, value in enumerate(self.columns['asin']) if value == asin_id]
+
+    def _row(self, row: int) -> Snapshot:
+        columns = self.columns
+        return Snapshot(columns['time'][row], columns['price'][row], columns['price_high'][row],
+                        columns['rating'][row], columns['reviews'][row], columns['availability'][row])
+
+    def last_run(self) -> int:
+        """Timestamp of the most recent run that changed anything (0 if none)"""
+        return self.runs[-1] if self.runs else 0
+
+    def changed_since(self, timestamp: int) -> Set[str]:
+        """ASINs whose price, rating or availability moved after the given timestamp"""
+        first = bisect_right(self.columns['time'], timestamp)
+        return {self.asins[asin_id] for asin_id in set(self.columns['asin'][first:])}
+
+    def changed_in_last_run(self) -> Set[str]:
+        """ASINs that moved in the most recent run that changed anything"""
+        if len(self.runs) < 2:
+            return set(self.asins)
+        return self.changed_since(self.runs[-2])
+
+    def record(self, products: Iterable[Dict], timestamp: Optional[int] = None) -> Set[str]:
+        """
+        Record a run: append a row for every product whose tracked values changed,
+        and the run's time when there was any
+
+        Args:
+            products: products with an `asin`; others are ignored
+            timestamp: run time in epoch seconds (default: now)
+
+        Returns:
+            ASINs that got a new row (new products included)
+        """
+        # Keep the time column sorted even if the clock steps backwards
+        timestamp = max(int(time.time()) if timestamp is None else int(timestamp), self.last_run())
+        new_rows = {name: array(code) for name, code in COLUMNS.items()}
+        new_asins = []
+        seen = set()
+        changed = set()
+        latest = self.latest_rows
+
+        for product in products:
+            asin = product.get('asin')
+            if not asin or asin in seen:
+                continue
+            seen.add(asin)
+            values = snapshot_values(product)
+
+            asin_id = self.asin_ids.get(asin)
+            if asin_id is None:
+                asin_id = self.asin_ids[asin] = len(self.asins)
+                self.asins.append(asin)
+                new_asins.append(asin)
+            else:
+                row = latest.get(asin_id)
+                if row is not None and self._row(row).matches(values):
+                    continue
+
+            changed.add(asin)
+            latest[asin_id] = len(self) + len(new_rows['time'])
+            for name, value in zip(COLUMNS, (timestamp, asin_id) + values):
+                new_rows[name].append(value)
+
+        os.makedirs(self.root, exist_ok=True)
+        if new_asins:
+            with open(self._path('asins.txt'), 'a', encoding='utf-8') as f:
+                f.write(''.join(f'{asin}\n' for asin in new_asins))
+        for name, values in new_rows.items():
+            if values:
+                self._append_column(name, values)
+                self.columns[name].extend(values)
+
+        # A run that changed nothing leaves the files untouched (so scheduled commits stay empty)
+        if changed:
+            run = array('I', [timestamp])
+            self._append_column('runs', run)
+            self.runs.extend(run)
+        return changed
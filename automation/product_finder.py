@@ -4,28 +4,288 @@ TerraLogic Tech - Amazon Product Finder
 Automatically finds and fetches products from Amazon PA-API
 """
 
+import argparse
 import os
 import yaml
-import json
 import requests
-import hashlib
-import hmac
+import random
+import threading
 import time
-from datetime import datetime
-from urllib.parse import quote, urlencode
-from typing import Dict, List, Optional
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from marketplaces import format_price
+from metrics import get_metrics
+from price_history import PriceHistory
+from product_store import ProductStore
+from ranking import CandidateRanker
+from response_cache import ResponseCache, group_response, merge_responses, resource_groups
+from signer import SigV4Signer, derive_signing_key
+
+
+class RateLimiter:
+    """Token bucket shared by every PA-API call, honouring the TPS and TPD quotas (0 means no limit)"""
+
+    def __init__(self, requests_per_second: float = 1.0, requests_per_day: int = 8640, burst: int = 1):
+        self.rate = float(requests_per_second)
+        self.capacity = max(1, int(burst))
+        self.requests_per_day = requests_per_day
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.day = time.strftime('%Y%m%d', time.gmtime())
+        self.used_today = 0
+        self.lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        """Block until a request may be sent. Returns False once the daily quota is spent."""
+        while True:
+            with self.lock:
+                today = time.strftime('%Y%m%d', time.gmtime())
+                if today != self.day:
+                    self.day, self.used_today = today, 0
+
+                if self.requests_per_day and self.used_today >= self.requests_per_day:
+                    return False
+
+                if self.rate <= 0:
+                    self.used_today += 1
+                    return True
+
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    self.used_today += 1
+                    return True
+
+                wait = (1 - self.tokens) / self.rate
+
+            get_metrics().count('rate_limit_wait_seconds', wait)
+            time.sleep(wait)
+
+
+class QuotaExceededError(Exception):
+    """Raised when the PA-API daily request quota has been used up"""
+
+
+class CircuitOpenError(Exception):
+    """Raised while the circuit breaker is refusing PA-API calls"""
+
+
+class CircuitBreaker:
+    """
+    Stops calling the API after repeated failures, retrying after a cool-down
+
+    Once the cool-down has passed the breaker is half-open: exactly one
+    trial call is let through. Its success closes the breaker; its failure
+    opens it again for another full cool-down.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial: Optional[int] = None  # thread making the half-open trial call
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go through (closed, or the one trial call while half-open)"""
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if self.trial is not None or time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.trial = threading.get_ident()
+            return True
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial = None
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self.trial = None
+
+    def release(self):
+        """End this thread's trial call without a verdict (e.g. it never reached the API), so another caller may make it"""
+        with self.lock:
+            if self.trial == threading.get_ident():
+                self.trial = None
+
+
+class PAAPIClient:
+    """Pooled keep-alive HTTP client for PA-API with timeouts, backoff and a circuit breaker"""
+
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+    def __init__(self, base_url: str, rate_limiter: Optional[RateLimiter] = None, pool_size: int = 4,
+                 connect_timeout: float = 5, read_timeout: float = 15, max_retries: int = 4,
+                 backoff_base: float = 1.0, backoff_max: float = 30,
+                 breaker: Optional[CircuitBreaker] = None, session: Optional[requests.Session] = None):
+        self.base_url = base_url.rstrip('/')
+        self.rate_limiter = rate_limiter
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self.retries = 0
+
+        if session is not None:
+            # Shared with the clients of other marketplaces (one connection pool per host)
+            self.session = session
+            return
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    @classmethod
+    def from_config(cls, amazon_config: Dict, rate_limiter: Optional[RateLimiter] = None,
+                    session: Optional[requests.Session] = None) -> 'PAAPIClient':
+        """Build a client from the `amazon` section of config.yaml"""
+        http_config = amazon_config.get('http', {}) or {}
+        host = amazon_config.get('host', 'webservices.amazon.com')
+        return cls(
+            base_url=amazon_config.get('endpoint', f'https://{host}'),
+            rate_limiter=rate_limiter,
+            pool_size=amazon_config.get('max_workers', 4),
+            connect_timeout=http_config.get('connect_timeout', 5),
+            read_timeout=http_config.get('read_timeout', 15),
+            max_retries=http_config.get('max_retries', 4),
+            backoff_base=http_config.get('backoff_base', 1.0),
+            backoff_max=http_config.get('backoff_max', 30),
+            breaker=CircuitBreaker(
+                failure_threshold=http_config.get('circuit_failure_threshold', 5),
+                reset_timeout=http_config.get('circuit_reset_timeout', 60)
+            ),
+            session=session
+        )
+
+    def request(self, method: str, path: str, headers: Dict, body: Optional[bytes] = None) -> Dict:
+        """Send a request, retrying throttling and transient failures, and return the JSON body"""
+        if not self.breaker.allow():
+            raise CircuitOpenError("PA-API circuit breaker is open after repeated failures")
+        try:
+            return self._request(method, path, headers, body)
+        finally:
+            # A trial call that ended without a success or failure (quota, an unexpected error) frees its slot
+            self.breaker.release()
+
+    def _request(self, method: str, path: str, headers: Dict, body: Optional[bytes] = None) -> Dict:
+        metrics = get_metrics()
+        attempt = 0
+        while True:
+            # Rate limiting - be nice to Amazon API (shared across worker threads)
+            if self.rate_limiter and not self.rate_limiter.acquire():
+                raise QuotaExceededError("PA-API daily request quota reached")
+
+            retry_after = None
+            metrics.count('api_requests')
+            try:
+                with metrics.span('http'):
+                    response = self.session.request(
+                        method, f'{self.base_url}{path}', headers=headers, data=body, timeout=self.timeout
+                    )
+                if response.status_code not in self.RETRY_STATUSES:
+                    response.raise_for_status()
+                    data = response.json()
+                    self.breaker.record_success()
+                    return data
+                error = requests.HTTPError(f'{response.status_code} Error for url: {response.url}', response=response)
+                retry_after = self._parse_retry_after(response.headers.get('Retry-After'))
+            except requests.HTTPError:
+                # Other 4xx errors are our fault; retrying would not help
+                self.breaker.record_success()
+                raise
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError,
+                    ValueError) as e:
+                # A cut-off or invalid body is retried and counted like a dropped connection
+                error = e
+            except requests.RequestException:
+                # Redirect loops, invalid URLs, ...: retrying would not help, but the API did fail
+                self.breaker.record_failure()
+                raise
+
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+
+            if attempt >= self.max_retries or delay > self.backoff_max:
+                self.breaker.record_failure()
+                raise error
+
+            attempt += 1
+            self.retries += 1
+            metrics.count('api_retries')
+            metrics.count('backoff_seconds', delay)
+            time.sleep(delay)
+
+    @staticmethod
+    def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """Parse a Retry-After header given either in seconds or as an HTTP date"""
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            return None
+
 
 class AmazonProductFinder:
     """Handles Amazon Product Advertising API integration"""
 
-    def __init__(self, config_path: str = "automation/config.yaml"):
-        """Initialize with configuration"""
-        self.config = self.load_config(config_path)
+    SEARCH_RESOURCES = ['Images.Primary.Large', 'ItemInfo.Title', 'ItemInfo.Features', 'Offers.Listings.Price',
+                        'Offers.Listings.Availability.Type', 'CustomerReviews.Count', 'CustomerReviews.StarRating']
+    SEARCH_PAGE_SIZE = 10  # PA-API SearchItems returns at most 10 items per page
+    SEARCH_MAX_PAGES = 10  # ... and at most 10 pages per query
+    PRICE_RESOURCES = ['Offers.Listings.Price', 'Offers.Listings.Availability.Type']
+    GET_ITEMS_BATCH_SIZE = 10  # PA-API GetItems accepts at most 10 ASINs per request
+    # Operations whose items are fixed by the request (ItemIds), so each resource group can be cached apart
+    GROUP_CACHED_OPERATIONS = {'GetItems'}
+
+    def __init__(self, config_path: str = "automation/config.yaml", config: Optional[Dict] = None,
+                 rate_limiter: Optional[RateLimiter] = None, cache: Optional[ResponseCache] = None,
+                 session: Optional[requests.Session] = None):
+        """
+        Initialize with configuration (an already loaded `config` skips reading config_path)
+
+        The rate limiter, response cache and HTTP session can be shared with
+        the finders of other marketplaces (see marketplaces.MarketplaceFanout).
+        """
+        self.config = config if config is not None else self.load_config(config_path)
         self.access_key = os.getenv('AMAZON_ACCESS_KEY')
         self.secret_key = os.getenv('AMAZON_SECRET_KEY')
-        self.associate_tag = os.getenv('AMAZON_ASSOCIATE_TAG')
+        self.associate_tag = os.getenv(self.config.get('amazon', {}).get('associate_tag_env', 'AMAZON_ASSOCIATE_TAG'))
         self.region = self.config.get('amazon', {}).get('region', 'us-east-1')
         self.marketplace = self.config.get('amazon', {}).get('marketplace', 'www.amazon.com')
+        self.host = self.config.get('amazon', {}).get('host', 'webservices.amazon.com')
+        self.signer = SigV4Signer(self.access_key or '', self.secret_key or '', self.host, self.region)
+        self.max_workers = self.config.get('amazon', {}).get('max_workers', 4)
+        self.rate_limiter = rate_limiter or RateLimiter(
+            requests_per_second=self.config.get('amazon', {}).get('requests_per_second', 1),
+            requests_per_day=self.config.get('amazon', {}).get('requests_per_day', 8640)
+        )
+        self.cache = cache or ResponseCache.from_config(self.config)
+        self.store = ProductStore.from_config(self.config)
+        self.legacy_path = self.config.get('storage', {}).get('legacy_path', "automation/products.json")
+        self.history = PriceHistory.from_config(self.config)
+        self.metrics = get_metrics()
+        self.client = PAAPIClient.from_config(self.config.get('amazon', {}), self.rate_limiter, session)
 
     def load_config(self, config_path: str) -> Dict:
         """Load configuration from YAML file"""
@@ -36,46 +296,23 @@ class AmazonProductFinder:
             print(f"Warning: Config file not found at {config_path}")
             return {}
 
-    def _sign_request(self, method: str, uri: str, query_params: Dict) -> str:
-        """Sign the Amazon PA-API request"""
-        timestamp = datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')
-        date_stamp = datetime.utcnow().strftime('%Y%m%d')
-
-        # Add required parameters
-        query_params.update({
-            'Operation': 'SearchItems',
-            'PartnerTag': self.associate_tag,
-            'PartnerType': 'Associates',
-            'Timestamp': timestamp
-        })
-
-        canonical_querystring = urlencode(sorted(query_params.items()))
-        canonical_headers = f'host:{self.marketplace}\n'
-        signed_headers = 'host'
-        payload_hash = hashlib.sha256(''.encode('utf-8')).hexdigest()
-
-        canonical_request = f'{method}\n{uri}\n{canonical_querystring}\n{canonical_headers}\n{signed_headers}\n{payload_hash}'
-
-        algorithm = 'AWS4-HMAC-SHA256'
-        credential_scope = f'{date_stamp}/{self.region}/ProductAdvertisingAPI/aws4_request'
-        string_to_sign = f'{algorithm}\n{timestamp}\n{credential_scope}\n{hashlib.sha256(canonical_request.encode("utf-8")).hexdigest()}'
-
-        signing_key = self._get_signature_key(self.secret_key, date_stamp, self.region, 'ProductAdvertisingAPI')
-        signature = hmac.new(signing_key, string_to_sign.encode('utf-8'), hashlib.sha256).hexdigest()
-
-        authorization_header = f'{algorithm} Credential={self.access_key}/{credential_scope}, SignedHeaders={signed_headers}, Signature={signature}'
-
-        return authorization_header, canonical_querystring
+    def _sign_request(self, method: str, uri: str, query_params: Dict, operation: str = 'SearchItems') -> str:
+        """Sign a GET-style PA-API request (the caller's query_params are left untouched)"""
+        signed = self.signer.sign_get(uri, dict(
+            query_params,
+            Operation=operation,
+            PartnerTag=self.associate_tag,
+            PartnerType='Associates',
+            Timestamp=self.signer.clock().strftime('%Y%m%dT%H%M%SZ')
+        ))
+        return signed.headers['Authorization'], signed.query_string
 
     def _get_signature_key(self, key: str, date_stamp: str, region: str, service: str) -> bytes:
         """Derive signing key"""
-        k_date = hmac.new(f'AWS4{key}'.encode('utf-8'), date_stamp.encode('utf-8'), hashlib.sha256).digest()
-        k_region = hmac.new(k_date, region.encode('utf-8'), hashlib.sha256).digest()
-        k_service = hmac.new(k_region, service.encode('utf-8'), hashlib.sha256).digest()
-        k_signing = hmac.new(k_service, b'aws4_request', hashlib.sha256).digest()
-        return k_signing
+        return derive_signing_key(key, date_stamp, region, service)
 
-    def search_products(self, category: str, keywords: str, max_results: int = 10) -> List[Dict]:
+    def search_products(self, category: str, keywords: str, max_results: int = 10,
+                        search_index: str = 'All') -> List[Dict]:
         """
         Search for products using Amazon PA-API
 
@@ -83,6 +320,7 @@ class AmazonProductFinder:
             category: Product category (e.g., 'Office Chairs')
             keywords: Search keywords
             max_results: Maximum number of results to return
+            search_index: PA-API SearchIndex to search in
 
         Returns:
             List of product dictionaries
@@ -92,32 +330,222 @@ class AmazonProductFinder:
             return self._get_mock_products(category, max_results)
 
         try:
-            # Prepare request parameters
-            query_params = {
-                'Keywords': keywords,
-                'SearchIndex': 'OfficeProducts',
-                'ItemCount': str(max_results),
-                'Resources': 'Images.Primary.Large,ItemInfo.Title,ItemInfo.Features,Offers.Listings.Price'
-            }
+            with self.metrics.span('search'):
+                ranker = CandidateRanker.from_config(self.config, category)
+                pool_factor = self.config.get('ranking', {}).get('candidate_pool_factor', 3)
+                candidates = list(self.harvest_candidates(
+                    keywords, search_index, target=max_results * pool_factor, ranker=ranker
+                ))
+                self.metrics.count('candidates', len(candidates))
+                with self.metrics.span('rank'):
+                    ranked = ranker.rank(candidates, max_results)
+                    if candidates and not ranked:
+                        # An empty category would render an empty page; show the best of what was found
+                        print(f"  ⚠ None of the {len(candidates)} candidates for {category} pass its filters; "
+                              f"using the top {max_results} unfiltered")
+                        ranked = ranker.unfiltered().rank(candidates, max_results)
+                    return ranked
 
-            # Sign and make request
-            auth_header, query_string = self._sign_request('GET', '/paapi5/searchitems', query_params)
+        except Exception as e:
+            print(f"Error fetching products from Amazon: {e}")
+            return self._get_mock_products(category, max_results)
 
-            url = f'https://{self.marketplace}/paapi5/searchitems?{query_string}'
-            headers = {
-                'Authorization': auth_header,
-                'Content-Type': 'application/json'
-            }
+    def harvest_candidates(self, keywords: str, search_index: str = 'All', target: int = 30,
+                           ranker: Optional[CandidateRanker] = None) -> Iterator[Dict]:
+        """
+        Lazily walk SearchItems result pages, yielding each new product once
 
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
+        Stops as soon as `target` candidates passing the ranker's filters have
+        been seen, when results run out, or after the last page PA-API serves.
+        Each raw page is parsed and dropped before the next one is requested.
+        """
+        seen = set()
+        qualifying = 0
 
-            data = response.json()
-            return self._parse_products(data)
+        for page in range(1, self.SEARCH_MAX_PAGES + 1):
+            try:
+                items = self._parse_products(self._call_api('SearchItems', {
+                    'Keywords': keywords,
+                    'SearchIndex': search_index,
+                    'ItemCount': self.SEARCH_PAGE_SIZE,
+                    'ItemPage': page,
+                    'Resources': self.SEARCH_RESOURCES
+                }))
+            except Exception as e:
+                if page == 1:
+                    raise
+                print(f"Warning: stopping at page {page} for '{keywords}': {e}")
+                return
+
+            new_items = 0
+            for product in items:
+                if product['asin'] in seen:
+                    continue
+                seen.add(product['asin'])
+                new_items += 1
+
+                if ranker is None or ranker.passes(product):
+                    qualifying += 1
+                yield product
+
+            if qualifying >= target or new_items == 0 or len(items) < self.SEARCH_PAGE_SIZE:
+                return
+
+    def _call_api(self, operation: str, params: Dict) -> Dict:
+        """
+        Send a PA-API request, returning the decoded JSON response
+
+        GetItems responses are cached per resource group (Offers, ItemInfo,
+        Images, ...) with each group's own TTL, so only the groups that
+        expired are requested again - usually just the Offers. A SearchItems
+        response is cached whole: which items a search returns can change
+        between calls, so its parts can't be refreshed separately. If a
+        request fails, expired cached copies are served instead.
+        """
+        if not self.cache:
+            return self._send_request(operation, params)
+
+        resources = params.get('Resources', [])
+        groups = resource_groups(resources) if operation in self.GROUP_CACHED_OPERATIONS else {'': resources}
+        if not groups:
+            return self._send_request(operation, params)
+        keys = {group: self.cache.make_key(operation, dict(params, Resources=group_resources), self.marketplace)
+                for group, group_resources in groups.items()}
+        parts = {group: self.cache.get(key) for group, key in keys.items()}
+        missing = [group for group, part in parts.items() if part is None]
+        self.metrics.count('cache_hits', len(parts) - len(missing))
+        self.metrics.count('cache_misses', len(missing))
+
+        if missing:
+            try:
+                data = self._send_request(operation, dict(
+                    params, Resources=[resource for group in missing for resource in groups[group]]))
+            except Exception as e:
+                stale = {group: self.cache.get(keys[group], allow_stale=True) for group in missing}
+                if any(part is None for part in stale.values()):
+                    raise
+                self.metrics.count('cache_stale_served', len(stale))
+                print(f"Warning: {operation} request failed ({e}). Serving cached response.")
+                parts.update(stale)
+            else:
+                for group in missing:
+                    parts[group] = group_response(data, group, groups) if group else data
+                    self.cache.put(keys[group], operation, parts[group], self.cache.ttl_for(groups[group]))
+
+        return merge_responses(list(parts.values()))
+
+    def _send_request(self, operation: str, params: Dict) -> Dict:
+        """Sign and send a PA-API request over the network"""
+        payload = dict(
+            params,
+            PartnerTag=self.associate_tag,
+            PartnerType='Associates',
+            Marketplace=self.marketplace
+        )
+        signed = self.signer.sign_post_json(f'/paapi5/{operation.lower()}', operation, payload)
+
+        with self.metrics.span(operation):
+            return self.client.request(signed.method, signed.url_path, dict(signed.headers), signed.body)
+
+    def get_item_prices(self, asins: Iterable[str]) -> Dict[str, str]:
+        """
+        Fetch current prices for known ASINs via batched GetItems requests
 
-        except Exception as e:
-            print(f"Error fetching products from Amazon: {e}")
-            return self._get_mock_products(category, max_results)
+        Args:
+            asins: ASINs to refresh (duplicates and blanks are ignored)
+
+        Returns:
+            Mapping of ASIN to display price, for items that have an offer
+        """
+        return {asin: offer['price'] for asin, offer in self.get_item_offers(asins).items()}
+
+    def get_item_offers(self, asins: Iterable[str], executor: Optional[ThreadPoolExecutor] = None) -> Dict[str, Dict]:
+        """
+        Fetch the current offer ({'price', 'availability'}) of known ASINs via batched GetItems requests
+
+        Batches run on `executor` when one is given (e.g. shared by several
+        marketplaces), otherwise on a pool of this finder's own.
+        """
+        unique_asins = list(dict.fromkeys(asin for asin in asins if asin))
+        batches = [
+            unique_asins[start:start + self.GET_ITEMS_BATCH_SIZE]
+            for start in range(0, len(unique_asins), self.GET_ITEMS_BATCH_SIZE)
+        ]
+        offers = {}
+
+        def fetch_batch(batch: List[str]) -> List[Dict]:
+            try:
+                data = self._call_api('GetItems', {
+                    'ItemIds': batch,
+                    'Resources': self.PRICE_RESOURCES
+                })
+                return data.get('ItemsResult', {}).get('Items', [])
+            except Exception as e:
+                print(f"Error refreshing prices for {', '.join(batch)}: {e}")
+                return []
+
+        def collect(results: Iterable[List[Dict]]):
+            for items in results:
+                for item in items:
+                    if item.get('ASIN') and item.get('Offers', {}).get('Listings'):
+                        offers[item['ASIN']] = {
+                            'price': self._extract_price(item),
+                            'price_amount': self._extract_price_amount(item),
+                            'availability': self._extract_availability(item)
+                        }
+
+        if executor is not None:
+            collect(executor.map(fetch_batch, batches))
+        else:
+            with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(batches) or 1))) as own_executor:
+                collect(own_executor.map(fetch_batch, batches))
+
+        return offers
+
+    def refresh_prices(self, executor: Optional[ThreadPoolExecutor] = None) -> int:
+        """
+        Refresh prices of the products already saved, without re-running searches
+
+        Returns:
+            Number of product entries whose price or availability changed
+        """
+        if not all([self.access_key, self.secret_key, self.associate_tag]):
+            print("Warning: Amazon PA-API credentials not set. Keeping existing prices.")
+            return 0
+
+        if not self.store.exists() and not self.store.import_legacy(self.legacy_path):
+            print(f"Warning: No saved products found in {self.store.root} or {self.legacy_path}")
+            return 0
+
+        asins = [product.get('asin') for _, product in self.store.iter_all()]
+        offers = self.get_item_offers(asins, executor)
+        print(f"Fetched prices for {len(offers)} of {len(set(filter(None, asins)))} ASINs")
+
+        changed = 0
+        for category in self.store.categories():
+            products = self.store.load_category(category)
+            category_changed = 0
+            for product in products:
+                offer = offers.get(product.get('asin'))
+                if not offer or (offer['price'], offer['availability']) == (product.get('price'), product.get('availability')):
+                    continue
+                product['price'] = offer['price']
+                product['price_amount'] = offer['price_amount']
+                product['availability'] = offer['availability']
+                if 'price_range' in product:
+                    product['price_range'] = offer['price']
+                category_changed += 1
+
+            if category_changed:
+                self.store.write_category(category, products)
+                changed += category_changed
+
+        self.store.save_index(prices_updated=datetime.now().isoformat())
+        self._export_legacy()
+        self._record_history()
+
+        print(f"\nUpdated {changed} prices in {self.store.root}")
+        return changed
 
     def _parse_products(self, api_response: Dict) -> List[Dict]:
         """Parse Amazon PA-API response into product dictionaries"""
@@ -131,10 +559,12 @@ class AmazonProductFinder:
                     'asin': item.get('ASIN'),
                     'name': item.get('ItemInfo', {}).get('Title', {}).get('DisplayValue', 'Unknown Product'),
                     'price': self._extract_price(item),
+                    'price_amount': self._extract_price_amount(item),
                     'image_url': item.get('Images', {}).get('Primary', {}).get('Large', {}).get('URL', ''),
                     'features': item.get('ItemInfo', {}).get('Features', {}).get('DisplayValues', [])[:5],
                     'rating': item.get('CustomerReviews', {}).get('StarRating', {}).get('Value', 4.0),
                     'review_count': item.get('CustomerReviews', {}).get('Count', 100),
+                    'availability': self._extract_availability(item),
                     'affiliate_url': self._generate_affiliate_url(item.get('ASIN')),
                     'description': ''  # Will be filled manually or by AI
                 }
@@ -149,17 +579,26 @@ class AmazonProductFinder:
         """Extract price from API response"""
         try:
             price_info = item.get('Offers', {}).get('Listings', [{}])[0].get('Price', {})
-            amount = price_info.get('Amount', 0)
-            currency = price_info.get('Currency', 'USD')
-            return f"${amount:.2f}" if currency == 'USD' else f"{amount:.2f} {currency}"
+            return format_price(price_info.get('Amount', 0), price_info.get('Currency', 'USD'))
         except:
             return "$0.00"
 
+    def _extract_price_amount(self, item: Dict) -> Optional[float]:
+        """Numeric offer price in the marketplace's currency, for filtering and ranking (None if unknown)"""
+        listings = item.get('Offers', {}).get('Listings') or [{}]
+        amount = listings[0].get('Price', {}).get('Amount')
+        return float(amount) if isinstance(amount, (int, float)) else None
+
+    def _extract_availability(self, item: Dict) -> str:
+        """Extract the availability type (e.g. 'Now', 'Backorder') from API response"""
+        listings = item.get('Offers', {}).get('Listings') or [{}]
+        return listings[0].get('Availability', {}).get('Type', '')
+
     def _generate_affiliate_url(self, asin: str) -> str:
         """Generate Amazon affiliate URL"""
         if not asin or not self.associate_tag:
             return "#"
-        return f"https://www.amazon.com/dp/{asin}?tag={self.associate_tag}"
+        return f"https://{self.marketplace}/dp/{asin}?tag={self.associate_tag}"
 
     def _get_mock_products(self, category: str, count: int) -> List[Dict]:
         """Return mock product data when PA-API is not available"""
@@ -213,59 +652,131 @@ class AmazonProductFinder:
 
         return products_list[:count]
 
-    def find_products_for_all_categories(self) -> Dict[str, List[Dict]]:
-        """Find products for all configured categories"""
-        all_products = {}
-
+    def iter_products_for_all_categories(self) -> Iterator[Tuple[str, List[Dict]]]:
+        """Fetch all configured categories concurrently, yielding each as it completes"""
         categories = self.config.get('categories', {})
+        if not categories:
+            return
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(categories)))) as executor:
+            yield from self.collect_searches(self.submit_searches(executor))
 
-        for category_key, category_config in categories.items():
+    def submit_searches(self, executor: ThreadPoolExecutor) -> Dict[Future, str]:
+        """Queue the search of every configured category on `executor`, returning future -> category"""
+        futures = {}
+        for category_key, category_config in self.config.get('categories', {}).items():
             print(f"\nFinding products for: {category_config['name']}")
 
             keywords = category_config.get('keywords', category_config['name'])
             max_products = category_config.get('max_products', 6)
 
-            products = self.search_products(
+            future = executor.submit(
+                self.search_products,
                 category=category_key,
                 keywords=keywords,
-                max_results=max_products
+                max_results=max_products,
+                search_index=category_config.get('search_index', 'All')
             )
+            futures[future] = category_key
+        return futures
 
-            all_products[category_key] = products
-            print(f"  Found {len(products)} products")
+    def collect_searches(self, futures: Dict[Future, str]) -> Iterator[Tuple[str, List[Dict]]]:
+        """Yield (category, products) for submitted searches as they complete"""
+        categories = self.config.get('categories', {})
+        for future in as_completed(futures):
+            category_key = futures[future]
+            try:
+                products = future.result()
+            except Exception as e:
+                print(f"Error finding products for {category_key}: {e}")
+                products = []
 
-            # Rate limiting - be nice to Amazon API
-            time.sleep(1)
+            print(f"  {categories[category_key]['name']}: found {len(products)} products")
+            yield category_key, products
 
-        return all_products
+    def find_products_for_all_categories(self) -> Dict[str, List[Dict]]:
+        """Find products for all configured categories"""
+        return self._in_config_order(dict(self.iter_products_for_all_categories()))
 
-    def save_products(self, products: Dict[str, List[Dict]], output_path: str = "automation/products.json"):
-        """Save found products to JSON file"""
-        output_data = {
-            'last_updated': datetime.now().isoformat(),
-            'products': products
-        }
+    def _in_config_order(self, products: Dict[str, List[Dict]]) -> Dict[str, List[Dict]]:
+        """Order categories as in config.yaml, regardless of completion order"""
+        categories = self.config.get('categories', {})
+        ordered = {key: products[key] for key in categories if key in products}
+        ordered.update(products)
+        return ordered
+
+    def save_products(self, products: Union[Dict[str, List[Dict]], Iterable[Tuple[str, List[Dict]]]]) -> Dict[str, List[Dict]]:
+        """
+        Save found products to the product store (and the legacy products.json)
+
+        Accepts either a complete category mapping or an iterable of
+        (category, products) pairs; the latter is written out after every
+        category so a partial run still leaves usable data on disk.
+        """
+        if isinstance(products, dict):
+            with self.metrics.span('write'):
+                self.store.replace_all(products, source='amazon')
+        else:
+            collected = {}
+            for category_key, category_products in products:
+                collected[category_key] = category_products
+                with self.metrics.span('write'):
+                    self.store.write_category(category_key, category_products)
+                    self.store.save_index(source='amazon')
+
+            products = self._in_config_order(collected)
+            for category_key in self.store.categories():
+                if category_key not in products:
+                    self.store.remove_category(category_key)
+            self.store.index['categories'] = {key: len(items) for key, items in products.items()}
+            self.store.save_index(source='amazon')
+
+        self._export_legacy()
+        self._record_history()
+
+        print(f"\nProducts saved to {self.store.root}")
+        return products
 
-        with open(output_path, 'w') as f:
-            json.dump(output_data, f, indent=2)
+    def _export_legacy(self):
+        """Keep automation/products.json in sync for tools that still read it"""
+        if self.config.get('storage', {}).get('export_legacy', True):
+            self.store.export_legacy(self.legacy_path)
 
-        print(f"\nProducts saved to {output_path}")
+    def _record_history(self):
+        """Append this run's price, rating and availability changes to the price history"""
+        if self.history is not None:
+            with self.metrics.span('history'):
+                changed = self.history.record(product for _, product in self.store.iter_all())
+            self.metrics.count('products_changed', len(changed))
+            print(f"Price history: {len(changed)} products changed since the last run")
 
 
 def main():
     """Main execution function"""
+    parser = argparse.ArgumentParser(description="TerraLogic Tech - Amazon Product Finder")
+    parser.add_argument('--prices', action='store_true',
+                        help="only refresh prices of products already saved")
+    parser.add_argument('--profile', action='store_true',
+                        help="run the main stage under cProfile and dump the stats")
+    args = parser.parse_args()
+
     print("=" * 60)
     print("TerraLogic Tech - Amazon Product Finder")
     print("=" * 60)
 
     # Initialize finder
     finder = AmazonProductFinder()
+    metrics = finder.metrics.configure(finder.config, name='product_finder', profile=args.profile)
 
-    # Find products for all categories
-    all_products = finder.find_products_for_all_categories()
+    if args.prices:
+        with metrics.span('refresh_prices', profile=True):
+            finder.refresh_prices()
+        metrics.report()
+        return
 
-    # Save to JSON
-    finder.save_products(all_products)
+    # Find products for all categories, saving each one as it completes
+    with metrics.span('find', profile=True):
+        all_products = finder.save_products(finder.iter_products_for_all_categories())
 
     # Print summary
     print("\n" + "=" * 60)
@@ -274,6 +785,8 @@ def main():
         print(f"  {category}: {len(products)} products")
     print("=" * 60)
 
+    metrics.report()
+
 
 if __name__ == "__main__":
     main()
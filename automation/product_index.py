@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+TerraLogic Tech - Product Index
+One identity per product (its ASIN, or its full normalised title) with its canonical record and description
+"""
+
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+
+# Keys shaped like an ASIN (ten capitals and digits); title keys are lowercase
+ASIN_RE = re.compile(r'^[A-Z0-9]{10}$')
+# Other all-caps keys ("LED", or the sample catalogues' short placeholder ASINs) may be either
+CAPITALS_RE = re.compile(r'^[A-Z0-9]+$')
+NON_WORD_RE = re.compile(r'[^a-z0-9]+')
+DEFAULT_DESCRIPTION = 'Quality product for your home office.'
+# Title keys used to be the lowercased title with spaces as underscores, cut to this length
+LEGACY_KEY_LENGTH = 30
+
+# Fields that make two copies of one product render differently
+COMPARED_FIELDS = ('name', 'price', 'price_range', 'rating', 'review_count', 'description', 'features', 'affiliate_url')
+
+
+def normalize_title(title: str) -> str:
+    """Full title as a description key: accents folded, lowercase, words joined by underscores"""
+    folded = unicodedata.normalize('NFKD', str(title or '').lower())
+    folded = ''.join(ch for ch in folded if not unicodedata.combining(ch))
+    return NON_WORD_RE.sub('_', folded).strip('_')
+
+
+def legacy_title_key(title: str) -> str:
+    """The description key older versions looked a title up by"""
+    return str(title or '').lower().replace(' ', '_')[:LEGACY_KEY_LENGTH]
+
+
+def ngrams(text: str, size: int = 3) -> Set[str]:
+    """Character n-grams of a normalised title, padded so short words still count"""
+    padded = f'_{text}_'
+    return {padded[i:i + size] for i in range(max(1, len(padded) - size + 1))}
+
+
+class ProductIndex:
+    """
+    Product identities and custom descriptions, built once per run
+
+    Descriptions in content/product-descriptions.yaml are keyed by ASIN or
+    by the product's full normalised title, and both lookups are plain
+    dict hits. Titles with no exact entry can fall back to the closest
+    description key by character n-gram similarity; the n-grams of every
+    key are indexed up front, and a match is only used when it is clearly
+    the best one. Keys in the old format (the first 30 characters of the
+    title) are still honoured, with a warning to rename them, as long as
+    they fit exactly one product; ambiguous ones are reported. A product
+    whose ASIN appears in several categories is rendered from one
+    canonical record (its first copy in config order).
+    """
+
+    def __init__(self, descriptions: Optional[Mapping] = None, fuzzy: bool = True, ngram_size: int = 3,
+                 fuzzy_threshold: float = 0.75):
+        self.fuzzy = fuzzy
+        self.ngram_size = ngram_size
+        self.fuzzy_threshold = fuzzy_threshold
+        self.by_asin: Dict[str, str] = {}
+        self.by_title: Dict[str, str] = {}
+        self.by_legacy_key: Dict[str, str] = {}
+        for key, description in (descriptions or {}).items():
+            if not isinstance(description, str) or not description.strip():
+                continue
+            key = str(key).strip()
+            if ASIN_RE.match(key):
+                self.by_asin[key] = description.strip()
+            else:
+                if CAPITALS_RE.match(key):
+                    self.by_asin[key] = description.strip()
+                self.by_title[normalize_title(key)] = description.strip()
+                if len(key) <= LEGACY_KEY_LENGTH:
+                    self.by_legacy_key[key] = description.strip()
+
+        # n-gram -> description keys containing it, for the fuzzy fallback
+        self.title_keys = list(self.by_title)
+        self.gram_sizes = [len(ngrams(key, ngram_size)) for key in self.title_keys]
+        self.postings: Dict[str, List[int]] = {}
+        if fuzzy:
+            for position, key in enumerate(self.title_keys):
+                for gram in ngrams(key, ngram_size):
+                    self.postings.setdefault(gram, []).append(position)
+
+        self.records: Dict[str, Dict] = {}
+        self.locations: Dict[str, List[str]] = {}
+        self.resolved: Dict[str, Optional[str]] = {}
+        self.fuzzy_matches: Dict[str, List[str]] = {}
+        # Old-format key -> identities of the products it could mean; used only when that is exactly one
+        self.legacy_products: Dict[str, Set[str]] = {}
+        self.legacy_matches: Dict[str, str] = {}
+        self.conflicts: Set[str] = set()
+
+    @classmethod
+    def from_config(cls, config: Dict, descriptions: Optional[Mapping] = None) -> 'ProductIndex':
+        """Build from the `descriptions` section of config.yaml"""
+        description_config = config.get('descriptions', {}) or {}
+        return cls(
+            descriptions,
+            fuzzy=description_config.get('fuzzy', True),
+            ngram_size=description_config.get('ngram_size', 3),
+            fuzzy_threshold=description_config.get('fuzzy_threshold', 0.75)
+        )
+
+    @staticmethod
+    def identity(product: Dict) -> str:
+        """The product's ASIN, or its normalised title when it has none"""
+        asin = str(product.get('asin') or '').strip()
+        return asin or f"title:{normalize_title(product.get('name', ''))}"
+
+    def build(self, products_data: Iterable[Tuple[str, List[Dict]]]) -> 'ProductIndex':
+        """Index every (category, products) pair and resolve each product's description once"""
+        products_data = list(products_data)
+        if self.by_legacy_key:
+            for _, products in products_data:
+                for product in products:
+                    legacy_key = legacy_title_key(product.get('name', ''))
+                    if legacy_key in self.by_legacy_key:
+                        self.legacy_products.setdefault(legacy_key, set()).add(self.identity(product))
+
+        first_copies: Dict[str, Dict] = {}
+        for category, products in products_data:
+            for product in products:
+                key = self.identity(product)
+                self.locations.setdefault(key, []).append(category)
+                if key not in first_copies:
+                    first_copies[key] = product
+                    self.resolved[key] = self._lookup(product)
+                elif any(product.get(field) != first_copies[key].get(field) for field in COMPARED_FIELDS):
+                    self.conflicts.add(key)
+
+        # Only products listed more than once need a canonical record kept around
+        self.records = {key: first_copies[key] for key, found in self.locations.items() if len(found) > 1}
+        self.locations = {key: found for key, found in self.locations.items() if len(found) > 1}
+        return self
+
+    def canonical(self, product: Dict) -> Dict:
+        """The record shown wherever this product is listed"""
+        return self.records.get(self.identity(product), product)
+
+    def description(self, product: Dict) -> str:
+        """Custom description by ASIN, exact title or closest title, else the product's own"""
+        key = self.identity(product)
+        if key in self.resolved:
+            custom = self.resolved[key]
+        else:
+            custom = self.resolved[key] = self._lookup(product)
+        return custom or product.get('description') or DEFAULT_DESCRIPTION
+
+    def _lookup(self, product: Dict) -> Optional[str]:
+        asin = str(product.get('asin') or '').strip()
+        if asin in self.by_asin:
+            return self.by_asin[asin]
+
+        title = normalize_title(product.get('name', ''))
+        if title in self.by_title:
+            return self.by_title[title]
+
+        # A title prefix shared by several products can't tell them apart, so it describes none of them
+        legacy_key = legacy_title_key(product.get('name', ''))
+        owners = self.legacy_products.get(legacy_key)
+        if owners == {self.identity(product)}:
+            self.legacy_matches[legacy_key] = asin or title
+            return self.by_legacy_key[legacy_key]
+        if owners:
+            return None
+
+        match = self.fuzzy_match(title) if self.fuzzy and title else None
+        if match is None:
+            return None
+        self.fuzzy_matches.setdefault(match, []).append(product.get('name', ''))
+        return self.by_title[match]
+
+    def fuzzy_match(self, title: str) -> Optional[str]:
+        """
+        Description key most similar to a normalised title (Dice coefficient
+        over n-grams), or None if nothing reaches the threshold or two keys tie
+        """
+        grams = ngrams(title, self.ngram_size)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.postings.get(gram, ()))
+        if not shared:
+            return None
+
+        scores = sorted(
+            ((2 * count / (len(grams) + self.gram_sizes[position]), position) for position, count in shared.items()),
+            reverse=True
+        )
+        best, position = scores[0]
+        if best < self.fuzzy_threshold or (len(scores) > 1 and scores[1][0] == best):
+            return None
+        return self.title_keys[position]
+
+    @property
+    def duplicates(self) -> Dict[str, List[str]]:
+        """Identity -> categories, for products listed more than once"""
+        return self.locations
+
+    def report(self):
+        """Print products listed in several categories and descriptions shared through fuzzy matches"""
+        for key, categories in self.duplicates.items():
+            name = self.records[key].get('name', key)
+            note = f" (copies differ; showing the one from {categories[0]})" if key in self.conflicts else ''
+            print(f"  ⚠ {key} '{name}' is listed in {', '.join(categories)}{note}")
+
+        for key, new_key in self.legacy_matches.items():
+            print(f"  ⚠ description key '{key}' is in the old truncated-title format; rename it to '{new_key}'")
+        for key, identities in self.legacy_products.items():
+            if len(identities) > 1:
+                print(f"  ⚠ description key '{key}' (old truncated-title format) fits {len(identities)} products "
+                      f"and was not used; key it by ASIN: {', '.join(sorted(identities))}")
+
+        for key, names in self.fuzzy_matches.items():
+            if len(set(names)) > 1:
+                print(f"  ⚠ description '{key}' is the closest match for {len(set(names))} products; "
+                      f"key it by ASIN to tell them apart")
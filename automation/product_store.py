@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+TerraLogic Tech - Product Store
+Compact JSON Lines storage for the product catalogue
+"""
+
+import os
+import json
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from file_utils import atomic_write, write_file_atomic
+
+
+class ProductStore:
+    """
+    One compact JSON Lines file per category plus a small index
+
+    Categories are read line by line, so touching one category never loads
+    the rest of the catalogue. The index records category sizes and which
+    categories each ASIN appears in, for per-ASIN lookups.
+    """
+
+    def __init__(self, root: str = "automation/products"):
+        self.root = root
+        self.index_path = os.path.join(root, 'index.json')
+        self.index = self._load_index()
+
+    @classmethod
+    def from_config(cls, config: Dict) -> 'ProductStore':
+        """Build the store from the `storage` section of config.yaml"""
+        return cls(config.get('storage', {}).get('path', "automation/products"))
+
+    def _load_index(self) -> Dict:
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            index = {}
+
+        index.setdefault('categories', {})
+        index.setdefault('asins', {})
+        return index
+
+    def save_index(self, **metadata):
+        """Write the index, updating last_updated and any extra metadata (e.g. source)"""
+        self.index['last_updated'] = datetime.now().isoformat()
+        self.index.update(metadata)
+        write_file_atomic(self.index_path, json.dumps(self.index, indent=1) + '\n')
+
+    def exists(self) -> bool:
+        """Whether the store has been written at least once"""
+        return os.path.exists(self.index_path)
+
+    def categories(self) -> List[str]:
+        """Category keys, in the order they were written"""
+        return list(self.index['categories'])
+
+    def category_path(self, category: str) -> str:
+        return os.path.join(self.root, f'{category}.jsonl')
+
+    def iter_category(self, category: str) -> Iterator[Dict]:
+        """Stream the products of one category"""
+        try:
+            with open(self.category_path(category), 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        except FileNotFoundError:
+            return
+
+    def load_category(self, category: str) -> List[Dict]:
+        """Load the products of one category"""
+        return list(self.iter_category(category))
+
+    def iter_all(self) -> Iterator[Tuple[str, Dict]]:
+        """Stream (category, product) pairs across the whole catalogue"""
+        for category in self.categories():
+            for product in self.iter_category(category):
+                yield category, product
+
+    def get(self, asin: str) -> Optional[Dict]:
+        """Look a product up by ASIN"""
+        for category in self.index['asins'].get(asin, []):
+            for product in self.iter_category(category):
+                if product.get('asin') == asin:
+                    return product
+        return None
+
+    def write_category(self, category: str, products: Iterable[Dict]) -> int:
+        """Replace a category with the given products (streamed to disk). Returns the count written."""
+        asins = []
+        count = 0
+        with atomic_write(self.category_path(category)) as f:
+            for product in products:
+                f.write(json.dumps(product, ensure_ascii=False, separators=(',', ':')))
+                f.write('\n')
+                count += 1
+                if product.get('asin'):
+                    asins.append(product['asin'])
+
+        self._reindex_category(category, asins, count)
+        return count
+
+    def upsert(self, category: str, products: Iterable[Dict]) -> int:
+        """Insert or replace products in a category by ASIN, keeping the existing order"""
+        updates = {}
+        extra = []
+        for product in products:
+            if product.get('asin'):
+                updates[product['asin']] = product
+            else:
+                extra.append(product)
+
+        def merged() -> Iterator[Dict]:
+            for product in self.iter_category(category):
+                yield updates.pop(product.get('asin'), product)
+            yield from updates.values()
+            yield from extra
+
+        # Safe to stream: the new file only replaces the one being read once it is complete
+        return self.write_category(category, merged())
+
+    def remove_category(self, category: str):
+        """Delete a category from the store"""
+        if os.path.exists(self.category_path(category)):
+            os.remove(self.category_path(category))
+        self._reindex_category(category, [], None)
+
+    def _reindex_category(self, category: str, asins: List[str], count: Optional[int]):
+        """Point the ASIN index at the category's current contents"""
+        for asin, categories in list(self.index['asins'].items()):
+            if category in categories and asin not in asins:
+                categories.remove(category)
+                if not categories:
+                    del self.index['asins'][asin]
+
+        for asin in asins:
+            categories = self.index['asins'].setdefault(asin, [])
+            if category not in categories:
+                categories.append(category)
+
+        if count is None:
+            self.index['categories'].pop(category, None)
+        else:
+            self.index['categories'][category] = count
+
+    def replace_all(self, products: Mapping, **metadata):
+        """Replace the whole catalogue (categories not given are removed)"""
+        for category in self.categories():
+            if category not in products:
+                self.remove_category(category)
+
+        # Rebuild category order to match the input
+        self.index['categories'] = {}
+        for category, category_products in products.items():
+            self.write_category(category, category_products)
+
+        self.save_index(**metadata)
+
+    def export_legacy(self, output_path: str = "automation/products.json"):
+        """Write the legacy single-file products.json, streaming one product at a time"""
+        extra = {key: value for key, value in self.index.items()
+                 if key not in ('categories', 'asins', 'last_updated')}
+
+        with atomic_write(output_path) as f:
+            f.write('{\n  "last_updated": ' + json.dumps(self.index.get('last_updated', datetime.now().isoformat())))
+            f.write(',\n  "products": {')
+            for n, category in enumerate(self.categories()):
+                f.write((',' if n else '') + '\n    ' + json.dumps(category) + ': [')
+                written = 0
+                for product in self.iter_category(category):
+                    f.write((',' if written else '') + '\n      ')
+                    f.write(json.dumps(product, indent=2).replace('\n', '\n      '))
+                    written += 1
+                f.write('\n    ]' if written else ']')
+            f.write('\n  }' if self.categories() else '}')
+            for key, value in sorted(extra.items()):
+                f.write(',\n  ' + json.dumps(key) + ': ' + json.dumps(value, indent=2).replace('\n', '\n  '))
+            f.write('\n}')
+
+    def import_legacy(self, legacy_path: str = "automation/products.json") -> bool:
+        """Populate the store from a legacy products.json. Returns False if it does not exist."""
+        try:
+            with open(legacy_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+
+        metadata = {key: value for key, value in data.items() if key not in ('products', 'last_updated')}
+        self.replace_all(data.get('products', {}), **metadata)
+        return True
+
+    def as_mapping(self) -> 'CategoryMapping':
+        """A read-only category -> products mapping that loads each category on access"""
+        return CategoryMapping(self)
+
+
+class CategoryMapping(Mapping):
+    """Lazy view of the store as {category: [products]}"""
+
+    def __init__(self, store: ProductStore):
+        self.store = store
+
+    def __getitem__(self, category: str) -> List[Dict]:
+        if category not in self.store.index['categories']:
+            raise KeyError(category)
+        return self.store.load_category(category)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.store.categories())
+
+    def __len__(self) -> int:
+        return len(self.store.index['categories'])
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+TerraLogic Tech - Candidate Ranking
+Applies the config.yaml category filters and picks the best products
+"""
+
+import heapq
+import math
+import re
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the pure-Python columns below do the same work
+    np = None
+
+
+PRICE_NUMBER_RE = re.compile(r'\d[\d,.]*\d|\d')
+# "12,99" / "1.299,99": a comma followed by exactly two digits is the decimal separator
+DECIMAL_COMMA_RE = re.compile(r',\d{2}$')
+TIERS = ('budget', 'mid', 'premium')
+
+# Below this many candidates NumPy's conversion overhead outweighs its speed
+NUMPY_MIN_CANDIDATES = 512
+
+
+def parse_price(value) -> Tuple[Optional[float], Optional[float]]:
+    """
+    Parse a display price into its (low, high) amounts
+
+    Handles single prices ("$1,299.99", "12,99 €", "¥1299"), ranges
+    ("$150-200") and numbers; returns (None, None) for text such as
+    "Check Amazon".
+    """
+    if isinstance(value, (int, float)):
+        return float(value), float(value)
+
+    numbers = []
+    for number in PRICE_NUMBER_RE.findall(str(value or '')):
+        if DECIMAL_COMMA_RE.search(number):
+            number = number.replace('.', '').replace(',', '.')
+        numbers.append(float(number.replace(',', '')))
+    if not numbers:
+        return None, None
+    return min(numbers), max(numbers)
+
+
+class CandidateRanker:
+    """Filters and scores whole candidate pools column by column"""
+
+    def __init__(self, filters: Optional[Dict] = None, rating_weight: float = 1.0,
+                 review_weight: float = 1.0, tier_balance: bool = True):
+        filters = filters or {}
+        self.min_rating = filters.get('min_rating', 0)
+        self.min_reviews = filters.get('min_reviews', 0)
+        self.price_min = filters.get('price_min', 0)
+        self.price_max = filters.get('price_max', math.inf)
+        self.rating_weight = rating_weight
+        self.review_weight = review_weight
+        self.tier_balance = tier_balance
+
+    @classmethod
+    def from_config(cls, config: Dict, category_key: str) -> 'CandidateRanker':
+        """Build a ranker from a category's `filters` and the global `ranking` settings"""
+        category_config = config.get('categories', {}).get(category_key, {})
+        ranking_config = config.get('ranking', {}) or {}
+        return cls(
+            filters=category_config.get('filters'),
+            rating_weight=ranking_config.get('rating_weight', 1.0),
+            review_weight=ranking_config.get('review_weight', 1.0),
+            tier_balance=ranking_config.get('tier_balance', True)
+        )
+
+    def unfiltered(self) -> 'CandidateRanker':
+        """The same scoring without the filters"""
+        return CandidateRanker(rating_weight=self.rating_weight, review_weight=self.review_weight,
+                               tier_balance=self.tier_balance)
+
+    def columns(self, candidates: Sequence[Dict]) -> Tuple[array, array, array]:
+        """Parse the candidates once into numeric price, rating and review-count columns"""
+        prices = array('d')
+        ratings = array('d')
+        reviews = array('d')
+        for product in candidates:
+            # The API's numeric amount when known; display strings are only parsed for manual entries
+            amount = product.get('price_amount')
+            if isinstance(amount, (int, float)):
+                prices.append(float(amount))
+            else:
+                low, high = parse_price(product.get('price_range') or product.get('price'))
+                prices.append(math.nan if low is None else (low + high) / 2)
+            ratings.append(float(product.get('rating') or 0))
+            reviews.append(float(product.get('review_count') or 0))
+        return prices, ratings, reviews
+
+    def evaluate(self, prices: array, ratings: array, reviews: array) -> Tuple[List[bool], List[float]]:
+        """Apply the filters and score every candidate in one batch"""
+        if np is not None and len(prices) >= NUMPY_MIN_CANDIDATES:
+            price = np.frombuffer(prices)
+            rating = np.frombuffer(ratings)
+            review = np.frombuffer(reviews)
+            with np.errstate(invalid='ignore'):
+                mask = ((rating >= self.min_rating) & (review >= self.min_reviews)
+                        & (price >= self.price_min) & (price <= self.price_max))
+            score = rating ** self.rating_weight * np.log1p(review) ** self.review_weight
+            return mask.tolist(), score.tolist()
+
+        # NaN prices compare False, so unknown prices never pass the price filter
+        mask = [
+            rating >= self.min_rating and review >= self.min_reviews and self.price_min <= price <= self.price_max
+            for price, rating, review in zip(prices, ratings, reviews)
+        ]
+        score = [
+            rating ** self.rating_weight * math.log1p(review) ** self.review_weight
+            for rating, review in zip(ratings, reviews)
+        ]
+        return mask, score
+
+    def rank(self, candidates: Sequence[Dict], limit: int) -> List[Dict]:
+        """Keep the best `limit` candidates that pass the filters, best first"""
+        prices, ratings, reviews = self.columns(candidates)
+        mask, score = self.evaluate(prices, ratings, reviews)
+        passing = [i for i, ok in enumerate(mask) if ok]
+
+        tiers = self._assign_tiers(passing, prices)
+        for i in passing:
+            tiers[i] = str(candidates[i].get('tier') or tiers[i]).lower()
+        chosen = []
+        if self.tier_balance:
+            # Make sure each price tier present in the pool gets its best product in
+            for tier in TIERS:
+                in_tier = [i for i in passing if tiers[i] == tier]
+                if in_tier and len(chosen) < limit:
+                    chosen.append(max(in_tier, key=score.__getitem__))
+
+        taken = set(chosen)
+        remaining = [i for i in passing if i not in taken]
+        chosen.extend(heapq.nlargest(limit - len(chosen), remaining, key=score.__getitem__))
+        chosen.sort(key=score.__getitem__, reverse=True)
+
+        ranked = []
+        for i in chosen:
+            product = candidates[i]
+            if not product.get('tier'):
+                product = dict(product, tier=tiers[i])
+            ranked.append(product)
+        return ranked
+
+    @staticmethod
+    def _assign_tiers(indices: List[int], prices: array) -> Dict[int, str]:
+        """Split passing candidates into budget / mid / premium price tertiles"""
+        ordered = sorted(indices, key=prices.__getitem__)
+        tiers = {}
+        for position, i in enumerate(ordered):
+            tiers[i] = TIERS[min(2, position * 3 // max(1, len(ordered)))]
+        return tiers
+
+    def passes(self, product: Dict) -> bool:
+        """Whether a single candidate passes the filters"""
+        mask, _ = self.evaluate(*self.columns([product]))
+        return mask[0]
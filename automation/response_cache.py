@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+TerraLogic Tech - PA-API Response Cache
+Persistent on-disk cache for Amazon PA-API responses
+"""
+
+import os
+import json
+import sqlite3
+import hashlib
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+
+# Keys holding the item list of a PA-API response (SearchItems, GetItems)
+RESULT_KEYS = ('SearchResult', 'ItemsResult')
+
+
+def resource_groups(resources: Iterable[str]) -> Dict[str, List[str]]:
+    """Split requested resources by group ('Offers.Listings.Price' -> 'Offers'), keeping their order"""
+    groups: Dict[str, List[str]] = {}
+    for resource in resources:
+        groups.setdefault(resource.split('.')[0], []).append(resource)
+    return groups
+
+
+def group_response(response: Dict, group: str, groups: Iterable[str]) -> Dict:
+    """The part of a response that belongs to one resource group (every other group's item data removed)"""
+    others = set(groups) - {group}
+    part = dict(response)
+    for result_key in RESULT_KEYS:
+        if isinstance(response.get(result_key), dict):
+            result = part[result_key] = dict(response[result_key])
+            result['Items'] = [{key: value for key, value in item.items() if key not in others}
+                               for item in result.get('Items') or []]
+    return part
+
+
+def merge_responses(parts: List[Dict]) -> Dict:
+    """
+    Join the per-group parts of one request back into a single response
+
+    The first part decides which items there are and in what order; the
+    other parts add their group's data to the items with the same ASIN.
+    """
+    merged = group_response(parts[0], '', ())
+    for result_key in RESULT_KEYS:
+        items = (merged.get(result_key) or {}).get('Items')
+        if not items:
+            continue
+        by_asin = {item.get('ASIN'): item for item in items}
+        for part in parts[1:]:
+            for item in (part.get(result_key) or {}).get('Items') or []:
+                if item.get('ASIN') in by_asin:
+                    by_asin[item['ASIN']].update(item)
+    return merged
+
+
+class ResponseCache:
+    """
+    Content-addressed SQLite cache with per-resource-group TTLs and LRU size eviction
+
+    Callers can store each resource group of a GetItems request as its own
+    entry (see resource_groups), so fast-moving Offers expire on their own
+    schedule while titles, features and images stay cached for days. An
+    entry holding several groups lives as long as the shortest of their TTLs.
+    """
+
+    DEFAULT_TTLS = {
+        'Offers': 6 * 3600,               # prices move daily
+        'CustomerReviews': 24 * 3600,
+        'ItemInfo': 7 * 24 * 3600,        # titles and features rarely change
+        'Images': 7 * 24 * 3600,
+    }
+
+    def __init__(self, path: str = "automation/.cache/paapi.sqlite3", ttls: Optional[Dict[str, int]] = None,
+                 default_ttl: int = 24 * 3600, max_size_mb: float = 50):
+        """Open (or create) the cache database"""
+        self.path = path
+        self.ttls = dict(self.DEFAULT_TTLS, **(ttls or {}))
+        self.default_ttl = default_ttl
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self.lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                operation TEXT NOT NULL,
+                body TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        ''')
+        self.db.execute('CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)')
+        self.db.commit()
+
+    @classmethod
+    def from_config(cls, config: Dict) -> Optional['ResponseCache']:
+        """Build the cache from the `cache` section of config.yaml (None when disabled)"""
+        cache_config = config.get('cache', {}) or {}
+        if not cache_config.get('enabled', True):
+            return None
+        return cls(
+            path=cache_config.get('path', "automation/.cache/paapi.sqlite3"),
+            ttls=cache_config.get('ttl'),
+            max_size_mb=cache_config.get('max_size_mb', 50)
+        )
+
+    @staticmethod
+    def make_key(operation: str, params: Dict, marketplace: str = '') -> str:
+        """Hash the canonical form of a query into a cache key"""
+        canonical = json.dumps(
+            {'marketplace': marketplace, 'operation': operation, 'params': params},
+            sort_keys=True,
+            separators=(',', ':')
+        )
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def ttl_for(self, resources: Iterable[str]) -> int:
+        """TTL for an entry: the shortest TTL of the resource groups it holds"""
+        ttls = [self.ttls.get(resource.split('.')[0], self.default_ttl) for resource in resources]
+        return min(ttls) if ttls else self.default_ttl
+
+    def get(self, key: str, allow_stale: bool = False) -> Optional[Dict]:
+        """Return a cached response, or None if missing (or expired, unless allow_stale)"""
+        now = time.time()
+        with self.lock:
+            row = self.db.execute(
+                'SELECT body, expires_at FROM responses WHERE key = ?', (key,)
+            ).fetchone()
+
+            if row is None or (row[1] < now and not allow_stale):
+                return None
+
+            self.db.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (now, key))
+            self.db.commit()
+
+        return json.loads(row[0])
+
+    def put(self, key: str, operation: str, response: Dict, ttl: int):
+        """Store a response and evict least recently used entries over the size limit"""
+        body = json.dumps(response, separators=(',', ':'))
+        now = time.time()
+        with self.lock:
+            self.db.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (key, operation, body, len(body), now, now + ttl, now)
+            )
+            self._evict()
+            self.db.commit()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits in max_size"""
+        total = self.db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        if total <= self.max_size:
+            return
+
+        rows = self.db.execute('SELECT key, size FROM responses ORDER BY accessed_at ASC').fetchall()
+        evicted = []
+        for key, size in rows:
+            if total <= self.max_size:
+                break
+            evicted.append((key,))
+            total -= size
+
+        self.db.executemany('DELETE FROM responses WHERE key = ?', evicted)
+
+    def close(self):
+        """Close the database connection"""
+        with self.lock:
+            self.db.close()
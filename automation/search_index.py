@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+TerraLogic Tech - Search Index
+Builds the sharded inverted index behind the site's instant search
+"""
+
+import os
+import re
+import json
+import glob
+import hashlib
+import unicodedata
+from datetime import datetime
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from file_utils import write_file_atomic
+
+
+INDEX_VERSION = 1
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+STOPWORDS = frozenset('a an and as at by for from in is it of on or the to with your you'.split())
+
+# Document fields, in the order they are stored in the doc shards
+DOC_FIELDS = ('name', 'category', 'url', 'price', 'tier')
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, accent-fold and split text into index terms (js/main.js mirrors this)"""
+    folded = unicodedata.normalize('NFKD', str(text or '').lower())
+    folded = ''.join(ch for ch in folded if not unicodedata.combining(ch))
+    return [token for token in TOKEN_RE.findall(folded) if len(token) > 1 and token not in STOPWORDS]
+
+
+def delta_encode(ids: Iterable[int]) -> List[int]:
+    """Sorted ids as gaps (first id, then differences), which keeps shards small"""
+    encoded = []
+    previous = 0
+    for doc_id in sorted(ids):
+        encoded.append(doc_id - previous)
+        previous = doc_id
+    return encoded
+
+
+class SearchIndexBuilder:
+    """
+    Prefix-sharded inverted index written as static JSON files
+
+    Terms are grouped into shards by their first `prefix_length` characters
+    (search/terms/ch.json holds "chair", "charging", ...), so a query only
+    downloads the shards of its own terms. Each term maps to two posting
+    lists, matches in the product name and matches elsewhere, so names can
+    rank higher. Result documents live in fixed-size shards under
+    search/docs/, addressed by stable document ids kept in the state file,
+    and only shards whose content changed are rewritten.
+    """
+
+    def __init__(self, output_dir: str = "search", state_path: str = "automation/search-index.json",
+                 prefix_length: int = 2, doc_shard_size: int = 500):
+        self.output_dir = output_dir
+        self.state_path = state_path
+        self.prefix_length = prefix_length
+        self.doc_shard_size = doc_shard_size
+        self.state = self._load_state()
+
+    @classmethod
+    def from_config(cls, config: Dict) -> Optional['SearchIndexBuilder']:
+        """Build from the `search` section of config.yaml (None when disabled)"""
+        search_config = config.get('search', {}) or {}
+        if not search_config.get('enabled', True):
+            return None
+        return cls(
+            output_dir=search_config.get('output_dir', "search"),
+            state_path=search_config.get('state_path', "automation/search-index.json"),
+            prefix_length=search_config.get('prefix_length', 2),
+            doc_shard_size=search_config.get('doc_shard_size', 500)
+        )
+
+    def _load_state(self) -> Dict:
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            state = {}
+
+        # A different layout means every shard is rebuilt from scratch
+        layout = [INDEX_VERSION, self.prefix_length, self.doc_shard_size]
+        if state.get('layout') != layout:
+            state = {'layout': layout, 'next_id': 0, 'ids': {}, 'docs': {}, 'shards': {}}
+        return state
+
+    @staticmethod
+    def doc_key(category: str, product: Dict) -> str:
+        """Identity of a product in the index; its id stays the same across builds"""
+        return f"{category}:{product.get('asin') or product.get('name', '').lower()}"
+
+    def build(self, products_data: Mapping[str, List[Dict]], categories: Dict[str, Dict],
+              describe=None, locate=None) -> Dict[str, int]:
+        """
+        Index every product and write the shards that changed
+
+        Args:
+            products_data: category key -> products, as rendered on the site
+            categories: the `categories` section of config.yaml (display names)
+            describe: optional callable giving a product's displayed description
+            locate: optional callable (category, position, product) -> site path the result links to
+
+        Returns:
+            Counts of documents, changed documents and shards written/removed
+        """
+        previous_state = self._serialize_state()
+        ids = self.state['ids']
+        old_fingerprints = self.state['docs']
+        fingerprints = {}
+        docs: Dict[int, List] = {}
+        postings: Dict[str, Tuple[Set[int], Set[int]]] = {}
+
+        for category, products in products_data.items():
+            category_name = categories.get(category, {}).get('name', category)
+            for position, product in enumerate(products):
+                key = self.doc_key(category, product)
+                if key in fingerprints:
+                    continue
+                if key not in ids:
+                    ids[key] = self.state['next_id']
+                    self.state['next_id'] += 1
+                doc_id = ids[key]
+
+                description = describe(product) if describe else product.get('description', '')
+                name = product.get('name', '')
+                docs[doc_id] = [
+                    name,
+                    category,
+                    locate(category, position, product) if locate else f'categories/{category}.html',
+                    product.get('price_range') or product.get('price', ''),
+                    product.get('tier', '')
+                ]
+
+                name_terms = set(tokenize(name))
+                other_terms = set(tokenize(' '.join([description, category_name, category]
+                                                    + list(product.get('features', []))))) - name_terms
+                for term in name_terms:
+                    postings.setdefault(term, (set(), set()))[0].add(doc_id)
+                for term in other_terms:
+                    postings.setdefault(term, (set(), set()))[1].add(doc_id)
+
+                fingerprints[key] = hashlib.sha256(json.dumps(
+                    [docs[doc_id], description, product.get('features', [])],
+                    sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()[:16]
+
+        changed = {key for key, fingerprint in fingerprints.items() if old_fingerprints.get(key) != fingerprint}
+        removed = set(old_fingerprints) - set(fingerprints)
+        for key in removed:
+            ids.pop(key, None)
+
+        shards = self._term_shards(postings)
+        shards.update(self._doc_shards(docs))
+        shards['meta'] = {
+            'version': INDEX_VERSION,
+            'prefix': self.prefix_length,
+            'docShardSize': self.doc_shard_size,
+            'terms': sorted(name.split('/', 1)[1] for name in shards if name.startswith('terms/')),
+            'categories': {key: config.get('name', key) for key, config in categories.items()},
+            'count': len(docs)
+        }
+
+        written, deleted = self._write_shards(shards)
+        self.state['docs'] = fingerprints
+        # An unchanged catalogue leaves the state file (and the site's git history) alone
+        if self._serialize_state() != previous_state:
+            self.state['built'] = datetime.now().isoformat()
+            write_file_atomic(self.state_path, json.dumps(self.state, indent=1, sort_keys=True) + '\n')
+
+        return {'documents': len(docs), 'changed': len(changed), 'removed': len(removed),
+                'shards_written': written, 'shards_deleted': deleted}
+
+    def _serialize_state(self) -> str:
+        return json.dumps({key: value for key, value in self.state.items() if key != 'built'}, sort_keys=True)
+
+    def _term_shards(self, postings: Dict[str, Tuple[Set[int], Set[int]]]) -> Dict[str, Dict]:
+        shards: Dict[str, Dict] = {}
+        for term in sorted(postings):
+            in_name, elsewhere = postings[term]
+            shard = shards.setdefault(f'terms/{term[:self.prefix_length]}', {})
+            shard[term] = [delta_encode(in_name), delta_encode(elsewhere)]
+        return shards
+
+    def _doc_shards(self, docs: Dict[int, List]) -> Dict[str, Dict]:
+        shards: Dict[str, Dict] = {}
+        for doc_id in sorted(docs):
+            shards.setdefault(f'docs/{doc_id // self.doc_shard_size}', {})[str(doc_id)] = docs[doc_id]
+        return shards
+
+    def _write_shards(self, shards: Dict[str, Dict]) -> Tuple[int, int]:
+        """Write shards whose content hash changed and delete the ones no longer produced"""
+        old_hashes = self.state['shards']
+        new_hashes = {}
+        written = 0
+
+        for name, content in shards.items():
+            data = json.dumps(content, separators=(',', ':'), ensure_ascii=False)
+            digest = hashlib.sha256(data.encode('utf-8')).hexdigest()[:16]
+            new_hashes[name] = digest
+            path = os.path.join(self.output_dir, f'{name}.json')
+            if old_hashes.get(name) != digest or not os.path.exists(path):
+                write_file_atomic(path, data)
+                written += 1
+
+        deleted = 0
+        for name in set(old_hashes) - set(new_hashes):
+            path = os.path.join(self.output_dir, f'{name}.json')
+            if os.path.exists(path):
+                os.remove(path)
+                deleted += 1
+
+        # Files left behind by an older layout
+        for path in glob.glob(os.path.join(self.output_dir, '*', '*.json')):
+            name = os.path.relpath(path, self.output_dir)[:-len('.json')].replace(os.sep, '/')
+            if name not in new_hashes:
+                os.remove(path)
+                deleted += 1
+
+        self.state['shards'] = new_hashes
+        return written, deleted
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+TerraLogic Tech - PA-API Request Signer
+AWS Signature Version 4 signing for Amazon PA-API 5 requests
+"""
+
+import hashlib
+import hmac
+import json
+from datetime import datetime, timezone
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Callable, Dict, Mapping, NamedTuple, Optional
+from urllib.parse import urlencode
+
+
+@lru_cache(maxsize=32)
+def derive_signing_key(secret_key: str, date_stamp: str, region: str, service: str) -> bytes:
+    """Derive (and memoize) the SigV4 signing key for one day, region and service"""
+    k_date = hmac.new(f'AWS4{secret_key}'.encode('utf-8'), date_stamp.encode('utf-8'), hashlib.sha256).digest()
+    k_region = hmac.new(k_date, region.encode('utf-8'), hashlib.sha256).digest()
+    k_service = hmac.new(k_region, service.encode('utf-8'), hashlib.sha256).digest()
+    return hmac.new(k_service, b'aws4_request', hashlib.sha256).digest()
+
+
+class SignedRequest(NamedTuple):
+    """An immutable, ready-to-send signed request"""
+    method: str
+    path: str
+    headers: Mapping[str, str]
+    body: bytes
+    query_string: str = ''
+
+    @property
+    def url_path(self) -> str:
+        """Path including the query string, if any"""
+        return f'{self.path}?{self.query_string}' if self.query_string else self.path
+
+
+class SigV4Signer:
+    """Signs PA-API requests, reusing derived keys and precomputed header blocks"""
+
+    ALGORITHM = 'AWS4-HMAC-SHA256'
+    TARGET_PREFIX = 'com.amazon.paapi5.v1.ProductAdvertisingAPIv1'
+    EMPTY_PAYLOAD_HASH = hashlib.sha256(b'').hexdigest()
+
+    def __init__(self, access_key: str, secret_key: str, host: str, region: str,
+                 service: str = 'ProductAdvertisingAPI', clock: Optional[Callable[[], datetime]] = None):
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.host = host
+        self.region = region
+        self.service = service
+        self.clock = clock or (lambda: datetime.now(timezone.utc))
+
+        # Header blocks that never change between requests
+        self._get_headers = f'host:{host}\n'
+        self._post_headers = f'content-encoding:amz-1.0\nhost:{host}\n'
+
+    def sign_get(self, path: str, params: Dict) -> SignedRequest:
+        """Sign a GET request with the parameters in the query string"""
+        query_string = urlencode(sorted(params.items()))
+        timestamp, date_stamp = self._now()
+
+        authorization = self._authorization(
+            'GET', path, query_string, self._get_headers, 'host', self.EMPTY_PAYLOAD_HASH, timestamp, date_stamp
+        )
+        headers = MappingProxyType({
+            'Authorization': authorization,
+            'Content-Type': 'application/json'
+        })
+        return SignedRequest('GET', path, headers, b'', query_string)
+
+    def sign_post_json(self, path: str, operation: str, payload: Dict) -> SignedRequest:
+        """Sign a PA-API 5 JSON POST request for the given operation (e.g. SearchItems)"""
+        body = json.dumps(payload, sort_keys=True, separators=(',', ':')).encode('utf-8')
+        target = f'{self.TARGET_PREFIX}.{operation}'
+        timestamp, date_stamp = self._now()
+
+        canonical_headers = f'{self._post_headers}x-amz-date:{timestamp}\nx-amz-target:{target}\n'
+        authorization = self._authorization(
+            'POST', path, '', canonical_headers, 'content-encoding;host;x-amz-date;x-amz-target',
+            hashlib.sha256(body).hexdigest(), timestamp, date_stamp
+        )
+        headers = MappingProxyType({
+            'Authorization': authorization,
+            'Content-Encoding': 'amz-1.0',
+            'Content-Type': 'application/json; charset=utf-8',
+            'Host': self.host,
+            'X-Amz-Date': timestamp,
+            'X-Amz-Target': target
+        })
+        return SignedRequest('POST', path, headers, body)
+
+    def _now(self):
+        """Read the clock once and return (timestamp, date stamp)"""
+        now = self.clock()
+        return now.strftime('%Y%m%dT%H%M%SZ'), now.strftime('%Y%m%d')
+
+    def _authorization(self, method: str, path: str, query_string: str, canonical_headers: str,
+                       signed_headers: str, payload_hash: str, timestamp: str, date_stamp: str) -> str:
+        """Build the Authorization header value"""
+        canonical_request = f'{method}\n{path}\n{query_string}\n{canonical_headers}\n{signed_headers}\n{payload_hash}'
+
+        credential_scope = f'{date_stamp}/{self.region}/{self.service}/aws4_request'
+        string_to_sign = (
+            f'{self.ALGORITHM}\n{timestamp}\n{credential_scope}\n'
+            f'{hashlib.sha256(canonical_request.encode("utf-8")).hexdigest()}'
+        )
+
+        signing_key = derive_signing_key(self.secret_key, date_stamp, self.region, self.service)
+        signature = hmac.new(signing_key, string_to_sign.encode('utf-8'), hashlib.sha256).hexdigest()
+
+        return (
+            f'{self.ALGORITHM} Credential={self.access_key}/{credential_scope}, '
+            f'SignedHeaders={signed_headers}, Signature={signature}'
+        )
@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+TerraLogic Tech - Sitemap, Feed and Structured Data
+Builds sitemap.xml, a changed-products RSS feed and per-page schema.org JSON-LD from content hashes
+"""
+
+import os
+import re
+import json
+import hashlib
+from datetime import datetime
+from email.utils import format_datetime
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+from xml.sax.saxutils import escape
+
+from file_utils import write_file_atomic
+from page_layout import page_id, product_page_path
+from product_index import ProductIndex
+from ranking import parse_price
+
+
+STRUCTURED_DATA_START = '<!-- structured-data:start -->'
+STRUCTURED_DATA_END = '<!-- structured-data:end -->'
+STRUCTURED_DATA_RE = re.compile(re.escape(STRUCTURED_DATA_START) + r'.*?' + re.escape(STRUCTURED_DATA_END) + r'\n?',
+                                re.DOTALL)
+HEAD_END_RE = re.compile(r'^[ \t]*</head>', re.IGNORECASE | re.MULTILINE)
+
+# PA-API availability type -> schema.org ItemAvailability
+SCHEMA_AVAILABILITY = {
+    'Now': 'https://schema.org/InStock',
+    'Backorder': 'https://schema.org/BackOrder',
+    'Preorder': 'https://schema.org/PreOrder',
+    'OutOfStock': 'https://schema.org/OutOfStock',
+    'Unavailable': 'https://schema.org/Discontinued',
+}
+
+# Product fields that, when changed, put a product back at the top of the feed
+FEED_FIELDS = ('name', 'price', 'price_range', 'rating', 'review_count', 'availability', 'affiliate_url')
+
+STATIC_PAGES = ['index.html', 'about.html', 'contact.html', 'privacy.html', 'affiliate-disclosure.html']
+
+
+def resolve_base_url(config: Dict) -> Optional[str]:
+    """
+    The site's absolute URL, ending in '/': website.base_url, or the GitHub
+    Pages address derived from $GITHUB_REPOSITORY (owner/repo) in Actions
+    """
+    base_url = (config.get('website', {}) or {}).get('base_url') or ''
+    if not base_url:
+        repository = os.getenv('GITHUB_REPOSITORY', '')
+        if '/' not in repository:
+            return None
+        owner, repo = repository.split('/', 1)
+        pages_host = f'{owner.lower()}.github.io'
+        base_url = f'https://{pages_host}/' if repo.lower() == pages_host else f'https://{pages_host}/{repo}/'
+    return base_url.rstrip('/') + '/'
+
+
+def product_json_ld(product: Dict, description: str, currency: str = 'USD', url: str = '') -> Dict:
+    """schema.org Product (with its Offer and rating when known) for one product card; `url` is its own page"""
+    item = {'@type': 'Product', 'name': product.get('name', '')}
+    if url:
+        item['url'] = url
+    if product.get('asin'):
+        item['sku'] = product['asin']
+    if description:
+        item['description'] = description
+    if product.get('image_url'):
+        item['image'] = product['image_url']
+
+    low, high = parse_price(product.get('price_range') or product.get('price'))
+    if low is not None:
+        offer = {'priceCurrency': currency, 'url': product.get('affiliate_url', '')}
+        if low == high:
+            offer.update({'@type': 'Offer', 'price': f'{low:.2f}'})
+        else:
+            offer.update({'@type': 'AggregateOffer', 'lowPrice': f'{low:.2f}', 'highPrice': f'{high:.2f}'})
+        availability = SCHEMA_AVAILABILITY.get(product.get('availability', ''))
+        if availability:
+            offer['availability'] = availability
+        item['offers'] = offer
+
+    if product.get('rating') and product.get('review_count'):
+        item['aggregateRating'] = {
+            '@type': 'AggregateRating',
+            'ratingValue': product['rating'],
+            'reviewCount': product['review_count']
+        }
+    return item
+
+
+def category_json_ld(name: str, products: List[Dict], describe: Callable[[Dict], str], currency: str = 'USD',
+                     locate: Optional[Callable[[Dict], str]] = None) -> str:
+    """The structured-data block for a category page: an ItemList of its products (linked to their pages by `locate`)"""
+    data = {
+        '@context': 'https://schema.org',
+        '@type': 'ItemList',
+        'name': name,
+        'numberOfItems': len(products),
+        'itemListElement': [
+            {'@type': 'ListItem', 'position': position,
+             'item': product_json_ld(product, describe(product), currency, locate(product) if locate else '')}
+            for position, product in enumerate(products, 1)
+        ]
+    }
+    return structured_data_block(data)
+
+
+def product_page_json_ld(product: Dict, description: str, currency: str = 'USD', url: str = '') -> str:
+    """The structured-data block for a product's own page"""
+    return structured_data_block(dict({'@context': 'https://schema.org'},
+                                      **product_json_ld(product, description, currency, url)))
+
+
+def structured_data_block(data: Dict) -> str:
+    """JSON-LD script between the structured-data markers"""
+    # "</" would end the script element early
+    payload = json.dumps(data, ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+    return (f'  {STRUCTURED_DATA_START}\n'
+            f'  <script type="application/ld+json">{payload}</script>\n'
+            f'  {STRUCTURED_DATA_END}\n')
+
+
+def splice_structured_data(html: str, block: str) -> str:
+    """Replace the page's structured-data block, or add it just before </head>"""
+    if STRUCTURED_DATA_RE.search(html):
+        return STRUCTURED_DATA_RE.sub(lambda _: block.lstrip(' '), html, count=1)
+    head_end = HEAD_END_RE.search(html)
+    if not head_end:
+        return html
+    return html[:head_end.start()] + block + html[head_end.start():]
+
+
+class SiteFeedBuilder:
+    """
+    sitemap.xml and a changed-products RSS feed, rebuilt from content hashes
+
+    Category and product pages take their lastmod from the hashes in the
+    build manifest; other pages and every product's feed fields are hashed
+    here, and every timestamp only moves when its hash changes.
+    Both files are deterministic and only written when they differ.
+    """
+
+    def __init__(self, base_url: str, site_name: str = "TerraLogic Tech", description: str = "",
+                 sitemap_path: str = "sitemap.xml", feed_path: str = "feed.xml",
+                 state_path: str = "automation/site-feeds.json", max_items: int = 50,
+                 pages: Optional[List[str]] = None, output_dir: str = ""):
+        self.base_url = base_url
+        self.site_name = site_name
+        self.description = description
+        self.sitemap_path = sitemap_path
+        self.feed_path = feed_path
+        self.state_path = state_path
+        self.max_items = max_items
+        self.pages = pages if pages is not None else STATIC_PAGES
+        self.output_dir = output_dir
+        self.state = self._load_state()
+
+    @classmethod
+    def from_config(cls, config: Dict) -> Optional['SiteFeedBuilder']:
+        """Build from the `feeds` section of config.yaml (None when disabled or the site URL is unknown)"""
+        feeds_config = config.get('feeds', {}) or {}
+        if not feeds_config.get('enabled', True):
+            return None
+
+        base_url = resolve_base_url(config)
+        if not base_url:
+            print("  ⚠ Skipping sitemap and feed: set website.base_url in config.yaml (or run in GitHub Actions)")
+            return None
+
+        website_config = config.get('website', {}) or {}
+        output_dir = (website_config.get('output_dir') or '').strip('/')
+        if output_dir:
+            # A marketplace locale's pages live under its own directory of the site
+            base_url = f"{base_url.rstrip('/')}/{output_dir}/"
+        return cls(
+            base_url,
+            site_name=website_config.get('site_name', "TerraLogic Tech"),
+            description=website_config.get('tagline', ""),
+            sitemap_path=feeds_config.get('sitemap', "sitemap.xml"),
+            feed_path=feeds_config.get('feed', "feed.xml"),
+            state_path=feeds_config.get('state_path', "automation/site-feeds.json"),
+            max_items=feeds_config.get('max_items', 50),
+            pages=feeds_config.get('pages'),
+            output_dir=output_dir
+        )
+
+    def _load_state(self) -> Dict:
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            state = {}
+        state.setdefault('pages', {})
+        state.setdefault('products', {})
+        state.setdefault('product_pages', {})
+        return state
+
+    @staticmethod
+    def _fingerprint(data) -> str:
+        normalized = json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+        return hashlib.sha256(normalized.encode('utf-8')).hexdigest()[:16]
+
+    def _touch(self, entries: Dict[str, Dict], key: str, fingerprint: str, now: str, **extra) -> bool:
+        """Record an entry's hash, moving its timestamp only when the hash changed"""
+        entry = entries.get(key)
+        if entry and entry['hash'] == fingerprint:
+            return False
+        entries[key] = dict(extra, hash=fingerprint, updated=now)
+        return True
+
+    def build(self, products_data: Mapping[str, List[Dict]], manifest: Dict, categories: Dict[str, Dict],
+              describe: Callable[[Dict], str]) -> Dict[str, int]:
+        """
+        Refresh the sitemap and feed
+
+        Args:
+            products_data: category key -> products, as rendered on the site
+            manifest: the website updater's build manifest (category page hashes)
+            categories: the `categories` section of config.yaml
+            describe: gives a product's displayed description
+
+        Returns:
+            Counts of sitemap URLs, changed products and files written
+        """
+        now = datetime.now().astimezone().isoformat(timespec='seconds')
+        previous_state = json.dumps(self.state, sort_keys=True)
+
+        # Pages outside the manifest are tracked by a hash of their file
+        urls = []
+        pages_state = {}
+        for page in self.pages:
+            if not os.path.exists(page):
+                continue
+            with open(page, 'rb') as f:
+                fingerprint = hashlib.sha256(f.read()).hexdigest()[:16]
+            pages_state[page] = self.state['pages'].get(page, {})
+            self._touch(pages_state, page, fingerprint, now)
+            urls.append((page, pages_state[page]['updated']))
+        self.state['pages'] = pages_state
+
+        for category_key in categories:
+            entry = manifest.get('pages', {}).get(category_key)
+            if entry and os.path.exists(os.path.join(self.output_dir, 'categories', f'{category_key}.html')):
+                urls.append((f'categories/{category_key}.html', entry.get('updated', now)))
+                # Later pages of a paginated category change together with its first
+                urls.extend((f'categories/{category_key}/page-{number}.html', entry.get('updated', now))
+                            for number in range(2, entry.get('pages', 1) + 1))
+
+        # Product pages are listed by the category that builds them, with the hash it wrote them with
+        product_pages = {}
+        for category_key in categories:
+            for identifier, fingerprint in (manifest.get('pages', {}).get(category_key) or {}).get('products', {}).items():
+                path = product_page_path(identifier)
+                if identifier in product_pages or not os.path.exists(os.path.join(self.output_dir, path)):
+                    continue
+                product_pages[identifier] = self.state['product_pages'].get(identifier, {})
+                self._touch(product_pages, identifier, fingerprint, now)
+        # Sorted, since the manifest's order differs between a run that rebuilt pages and one that loaded it
+        urls.extend(sorted((product_page_path(identifier), entry['updated'])
+                           for identifier, entry in product_pages.items()))
+        self.state['product_pages'] = product_pages
+
+        # Products are tracked by identity, so a product listed twice is one feed item
+        products_state = {}
+        current = {}
+        changed = 0
+        for category_key, products in products_data.items():
+            for product in products:
+                key = ProductIndex.identity(product)
+                if key in current:
+                    continue
+                current[key] = (category_key, product)
+                fingerprint = self._fingerprint([{field: product.get(field) for field in FEED_FIELDS},
+                                                 describe(product), category_key])
+                products_state[key] = self.state['products'].get(key, {})
+                changed += self._touch(products_state, key, fingerprint, now, category=category_key)
+        self.state['products'] = products_state
+
+        written = self._write_if_changed(self.sitemap_path, self.sitemap_xml(urls))
+        written += self._write_if_changed(self.feed_path, self.feed_xml(current, categories, product_pages))
+        if json.dumps(self.state, sort_keys=True) != previous_state:
+            write_file_atomic(self.state_path, json.dumps(self.state, indent=1, sort_keys=True) + '\n')
+
+        return {'urls': len(urls), 'products_changed': changed, 'files_written': written}
+
+    def page_url(self, path: str) -> str:
+        return self.base_url if path == 'index.html' else self.base_url + path
+
+    def sitemap_xml(self, urls: List[Tuple[str, str]]) -> str:
+        lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+                 '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+        for path, updated in urls:
+            lines.append(f'  <url><loc>{escape(self.page_url(path))}</loc><lastmod>{updated[:10]}</lastmod></url>')
+        lines.append('</urlset>')
+        return '\n'.join(lines) + '\n'
+
+    def feed_xml(self, current: Dict[str, Tuple[str, Dict]], categories: Dict[str, Dict],
+                 product_pages: Optional[Mapping[str, Dict]] = None) -> str:
+        """RSS 2.0 feed of the most recently changed products, newest first, linked to their own pages"""
+        recent = sorted(self.state['products'].items(), key=lambda item: (item[1]['updated'], item[0]),
+                        reverse=True)[:self.max_items]
+
+        items = []
+        for key, entry in recent:
+            category_key, product = current[key]
+            category_name = categories.get(category_key, {}).get('name', category_key)
+            price = product.get('price_range') or product.get('price', '')
+            identifier = page_id(product)
+            link = product_page_path(identifier) if identifier in (product_pages or {}) else f"categories/{category_key}.html"
+            items.append('\n'.join([
+                '    <item>',
+                f'      <title>{escape(product.get("name", ""))}</title>',
+                f'      <link>{escape(self.page_url(link))}</link>',
+                f'      <guid isPermaLink="false">{escape(key)}-{entry["hash"]}</guid>',
+                f'      <category>{escape(category_name)}</category>',
+                f'      <description>{escape(f"{price} - {category_name}")}</description>',
+                f'      <pubDate>{_rfc822(entry["updated"])}</pubDate>',
+                '    </item>'
+            ]))
+
+        last_build = _rfc822(recent[0][1]['updated']) if recent else ''
+        return '\n'.join([
+            '<?xml version="1.0" encoding="UTF-8"?>',
+            '<rss version="2.0">',
+            '  <channel>',
+            f'    <title>{escape(self.site_name)} - Product Updates</title>',
+            f'    <link>{escape(self.base_url)}</link>',
+            f'    <description>{escape(self.description or "Products whose price, rating or availability changed")}</description>',
+            f'    <lastBuildDate>{last_build}</lastBuildDate>',
+            *items,
+            '  </channel>',
+            '</rss>'
+        ]) + '\n'
+
+    @staticmethod
+    def _write_if_changed(path: str, content: str) -> int:
+        try:
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                if f.read() == content:
+                    return 0
+        except FileNotFoundError:
+            pass
+        write_file_atomic(path, content)
+        return 1
+
+
+def _rfc822(timestamp: str) -> str:
+    """ISO timestamp (naive ones are taken as local time) as an RSS date"""
+    return format_datetime(datetime.fromisoformat(timestamp).astimezone())
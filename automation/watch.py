@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+TerraLogic Tech - Watch Mode
+Rebuilds only the category pages affected by edits to the manual catalogue, descriptions, config or card templates
+
+    python automation/watch.py
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import signal
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+import yaml
+
+from card_template import DEFAULT_CARD_TEMPLATE, load_card_template
+from manual_updater import ManualProductUpdater
+from metrics import get_metrics
+from price_history import PriceHistory
+from product_index import ProductIndex
+from product_store import ProductStore
+from website_updater import DEFAULT_PRODUCT_PAGE_TEMPLATE, WebsiteUpdater
+
+
+# Node groups of the dependency graph, and the source each one is computed from
+GROUPS = ('products', 'descriptions', 'categories', 'templates')
+
+
+def _interrupt(signum, frame):
+    """SIGTERM handler: stop like Ctrl+C, so the watch loop's cleanup still runs"""
+    raise KeyboardInterrupt
+
+
+def _digest(data) -> str:
+    normalized = json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()[:16]
+
+
+class DependencyGraph:
+    """
+    Source entries -> the category pages built from them
+
+    Every node (a manual catalogue entry, a product's resolved description,
+    a category's config section, a card template) has a content hash and
+    the set of pages it feeds. Comparing a group's old and new nodes gives
+    the pages to rebuild.
+    """
+
+    def __init__(self):
+        self.hashes: Dict[str, Dict[str, str]] = {group: {} for group in GROUPS}
+        self.pages: Dict[str, Dict[str, Set[str]]] = {group: {} for group in GROUPS}
+
+    def replace(self, group: str, nodes: Dict[str, Tuple[str, Set[str]]]) -> Set[str]:
+        """Swap in a group's recomputed nodes, returning the pages of every node that changed"""
+        old_hashes, old_pages = self.hashes[group], self.pages[group]
+        new_hashes = {node: digest for node, (digest, _) in nodes.items()}
+        new_pages = {node: pages for node, (_, pages) in nodes.items()}
+
+        affected = set()
+        for node in set(old_hashes) | set(new_hashes):
+            if old_hashes.get(node) != new_hashes.get(node):
+                affected |= old_pages.get(node, set()) | new_pages.get(node, set())
+
+        self.hashes[group], self.pages[group] = new_hashes, new_pages
+        return affected
+
+
+class WatchBuilder:
+    """Polls the source files and rebuilds the pages their changed entries feed"""
+
+    def __init__(self, config_path: str = "automation/config.yaml",
+                 manual_path: str = "automation/products-manual.yaml",
+                 descriptions_path: str = "content/product-descriptions.yaml",
+                 interval: float = 0.2, debounce: float = 0.3):
+        self.config_path = config_path
+        self.manual_path = manual_path
+        self.descriptions_path = descriptions_path
+        self.interval = interval
+        self.debounce = debounce
+        self.metrics = get_metrics()
+        self.graph = DependencyGraph()
+        self.config: Dict = {}
+        self.products: Dict[str, List[Dict]] = {}
+        self.updater: Optional[WebsiteUpdater] = None
+        self.history: Optional[PriceHistory] = None
+        self.store_dirty = False
+
+    # Sources
+
+    def load_config(self) -> Dict:
+        try:
+            with open(self.config_path, 'r', encoding='utf-8') as f:
+                return yaml.safe_load(f) or {}
+        except (FileNotFoundError, yaml.YAMLError) as e:
+            print(f"❌ Could not load {self.config_path}: {e}")
+            return self.config
+
+    def load_products(self) -> Optional[Dict[str, List[Dict]]]:
+        """The manual catalogue with affiliate links filled in (None while it has errors)"""
+        manual = ManualProductUpdater(self.manual_path, config=self.config)
+        if manual.errors:
+            return None
+        return manual.process_products()
+
+    def template_paths(self) -> Dict[str, str]:
+        """Category -> card template file"""
+        default = self.config.get('website', {}).get('card_template') or DEFAULT_CARD_TEMPLATE
+        categories = self.config.get('categories', {})
+        return {key: categories.get(key, {}).get('card_template') or default for key in self.products}
+
+    def product_page_template_path(self) -> Optional[str]:
+        """Template of the products' own pages (None when they are turned off)"""
+        website_config = self.config.get('website', {})
+        if not website_config.get('product_pages', True):
+            return None
+        return website_config.get('product_page_template') or DEFAULT_PRODUCT_PAGE_TEMPLATE
+
+    def watched_files(self) -> List[str]:
+        templates = set(self.template_paths().values()) | {self.product_page_template_path()} - {None}
+        return [self.config_path, self.manual_path, self.descriptions_path] + sorted(templates)
+
+    # Dependency graph
+
+    def product_nodes(self, index: ProductIndex) -> Dict[str, Tuple[str, Set[str]]]:
+        """One node per catalogue entry (as shown, so shared ASINs reach every page) plus each page's order"""
+        nodes = {}
+        for category, products in self.products.items():
+            for product in products:
+                shown = index.canonical(product)
+                nodes[f'{category}/{ProductIndex.identity(product)}'] = (_digest(shown), {category})
+            nodes[f'{category}#order'] = (_digest([ProductIndex.identity(p) for p in products]), {category})
+        return nodes
+
+    def description_nodes(self) -> Dict[str, Tuple[str, Set[str]]]:
+        """Each product's resolved description, feeding every page that lists the product"""
+        nodes: Dict[str, Tuple[str, Set[str]]] = {}
+        for category, products in self.products.items():
+            for product in products:
+                node = ProductIndex.identity(product)
+                digest = _digest(self.updater.get_product_description(product))
+                nodes[node] = (digest, nodes.get(node, (digest, set()))[1] | {category})
+        return nodes
+
+    def category_nodes(self) -> Dict[str, Tuple[str, Set[str]]]:
+        """Each page's config section; every other setting that reaches the pages feeds all of them"""
+        pages = set(self.products)
+        nodes = {key: (_digest(section), {key}) for key, section in self.config.get('categories', {}).items()}
+        shared = {key: value for key, value in self.config.items() if key in ('website', 'descriptions', 'images')}
+        nodes['*'] = (_digest(shared), pages)
+        return nodes
+
+    def template_nodes(self) -> Dict[str, Tuple[str, Set[str]]]:
+        nodes: Dict[str, Tuple[str, Set[str]]] = {}
+        paths = list(self.template_paths().items())
+        if self.product_page_template_path():
+            # Every category builds the pages of its products
+            paths += [(category, self.product_page_template_path()) for category in self.products]
+        for category, path in paths:
+            try:
+                digest = load_card_template(path).fingerprint
+            except OSError:
+                digest = 'missing'
+            nodes[path] = (digest, nodes.get(path, (digest, set()))[1] | {category})
+        return nodes
+
+    def refresh(self, changed_files: Set[str]) -> Set[str]:
+        """Reload the changed sources and return the pages whose inputs changed"""
+        config_changed = self.config_path in changed_files
+        if config_changed:
+            self.config = self.load_config()
+
+        if self.manual_path in changed_files or config_changed:
+            products = self.load_products()
+            if products is None:
+                print("   Keeping the last good catalogue until the errors are fixed")
+            else:
+                self.products = products
+
+        if config_changed or self.updater is None:
+            self.updater = WebsiteUpdater(config=self.config, products=self.products)
+            self.history = PriceHistory.from_config(self.config)
+        else:
+            self.updater.products_data = self.products
+        if self.descriptions_path in changed_files or config_changed:
+            self.updater.custom_descriptions = self.updater.load_custom_descriptions(self.descriptions_path)
+        index = self.updater.build_product_index(list(self.products.items()))
+
+        affected = set()
+        if self.manual_path in changed_files or config_changed:
+            product_pages = self.graph.replace('products', self.product_nodes(index))
+            self.store_dirty |= bool(product_pages)
+            affected |= product_pages
+        if self.descriptions_path in changed_files or self.manual_path in changed_files or config_changed:
+            affected |= self.graph.replace('descriptions', self.description_nodes())
+        if config_changed:
+            affected |= self.graph.replace('categories', self.category_nodes())
+        affected |= self.graph.replace('templates', self.template_nodes())
+        return affected
+
+    # Building
+
+    def rebuild(self, changed_files: Set[str], force: bool = False) -> Dict[str, int]:
+        started = time.perf_counter()
+        with self.metrics.span('rebuild'):
+            affected = self.refresh(changed_files)
+            index = self.updater.product_index
+            pages = [(key, [index.canonical(product) for product in products])
+                     for key, products in self.products.items() if key in affected]
+
+            results = {'updated': 0, 'skipped': 0, 'failed': 0}
+            self.updater.prepare_images([product for _, products in pages for product in products])
+            for key, products in pages:
+                results[self.updater.update_category_page(key, products, force)] += 1
+            if results['updated']:
+                self.updater.save_manifest()
+
+            # The product store follows the pages, category by category
+            if self.store_dirty:
+                store = ProductStore.from_config(self.config)
+                for key in store.categories():
+                    if key not in self.products:
+                        store.remove_category(key)
+                for key, _ in pages:
+                    store.write_category(key, self.products[key])
+                store.index['categories'] = {key: len(items) for key, items in self.products.items()}
+                store.save_index(source='manual')
+                self.store_dirty = False
+
+            # ... and so does the price history, so feeds and later builds see the prices shown
+            if self.history is not None and pages:
+                self.history.record(product for key, _ in pages for product in self.products[key])
+
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"⚡ {', '.join(sorted(os.path.basename(path) for path in changed_files))}: "
+              f"{len(affected)} page(s) affected, {results['updated']} rebuilt in {elapsed:.0f} ms")
+        return results
+
+    def snapshot(self) -> Dict[str, Optional[Tuple[int, int]]]:
+        """(mtime, size) of every watched file, None for missing ones"""
+        stats = {}
+        for path in self.watched_files():
+            try:
+                stat = os.stat(path)
+                stats[path] = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                stats[path] = None
+        return stats
+
+    def run(self, force: bool = False):
+        """Build once, then poll until interrupted (Ctrl+C or SIGTERM), rebuilding after each burst of saves settles"""
+        signal.signal(signal.SIGTERM, _interrupt)
+        try:
+            print(f"Initial build of {self.manual_path}...")
+            self.rebuild({self.config_path, self.manual_path, self.descriptions_path}, force)
+
+            seen = self.snapshot()
+            print(f"\n👀 Watching {len(seen)} files (Ctrl+C to stop)")
+            pending: Set[str] = set()
+            last_change = 0.0
+            while True:
+                time.sleep(self.interval)
+                current = self.snapshot()
+                changed = {path for path in set(seen) | set(current) if seen.get(path) != current.get(path)}
+                seen = current
+                if changed:
+                    pending |= changed
+                    last_change = time.monotonic()
+                elif pending and time.monotonic() - last_change >= self.debounce:
+                    self.rebuild(pending)
+                    pending = set()
+                    seen = self.snapshot()  # a config change can add templates to watch
+        except KeyboardInterrupt:
+            print("\nStopping watch mode")
+        finally:
+            self.finish()
+
+    def finish(self):
+        """Bring the single-file products.json up to date (skipped on every rebuild)"""
+        store = ProductStore.from_config(self.config)
+        if store.exists() and self.config.get('storage', {}).get('export_legacy', True):
+            store.export_legacy(self.config.get('storage', {}).get('legacy_path', "automation/products.json"))
+        print("Run `python automation/pipeline.py --stages search assets feeds` before committing")
+
+
+def main():
+    """Main execution function"""
+    parser = argparse.ArgumentParser(description="TerraLogic Tech - Watch Mode")
+    parser.add_argument('--interval', type=float, default=0.2, help="seconds between checks for changes")
+    parser.add_argument('--debounce', type=float, default=0.3,
+                        help="seconds without further changes before rebuilding")
+    parser.add_argument('--force', action='store_true', help="rewrite every page on the initial build")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("TerraLogic Tech - Watch Mode")
+    print("=" * 60)
+
+    WatchBuilder(interval=args.interval, debounce=args.debounce).run(force=args.force)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,23 +4,102 @@ TerraLogic Tech - Website Updater
 Updates HTML files with product data from Amazon
 """
 
+import argparse
 import os
+import posixpath
 import json
 import yaml
 import re
+import hashlib
+import itertools
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
-from typing import Dict, List
-from bs4 import BeautifulSoup
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from asset_builder import AssetBuilder
+from card_template import CardTemplate, DEFAULT_CARD_TEMPLATE, escape_html, load_card_template
+from file_utils import write_chunks_atomic, write_file_atomic
+from image_pipeline import ImagePipeline, picture_html
+from metrics import get_metrics
+from page_layout import (PageShell, category_page_path, page_id, page_title, pagination_html, product_page_path,
+                         rebase_relative_urls, relative_url, root_prefix, set_meta_description, set_title)
+from price_history import PriceHistory
+from product_index import ProductIndex
+from product_store import ProductStore
+from search_index import SearchIndexBuilder
+from site_feeds import SiteFeedBuilder, category_json_ld, product_page_json_ld, splice_structured_data
+
+
+# Marker comments delimiting the generated product cards inside products-grid
+GRID_START_MARKER = '<!-- products:start -->'
+GRID_END_MARKER = '<!-- products:end -->'
+
+GRID_OPEN_RE = re.compile(r'<div\b[^>]*\bclass\s*=\s*["\'][^"\']*\bproducts-grid\b[^"\']*["\'][^>]*>', re.IGNORECASE)
+DIV_TAG_RE = re.compile(r'<(/?)div\b[^>]*>', re.IGNORECASE)
+CARD_SPLIT_RE = re.compile(r'(?=\n[ \t]*<!-- Product Card \d+ -->)')
+PAGINATION_RE = re.compile(r'\n[ \t]*<nav class="pagination".*?</nav>', re.DOTALL)
+HTML_LANG_RE = re.compile(r'(<html\b[^>]*\blang\s*=\s*["\'])[^"\']*', re.IGNORECASE)
+
+# Product fields tracked by the price history; a change to only these
+# re-renders just the affected cards instead of the whole grid
+VOLATILE_FIELDS = ('price', 'price_amount', 'price_range', 'rating', 'review_count', 'availability')
+
+# Bump whenever generate_product_card_html output changes, so every page is re-rendered
+TEMPLATE_VERSION = 6
+
+DEFAULT_PRODUCT_PAGE_TEMPLATE = "automation/templates/product-page.html"
+
+# Card fragments that are the same for every product, built once
+BADGE_HTML = {
+    'budget': '<div class="product-badge budget">Budget Pick</div>',
+    'premium': '<div class="product-badge premium">Premium Pick</div>',
+    'mid': '<div class="product-badge mid">Mid-Range</div>',
+}
+FEATURE_SEPARATOR = '\n              '
+DEFAULT_FEATURES_HTML = FEATURE_SEPARATOR.join([
+    f'<li>✓ {feature}</li>' for feature in [
+        'High-quality construction',
+        'Great customer reviews',
+        'Fast shipping available',
+        'Reliable performance'
+    ]
+])
+DEFAULT_EMOJI = '🪑'
 
 
 class WebsiteUpdater:
     """Updates website HTML files with product data"""
 
-    def __init__(self, config_path: str = "automation/config.yaml"):
-        """Initialize with configuration"""
-        self.config = self.load_config(config_path)
-        self.products_data = self.load_products()
+    def __init__(self, config_path: str = "automation/config.yaml", config: Optional[Dict] = None,
+                 products: Optional[Mapping[str, List[Dict]]] = None):
+        """
+        Initialize with configuration
+
+        An already loaded `config`, and products handed over in memory (e.g.
+        by the pipeline or manual updater), are used instead of re-reading them.
+        """
+        self.config = config if config is not None else self.load_config(config_path)
+        self.products_data = products if products is not None else self.load_products()
         self.custom_descriptions = self.load_custom_descriptions()
+        self._product_index: Optional[ProductIndex] = None
+        self.images = ImagePipeline.from_config(self.config)
+        self.image_records: Dict[str, Dict] = {}
+        self.image_sizes = self.config.get('images', {}).get('sizes', '(max-width: 600px) 100vw, 360px')
+        self._emoji_html: Dict[str, str] = {}
+        # Marketplace locales build their pages under their own directory (see marketplaces.py)
+        website_config = self.config.get('website', {}) or {}
+        self.output_dir = (website_config.get('output_dir') or '').strip('/')
+        self.output_depth = self.output_dir.count('/') + 1 if self.output_dir else 0
+        self.manifest_path = website_config.get('manifest_path', "automation/build-manifest.json")
+        # Large categories are split into pages; every product can get a page of its own
+        self.page_size = max(1, website_config.get('page_size', 24))
+        self.product_pages = website_config.get('product_pages', True)
+        self.product_homes: Dict[str, str] = {}
+        self.manifest = self.load_manifest()
+        self.history = PriceHistory.from_config(self.config)
+        self.changed_asins: Optional[set] = None
+        self.metrics = get_metrics()
 
     def load_config(self, config_path: str) -> Dict:
         """Load configuration from YAML"""
@@ -31,8 +110,13 @@ class WebsiteUpdater:
             print(f"Warning: Config file not found at {config_path}")
             return {}
 
-    def load_products(self, products_path: str = "automation/products.json") -> Dict:
-        """Load products from JSON file"""
+    def load_products(self, products_path: str = "automation/products.json") -> Mapping:
+        """Load products from the product store (falling back to the legacy JSON file)"""
+        store = ProductStore.from_config(self.config)
+        if store.exists():
+            # Categories are read from disk one at a time as they are used
+            return store.as_mapping()
+
         try:
             with open(products_path, 'r', encoding='utf-8') as f:
                 data = json.load(f)
@@ -49,116 +133,594 @@ class WebsiteUpdater:
         except FileNotFoundError:
             return {}
 
-    def generate_product_card_html(self, product: Dict, index: int) -> str:
-        """Generate HTML for a single product card"""
-
-        # Determine badge
-        tier = product.get('tier', '').lower()
-        badge_html = ''
-        if tier == 'budget':
-            badge_html = '<div class="product-badge budget">Budget Pick</div>'
-        elif tier == 'premium':
-            badge_html = '<div class="product-badge premium">Premium Pick</div>'
-        elif tier == 'mid':
-            badge_html = '<div class="product-badge mid">Mid-Range</div>'
-
-        # Get description (custom or from product data)
-        product_key = product.get('name', '').lower().replace(' ', '_')[:30]
-        description = self.custom_descriptions.get(product_key, product.get('description', 'Quality product for your home office.'))
-
-        # Format features
-        features = product.get('features', [])
-        if not features:
-            features = [
-                'High-quality construction',
-                'Great customer reviews',
-                'Fast shipping available',
-                'Reliable performance'
-            ]
-
-        features_html = '\n              '.join([f'<li>✓ {feature}</li>' for feature in features[:4]])
-
-        # Product image or emoji
-        if product.get('image_url'):
-            image_html = f'<img src="{product["image_url"]}" alt="{product["name"]}" style="width: 100%; height: 100%; object-fit: cover;">'
+    def load_manifest(self) -> Dict:
+        """Load the content hashes of the last rendered category pages"""
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {'pages': {}}
+
+        manifest.setdefault('pages', {})
+        return manifest
+
+    def save_manifest(self):
+        """Save the content hashes of rendered category pages"""
+        write_file_atomic(self.manifest_path, json.dumps(self.manifest, indent=2, sort_keys=True) + '\n')
+
+    def category_hash(self, category_key: str, products: List[Dict], volatile: bool = True) -> str:
+        """
+        Stable hash of everything that goes into rendering a category page
+
+        With volatile=False the price, rating and availability fields are left
+        out, giving the page's layout hash: when only that stays the same,
+        the cards that did not move can be reused as they are.
+        """
+        if not volatile:
+            products = [{k: v for k, v in product.items() if k not in VOLATILE_FIELDS} for product in products]
+        payload = {
+            'template_version': TEMPLATE_VERSION,
+            'card_template': self.get_card_template(category_key).fingerprint,
+            'category': self.config.get('categories', {}).get(category_key, {}),
+            'page_size': self.page_size,
+            'products': products,
+            'descriptions': [self.get_product_description(product) for product in products],
+            'images': [self.image_records.get(product.get('image_url')) for product in products]
+        }
+        if self.product_pages:
+            # Which products have their page built by this category (the first one listing them)
+            payload['product_page_template'] = self.get_product_page_template().fingerprint
+            payload['homes'] = [self.product_homes.get(page_id(product), category_key) for product in products]
+        normalized = json.dumps(payload, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+        return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+    def product_page_hash(self, category_key: str, product: Dict) -> str:
+        """Stable hash of everything that goes into rendering a product's own page"""
+        payload = {
+            'template_version': TEMPLATE_VERSION,
+            'template': self.get_product_page_template().fingerprint,
+            'category': self.config.get('categories', {}).get(category_key, {}).get('name', category_key),
+            'product': product,
+            'description': self.get_product_description(product),
+            'image': self.image_records.get(product.get('image_url'))
+        }
+        normalized = json.dumps(payload, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+        return hashlib.sha256(normalized.encode('utf-8')).hexdigest()[:16]
+
+    def build_product_index(self, pages: Optional[List[Tuple[str, List[Dict]]]] = None) -> ProductIndex:
+        """Index product identities and resolve custom descriptions for this run's products"""
+        pages = pages if pages is not None else list(self.products_data.items())
+        self._product_index = ProductIndex.from_config(self.config, self.custom_descriptions).build(pages)
+        # A product's own page is built with the first category listing it
+        self.product_homes = {}
+        for category_key, products in pages:
+            for product in products:
+                self.product_homes.setdefault(page_id(product), category_key)
+        return self._product_index
+
+    @property
+    def product_index(self) -> ProductIndex:
+        if self._product_index is None:
+            self.build_product_index()
+        return self._product_index
+
+    def get_product_description(self, product: Dict) -> str:
+        """Get description (custom, keyed by ASIN or full title, or from product data)"""
+        return self.product_index.description(product)
+
+    def get_card_template(self, category_key: str = None) -> CardTemplate:
+        """Get the compiled card template for a category (per-category override or site default)"""
+        category_config = self.config.get('categories', {}).get(category_key, {}) if category_key else {}
+        path = category_config.get('card_template') or self.config.get('website', {}).get('card_template') or DEFAULT_CARD_TEMPLATE
+        return load_card_template(path)
+
+    def get_product_page_template(self) -> CardTemplate:
+        """Get the compiled template of the products' own pages"""
+        return load_card_template(self.config.get('website', {}).get('product_page_template') or DEFAULT_PRODUCT_PAGE_TEMPLATE)
+
+    def generate_product_card_html(self, product: Dict, index: int, category_key: str = None,
+                                   template: CardTemplate = None, page_path: str = None) -> str:
+        """Generate HTML for a single product card (`index` counts from the top of its page)"""
+        page_path = page_path or self.category_path(category_key or '')
+        prefix = root_prefix(page_path)
+
+        # Link to the product's own page, relative to the page the card is on
+        if self.product_pages:
+            detail_url = prefix + product_page_path(page_id(product), self.output_dir)
+            details_html = f'<a href="{escape_html(detail_url)}" class="product-details-link">Details</a>'
         else:
-            emoji = '🪑'  # Default emoji
-            image_html = f'<span class="product-emoji">{emoji}</span>'
-
-        html = f'''
-        <!-- Product Card {index + 1} -->
-        <div class="product-card">
-          {badge_html}
-          <div class="product-image-placeholder">
-            {image_html}
-          </div>
-          <div class="product-content">
-            <h3 class="product-name">{product.get('name', 'Product Name')}</h3>
-            <div class="product-price">{product.get('price_range', product.get('price', 'Check Amazon'))}</div>
-            <p class="product-description">{description}</p>
-            <ul class="product-features">
-              {features_html}
-            </ul>
-            <div class="product-footer">
-              <a href="{product.get('affiliate_url', '#')}" class="btn btn-primary btn-block" data-affiliate="true" data-product-name="{product.get('name', 'Product')}">
-                View on Amazon →
-              </a>
-            </div>
-          </div>
-        </div>'''
-
-        return html
-
-    def update_category_page(self, category_key: str, products: List[Dict]):
-        """Update a category page with products"""
-
-        category_config = self.config.get('categories', {}).get(category_key, {})
-        category_file = f"categories/{category_key}.html"
-
-        if not os.path.exists(category_file):
-            print(f"Warning: Category file not found: {category_file}")
+            detail_url = details_html = ''
+
+        return (template or self.get_card_template(category_key)).render({
+            'number': index + 1,
+            'badge_html': BADGE_HTML.get(product.get('tier', '').lower(), ''),
+            'image_html': self.get_image_html(product, category_key, prefix),
+            'name': product.get('name', 'Product Name'),
+            'price': product.get('price_range', product.get('price', 'Check Amazon')),
+            'description': self.get_product_description(product),
+            'features_html': self.get_features_html(product.get('features', [])[:4]),
+            'affiliate_url': product.get('affiliate_url', '#'),
+            'detail_url': detail_url,
+            'details_html': details_html,
+        })
+
+    @staticmethod
+    def get_features_html(features: List[str]) -> str:
+        """Feature list items (the fallback list is pre-rendered once)"""
+        if not features:
+            return DEFAULT_FEATURES_HTML
+        return FEATURE_SEPARATOR.join([f'<li>✓ {escape_html(feature)}</li>' for feature in features])
+
+    def get_image_html(self, product: Dict, category_key: str = None, prefix: str = '../') -> str:
+        """Product image (local responsive variants when available) or the category emoji"""
+        image_url = product.get('image_url')
+        image_record = self.image_records.get(image_url) if image_url else None
+        if image_record:
+            return picture_html(image_record, escape_html(product.get('name', '')), prefix=prefix, sizes=self.image_sizes)
+        if image_url:
+            return (f'<img src="{escape_html(image_url)}" alt="{escape_html(product.get("name", ""))}" '
+                    f'loading="lazy" decoding="async">')
+        return self.get_emoji_html(category_key)
+
+    def get_emoji_html(self, category_key: str = None) -> str:
+        """Placeholder for products without an image, using the category's emoji from config.yaml"""
+        if category_key not in self._emoji_html:
+            category_config = self.config.get('categories', {}).get(category_key, {}) if category_key else {}
+            emoji = category_config.get('emoji', DEFAULT_EMOJI)
+            self._emoji_html[category_key] = f'<span class="product-emoji">{escape_html(emoji)}</span>'
+        return self._emoji_html[category_key]
+
+    def prepare_images(self, products: List[Dict]):
+        """Fetch and resize the images of the given products (cached images are reused as-is)"""
+        if not self.images:
             return
 
+        urls = [product.get('image_url') for product in products if product.get('image_url')]
+        missing = [url for url in dict.fromkeys(urls) if url not in self.image_records]
+        if missing:
+            with self.metrics.span('images'):
+                self.image_records.update(self.images.process_all(missing))
+            self.metrics.count('images_processed', len(missing))
+
+    def render_products_html(self, category_key: str, products: List[Dict], page_path: str = None) -> Iterator[str]:
+        """Render the product cards of one page, one at a time"""
+        template = self.get_card_template(category_key)
+        for idx, product in enumerate(products):
+            yield self.generate_product_card_html(product, idx, category_key, template, page_path)
+        self.metrics.count('cards_rendered', len(products))
+
+    @staticmethod
+    def card_hash(product: Dict) -> str:
+        """Short hash of the displayed fields of a product that the price history tracks"""
+        values = json.dumps([product.get(field) for field in VOLATILE_FIELDS], separators=(',', ':'))
+        return hashlib.sha1(values.encode('utf-8')).hexdigest()[:12]
+
+    def render_changed_cards(self, category_key: str, products: List[Dict], grid_html: str,
+                             page_path: str = None, previous_cards: Optional[List[str]] = None) -> Optional[List[str]]:
+        """
+        Re-render only the cards of products whose displayed price, rating or availability changed
+
+        A card is taken from the page as it is when its product's
+        VOLATILE_FIELDS hash the same as when it was rendered
+        (`previous_cards`) and the price history doesn't report it as moved.
+        Returns None when that isn't possible (no card hashes, or the page's
+        cards don't line up with the products), in which case the whole grid
+        is rendered.
+        """
+        if previous_cards is None or len(previous_cards) != len(products):
+            return None
+
+        inner = PAGINATION_RE.sub('', grid_html[len(GRID_START_MARKER):-len(GRID_END_MARKER)]).rstrip()
+        old_cards = [card for card in CARD_SPLIT_RE.split(inner) if card]
+        if len(old_cards) != len(products):
+            return None
+
+        template = self.get_card_template(category_key)
+        changed_asins = self.changed_asins or set()
+        cards = []
+        for idx, (product, old_card, old_hash) in enumerate(zip(products, old_cards, previous_cards)):
+            if old_hash == self.card_hash(product) and product.get('asin') not in changed_asins:
+                cards.append(old_card)
+            else:
+                cards.append(self.generate_product_card_html(product, idx, category_key, template, page_path))
+
+        reused = sum(card is old for card, old in zip(cards, old_cards))
+        self.metrics.count('cards_reused', reused)
+        self.metrics.count('cards_rendered', len(cards) - reused)
+        print(f"  Re-rendered {len(cards) - reused} of {len(cards)} cards (price changes)")
+        return cards
+
+    def update_category_page(self, category_key: str, products: List[Dict], force: bool = False) -> str:
+        """
+        Update a category's pages (and its products' own pages) with products
+
+        The category is split into pages of website.page_size products: page 1
+        is categories/<key>.html and the rest go in categories/<key>/. Every
+        page is streamed to disk card by card around the shell of page 1, so
+        the memory and size of a page stay the same however large its
+        category grows.
+
+        Returns 'updated', 'skipped' (content hash unchanged) or 'failed'.
+        """
+        category_file = self.category_path(category_key)
+
+        if not os.path.exists(category_file) and not self.seed_category_page(category_key):
+            print(f"Warning: Category file not found: {category_file}")
+            return 'failed'
+
+        content_hash = self.category_hash(category_key, products)
+        previous = self.manifest['pages'].get(category_key, {})
+        if not force and previous.get('hash') == content_hash:
+            print(f"Skipping {category_file} (unchanged)")
+            return 'skipped'
+
         print(f"Updating {category_file} with {len(products)} products...")
 
-        # Read the HTML file
-        with open(category_file, 'r', encoding='utf-8') as f:
+        # Read the HTML file (newline='' keeps line endings byte-identical)
+        with open(category_file, 'r', encoding='utf-8', newline='') as f:
             html_content = f.read()
 
-        soup = BeautifulSoup(html_content, 'html.parser')
-
         # Find the products grid
-        products_grid = soup.find('div', class_='products-grid')
+        grid = self.locate_products_grid(html_content)
 
-        if not products_grid:
+        if not grid:
             print(f"  Warning: Could not find products-grid in {category_file}")
+            return 'failed'
+
+        # The new product cards go between the shell's head and tail, leaving the rest of the page untouched
+        start, end, has_markers = grid
+        old_grid = html_content[start:end]
+        if has_markers:
+            shell = PageShell(category_file, html_content[:start] + GRID_START_MARKER,
+                              f'\n        {GRID_END_MARKER}' + html_content[end:])
+        else:
+            # Keep the whitespace that preceded the grid's closing tag
+            shell = PageShell(category_file, f'{html_content[:start]}\n        {GRID_START_MARKER}',
+                              f'\n        {GRID_END_MARKER}{old_grid[len(old_grid.rstrip()):]}{html_content[end:]}')
+        del html_content
+
+        layout_hash = self.category_hash(category_key, products, volatile=False)
+        reuse = not force and has_markers and previous.get('layout') == layout_hash
+        previous_cards = previous.get('cards') if reuse else None
+        category_name = self.config.get('categories', {}).get(category_key, {}).get('name', category_key)
+        currency = self.config.get('website', {}).get('currency', 'USD')
+        title = page_title(shell.head)
+
+        pages = [products[i:i + self.page_size] for i in range(0, len(products), self.page_size)] or [[]]
+        inner_shell = None
+        for number, page_products in enumerate(pages, 1):
+            if number == 1:
+                page_shell, page_head = shell, shell.head
+            else:
+                # Every later page sits in the same directory, so the shell is moved there once
+                path = self.category_path(category_key, number)
+                inner_shell = inner_shell or shell.moved_to(path)
+                page_shell = inner_shell._replace(path=path)
+                page_head = set_title(page_shell.head, f"{title} - Page {number}") if title else page_shell.head
+                old_grid = self.read_products_grid(path) if reuse else None
+
+            cards = None
+            if old_grid and previous_cards is not None:
+                offset = (number - 1) * self.page_size
+                cards = self.render_changed_cards(category_key, page_products, old_grid, page_shell.path,
+                                                  previous_cards[offset:offset + len(page_products)])
+            if cards is None:
+                cards = self.render_products_html(category_key, page_products, page_shell.path)
+
+            # schema.org Product/Offer data for the same products, in the page head
+            page_head = splice_structured_data(page_head, category_json_ld(
+                category_name, page_products, self.get_product_description, currency,
+                self.product_link(page_shell.path) if self.product_pages else None))
+
+            # Written as it is rendered (atomically, so a crash never leaves a half-written page)
+            self.write_page(page_shell.path, page_head, cards,
+                            pagination_html(category_key, number, len(pages), self.output_dir), page_shell.tail)
+
+        self.remove_stale_pages(category_key, len(pages))
+
+        entry = {
+            'hash': content_hash,
+            'layout': layout_hash,
+            'cards': [self.card_hash(product) for product in products],
+            'updated': datetime.now().isoformat()
+        }
+        if len(pages) > 1:
+            entry['pages'] = len(pages)
+        if self.product_pages:
+            entry['products'] = self.update_product_pages(category_key, products, shell,
+                                                          previous.get('products', {}), force)
+        self.manifest['pages'][category_key] = entry
+
+        print(f"  ✓ Updated {category_file}" + (f" ({len(pages)} pages)" if len(pages) > 1 else ''))
+        return 'updated'
+
+    def update_product_pages(self, category_key: str, products: List[Dict], shell: PageShell,
+                             previous: Dict[str, str], force: bool = False) -> Dict[str, str]:
+        """
+        Write the own pages of the products this category is home to, skipping unchanged ones
+
+        Returns page id -> content hash, for the build manifest. Pages of
+        products no longer listed anywhere are removed.
+        """
+        template = self.get_product_page_template()
+        site_name = self.config.get('website', {}).get('site_name', "TerraLogic Tech")
+        currency = self.config.get('website', {}).get('currency', 'USD')
+        product_shell = None
+        hashes: Dict[str, str] = {}
+        written = 0
+
+        for product in products:
+            identifier = page_id(product)
+            if identifier in hashes or self.product_homes.get(identifier, category_key) != category_key:
+                continue
+            hashes[identifier] = self.product_page_hash(category_key, product)
+            path = product_page_path(identifier, self.output_dir)
+            if not force and previous.get(identifier) == hashes[identifier] and os.path.exists(path):
+                continue
+
+            # Product pages all sit two directories down, so the shell is moved once
+            product_shell = product_shell or shell.moved_to(path)
+            description = self.get_product_description(product)
+            head = set_title(product_shell.head, f"{product.get('name', 'Product')} | {site_name}")
+            head = set_meta_description(head, description)
+            head = splice_structured_data(head, product_page_json_ld(product, description, currency,
+                                                                     posixpath.basename(path)))
+            body = self.generate_product_page_html(product, category_key, template, path)
+            self.write_page(path, head, [body], '', product_shell.tail)
+            written += 1
+
+        for identifier in set(previous) - set(hashes):
+            stale = product_page_path(identifier, self.output_dir)
+            if identifier not in self.product_homes and os.path.exists(stale):
+                os.remove(stale)
+
+        self.metrics.count('product_pages_written', written)
+        if written:
+            print(f"  ✓ Wrote {written} product page(s)")
+        return hashes
+
+    def generate_product_page_html(self, product: Dict, category_key: str, template: CardTemplate,
+                                   page_path: str) -> str:
+        """Generate the body of a product's own page"""
+        prefix = root_prefix(page_path)
+        rating_html = ''
+        if product.get('rating') and product.get('review_count'):
+            rating_html = (f'<div class="product-rating">★ {escape_html(product["rating"])} '
+                           f'({escape_html(product["review_count"])} reviews)</div>')
+
+        return template.render({
+            'badge_html': BADGE_HTML.get(product.get('tier', '').lower(), ''),
+            'image_html': self.get_image_html(product, category_key, prefix),
+            'name': product.get('name', 'Product Name'),
+            'price': product.get('price_range', product.get('price', 'Check Amazon')),
+            'rating_html': rating_html,
+            'description': self.get_product_description(product),
+            'features_html': self.get_features_html(product.get('features', [])),
+            'affiliate_url': product.get('affiliate_url', '#'),
+            'category_name': self.config.get('categories', {}).get(category_key, {}).get('name', category_key),
+            'category_url': prefix + self.category_path(category_key),
+        })
+
+    @staticmethod
+    def write_page(path: str, head: str, cards: Iterable[str], footer: str, tail: str):
+        """Stream a page to disk: the shell's head, each card as it is rendered, then the tail"""
+        write_chunks_atomic(path, itertools.chain((head,), cards, (footer, tail)))
+
+    def read_products_grid(self, path: str) -> Optional[str]:
+        """The marked products grid of an already built page (None when there is none)"""
+        try:
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                html_content = f.read()
+        except FileNotFoundError:
+            return None
+        grid = self.locate_products_grid(html_content)
+        return html_content[grid[0]:grid[1]] if grid and grid[2] else None
+
+    def remove_stale_pages(self, category_key: str, count: int):
+        """Remove the pages of a category beyond its current page count"""
+        directory = os.path.dirname(self.category_path(category_key, 2))
+        if not os.path.isdir(directory):
             return
-
-        # Clear existing product cards
-        products_grid.clear()
-
-        # Add new product cards
-        for idx, product in enumerate(products):
-            card_html = self.generate_product_card_html(product, idx)
-            card_soup = BeautifulSoup(card_html, 'html.parser')
-            products_grid.append(card_soup)
-
-        # Write back to file
-        with open(category_file, 'w', encoding='utf-8') as f:
-            f.write(str(soup.prettify()))
-
-        print(f"  ✓ Updated {category_file}")
-
-    def update_all_categories(self):
-        """Update all category pages with products"""
+        for name in os.listdir(directory):
+            match = re.fullmatch(r'page-(\d+)\.html', name)
+            if match and int(match.group(1)) > count:
+                os.remove(os.path.join(directory, name))
+        if not os.listdir(directory):
+            os.rmdir(directory)
+
+    def category_path(self, category_key: str, number: int = 1) -> str:
+        """Where a category page is built (under the locale's output directory, if any)"""
+        return category_page_path(category_key, number, self.output_dir)
+
+    def product_url(self, category_key: str, position: int, product: Dict) -> str:
+        """Site path a product is shown at: its own page, or the category page listing it"""
+        if self.product_pages:
+            return product_page_path(page_id(product), self.output_dir)
+        return self.category_path(category_key, position // self.page_size + 1)
+
+    def product_link(self, from_page: str):
+        """Gives the link from `from_page` to a product's own page"""
+        return lambda product: relative_url(from_page, product_page_path(page_id(product), self.output_dir))
+
+    def seed_category_page(self, category_key: str) -> bool:
+        """Start a locale's copy of a category page from the root page, with its links rebased"""
+        source = category_page_path(category_key)
+        if not self.output_dir or not os.path.exists(source):
+            return False
+
+        with open(source, 'r', encoding='utf-8', newline='') as f:
+            html_content = rebase_relative_urls(f.read(), self.output_depth)
+        lang = self.config.get('website', {}).get('lang')
+        if lang:
+            html_content = HTML_LANG_RE.sub(lambda m: m.group(1) + lang, html_content, count=1)
+
+        os.makedirs(os.path.dirname(self.category_path(category_key)), exist_ok=True)
+        write_file_atomic(self.category_path(category_key), html_content)
+        print(f"  Created {self.category_path(category_key)} from {source}")
+        return True
+
+    @staticmethod
+    def locate_products_grid(html_content: str) -> Optional[Tuple[int, int, bool]]:
+        """
+        Find the region of a page holding the product cards
+
+        Returns (start, end, has_markers): the span between (and including)
+        the marker comments when present, otherwise the contents of the
+        products-grid div; None if the page has no products grid.
+        """
+        start = html_content.find(GRID_START_MARKER)
+        if start != -1:
+            end = html_content.find(GRID_END_MARKER, start)
+            if end != -1:
+                return start, end + len(GRID_END_MARKER), True
+
+        grid_open = GRID_OPEN_RE.search(html_content)
+        if not grid_open:
+            return None
+
+        depth = 1
+        for tag in DIV_TAG_RE.finditer(html_content, grid_open.end()):
+            depth += -1 if tag.group(1) else 1
+            if depth == 0:
+                return grid_open.end(), tag.start(), False
+
+        return None
+
+    def update_all_categories(self, force: bool = False, workers: Optional[int] = None) -> Dict[str, int]:
+        """
+        Update all category pages with products, skipping unchanged ones
+
+        Pages are built in a process pool when there are enough of them to
+        be worth it (see website.build_workers / website.parallel_min_pages).
+        """
         print("\n" + "=" * 60)
         print("Updating Category Pages")
         print("=" * 60)
 
-        for category_key, products in self.products_data.items():
-            self.update_category_page(category_key, products)
+        website_config = self.config.get('website', {})
+        if workers is None:
+            workers = website_config.get('build_workers') or os.cpu_count() or 1
+        pages = list(self.products_data.items())
+
+        # A product listed in several categories is rendered from one canonical copy
+        with self.metrics.span('index'):
+            index = self.build_product_index(pages)
+        if index.duplicates:
+            print(f"\n{len(index.duplicates)} product(s) listed in more than one category:")
+            pages = [(key, [index.canonical(product) for product in products]) for key, products in pages]
+        index.report()
+        self.metrics.gauge('duplicate_products', len(index.duplicates))
+
+        history_run = self.history.last_run() if self.history else None
+        if self.history and 'history_run' in self.manifest:
+            self.changed_asins = self.history.changed_since(self.manifest['history_run'])
+        self.prepare_images([product for _, products in pages for product in products])
+        parallel = workers > 1 and len(pages) >= website_config.get('parallel_min_pages', 8)
+
+        started = time.perf_counter()
+        results = {'updated': 0, 'skipped': 0, 'failed': 0}
+        timings = []
+
+        if parallel:
+            with ProcessPoolExecutor(max_workers=min(workers, len(pages)),
+                                     initializer=_init_page_worker, initargs=(self,)) as executor:
+                futures = [executor.submit(_build_page_worker, key, products, force) for key, products in pages]
+                for future in as_completed(futures):
+                    category_key, status, manifest_entry, elapsed, counters = future.result()
+                    if manifest_entry:
+                        self.manifest['pages'][category_key] = manifest_entry
+                    for name, value in counters.items():
+                        self.metrics.count(name, value)
+                    self.metrics.record('page', elapsed)
+                    results[status] += 1
+                    timings.append((elapsed, category_key, status))
+        else:
+            for category_key, products in pages:
+                page_started = time.perf_counter()
+                with self.metrics.span('page'):
+                    status = self.update_category_page(category_key, products, force)
+                results[status] += 1
+                timings.append((time.perf_counter() - page_started, category_key, status))
+
+        # Later builds re-render the cards of products that moved after this run
+        history_moved = history_run is not None and self.manifest.get('history_run') != history_run
+        if history_moved:
+            self.manifest['history_run'] = history_run
+        if results['updated'] or history_moved:
+            self.save_manifest()
+        for status, count in results.items():
+            self.metrics.count(f'pages_{status}', count)
+
+        print(f"\n✓ All category pages updated! "
+              f"({results['updated']} rewritten, {results['skipped']} unchanged and skipped)")
+        self.print_page_timings(timings, time.perf_counter() - started, min(workers, len(pages)) if parallel else 1)
+        return results
+
+    @staticmethod
+    def print_page_timings(timings: List[Tuple[float, str, str]], wall_time: float, workers: int):
+        """Print a summary of how long each page took to build"""
+        if not timings:
+            return
 
-        print("\n✓ All category pages updated!")
+        print(f"\nBuild time: {wall_time:.3f}s wall, {sum(t[0] for t in timings):.3f}s total "
+              f"across {len(timings)} pages on {workers} worker(s)")
+        for elapsed, category_key, status in sorted(timings, reverse=True)[:10]:
+            print(f"  {elapsed * 1000:8.1f} ms  {category_key} ({status})")
+
+    def __getstate__(self) -> Dict:
+        # Worker processes receive products page by page; don't ship the whole catalogue
+        state = self.__dict__.copy()
+        state['products_data'] = {}
+        del state['metrics']
+        return state
+
+    def __setstate__(self, state: Dict):
+        self.__dict__.update(state)
+        self.metrics = get_metrics()
+
+    def build_search_index(self) -> Optional[Dict[str, int]]:
+        """Rebuild the instant-search index, rewriting only the shards that changed"""
+        builder = SearchIndexBuilder.from_config(self.config)
+        if not builder:
+            return None
+
+        print("\nBuilding search index...")
+        with self.metrics.span('search_index'):
+            stats = builder.build(self.products_data, self.config.get('categories', {}), self.get_product_description,
+                                  self.product_url)
+        for name, value in stats.items():
+            self.metrics.count(f'search_{name}', value)
+
+        print(f"  ✓ {stats['documents']} products indexed ({stats['changed']} changed, "
+              f"{stats['shards_written']} shards written, {stats['shards_deleted']} removed)")
+        return stats
+
+    def build_feeds(self) -> Optional[Dict[str, int]]:
+        """Refresh sitemap.xml and the changed-products feed from page and product hashes"""
+        print("\nUpdating sitemap and feed...")
+        builder = SiteFeedBuilder.from_config(self.config)
+        if not builder:
+            return None
+
+        with self.metrics.span('feeds'):
+            stats = builder.build(self.products_data, self.manifest, self.config.get('categories', {}),
+                                  self.get_product_description)
+        self.metrics.count('feed_products_changed', stats['products_changed'])
+
+        print(f"  ✓ {stats['urls']} sitemap URLs, {stats['products_changed']} products changed "
+              f"({stats['files_written']} files written)")
+        return stats
+
+    def build_assets(self) -> Optional[Dict[str, str]]:
+        """Minify, fingerprint and precompress CSS/JS and point the pages at the builds"""
+        if not self.config.get('assets', {}).get('enabled', True):
+            return None
+        try:
+            with self.metrics.span('assets'):
+                return AssetBuilder(self.config).build()
+        except OSError as e:
+            print(f"❌ Error building assets: {e}")
+            return None
 
     def update_homepage_stats(self):
         """Update homepage statistics"""
@@ -182,17 +744,59 @@ class WebsiteUpdater:
         print("  ✓ Homepage stats reviewed")
 
 
+_page_worker: Optional[WebsiteUpdater] = None
+
+
+def _init_page_worker(updater: WebsiteUpdater):
+    """Process pool initializer: keep one updater per worker process"""
+    global _page_worker
+    _page_worker = updater
+
+
+def _build_page_worker(category_key: str, products: List[Dict], force: bool):
+    """Build one category page in a worker process"""
+    started = time.perf_counter()
+    metrics = get_metrics()
+    before = dict(metrics.counters)
+    status = _page_worker.update_category_page(category_key, products, force)
+    manifest_entry = _page_worker.manifest['pages'].get(category_key) if status == 'updated' else None
+    # Counters (cards rendered, bytes written, ...) are handed back for the parent's report
+    counters = {name: value - before.get(name, 0) for name, value in metrics.counters.items()
+                if value != before.get(name, 0)}
+    return category_key, status, manifest_entry, time.perf_counter() - started, counters
+
+
 def main():
     """Main execution function"""
+    parser = argparse.ArgumentParser(description="TerraLogic Tech - Website Updater")
+    parser.add_argument('--force', action='store_true',
+                        help="rewrite every category page even if its content is unchanged")
+    parser.add_argument('--workers', type=int,
+                        help="number of processes used to build pages (default: website.build_workers)")
+    parser.add_argument('--profile', action='store_true',
+                        help="build the category pages under cProfile and dump the stats")
+    args = parser.parse_args()
+
     print("=" * 60)
     print("TerraLogic Tech - Website Updater")
     print("=" * 60)
 
     # Initialize updater
     updater = WebsiteUpdater()
+    metrics = updater.metrics.configure(updater.config, name='website_updater', profile=args.profile)
 
     # Update all category pages
-    updater.update_all_categories()
+    with metrics.span('build', profile=True):
+        updater.update_all_categories(force=args.force, workers=args.workers)
+
+    # Rebuild the search index shards that changed
+    updater.build_search_index()
+
+    # Rebuild minified CSS/JS and inline critical CSS
+    updater.build_assets()
+
+    # Refresh sitemap.xml and the changed-products feed
+    updater.build_feeds()
 
     # Update homepage if needed
     updater.update_homepage_stats()
@@ -201,6 +805,8 @@ def main():
     print("Website Update Complete!")
     print("=" * 60)
 
+    metrics.report()
+
 
 if __name__ == "__main__":
     main()
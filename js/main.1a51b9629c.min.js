@@ -0,0 +1,46 @@
+const mobileMenuToggle=document.querySelector('.mobile-menu-toggle');const navMenu=document.querySelector('.nav-menu');if(mobileMenuToggle){mobileMenuToggle.addEventListener('click',()=>{navMenu.classList.toggle('active');mobileMenuToggle.classList.toggle('active');});const navLinks=document.querySelectorAll('.nav-link');navLinks.forEach(link=>{link.addEventListener('click',()=>{navMenu.classList.remove('active');mobileMenuToggle.classList.remove('active');});});document.addEventListener('click',(e)=>{if(!navMenu.contains(e.target)&&!mobileMenuToggle.contains(e.target)){navMenu.classList.remove('active');mobileMenuToggle.classList.remove('active');}});}
+const header=document.getElementById('header');window.addEventListener('scroll',()=>{if(window.scrollY>50){header.classList.add('scrolled');}else{header.classList.remove('scrolled');}});document.querySelectorAll('a[href^="#"]').forEach(anchor=>{anchor.addEventListener('click',function(e){const href=this.getAttribute('href');if(href==='#'||href===''){e.preventDefault();return;}
+const target=document.querySelector(href);if(target){e.preventDefault();const headerOffset=80;const elementPosition=target.getBoundingClientRect().top;const offsetPosition=elementPosition+window.pageYOffset-headerOffset;window.scrollTo({top:offsetPosition,behavior:'smooth'});}});});const observerOptions={threshold:0.1,rootMargin:'0px 0px -50px 0px'};const observer=new IntersectionObserver((entries)=>{entries.forEach(entry=>{if(entry.isIntersecting){entry.target.classList.add('in-view');}});},observerOptions);const animatedElements=document.querySelectorAll('.animate-on-scroll');animatedElements.forEach(el=>observer.observe(el));const backToTopButton=document.getElementById('backToTop');if(backToTopButton){window.addEventListener('scroll',()=>{if(window.scrollY>500){backToTopButton.classList.add('show');}else{backToTopButton.classList.remove('show');}});backToTopButton.addEventListener('click',()=>{window.scrollTo({top:0,behavior:'smooth'});});}
+const newsletterForms=document.querySelectorAll('.newsletter-form');newsletterForms.forEach(form=>{form.addEventListener('submit',(e)=>{e.preventDefault();const emailInput=form.querySelector('.newsletter-input');const email=emailInput.value.trim();if(email&&validateEmail(email)){const subscribers=JSON.parse(localStorage.getItem('newsletter_subscribers')||'[]');if(!subscribers.includes(email)){subscribers.push(email);localStorage.setItem('newsletter_subscribers',JSON.stringify(subscribers));showNotification('Success! You\'ll be notified when we publish new content.','success');emailInput.value='';}else{showNotification('This email is already subscribed!','info');}}else{showNotification('Please enter a valid email address.','error');}});});function validateEmail(email){const re=/^[^\s@]+@[^\s@]+\.[^\s@]+$/;return re.test(email);}
+function showNotification(message,type='info'){const existingNotification=document.querySelector('.notification');if(existingNotification){existingNotification.remove();}
+const notification=document.createElement('div');notification.className=`notification notification-${type}`;notification.textContent=message;Object.assign(notification.style,{position:'fixed',top:'20px',right:'20px',padding:'1rem 1.5rem',borderRadius:'0.5rem',color:'white',fontWeight:'600',boxShadow:'0 10px 15px rgba(0, 0, 0, 0.1)',zIndex:'9999',animation:'slideInRight 0.3s ease',maxWidth:'400px'});const colors={success:'#10b981',error:'#ef4444',info:'#2563eb',warning:'#f59e0b'};notification.style.backgroundColor=colors[type]||colors.info;if(!document.querySelector('#notification-animations')){const style=document.createElement('style');style.id='notification-animations';style.textContent=`
+      @keyframes slideInRight {
+        from {
+          transform: translateX(100%);
+          opacity: 0;
+        }
+        to {
+          transform: translateX(0);
+          opacity: 1;
+        }
+      }
+      @keyframes slideOutRight {
+        from {
+          transform: translateX(0);
+          opacity: 1;
+        }
+        to {
+          transform: translateX(100%);
+          opacity: 0;
+        }
+      }
+    `;document.head.appendChild(style);}
+document.body.appendChild(notification);setTimeout(()=>{notification.style.animation='slideOutRight 0.3s ease';setTimeout(()=>{notification.remove();},300);},5000);}
+document.addEventListener('click',(e)=>{const link=e.target.closest('a[data-affiliate="true"]');if(link){const productName=link.getAttribute('data-product-name')||'Unknown Product';const href=link.getAttribute('href');console.log('Affiliate link clicked:',{product:productName,url:href,timestamp:new Date().toISOString()});const clicks=JSON.parse(localStorage.getItem('affiliate_clicks')||'[]');clicks.push({product:productName,url:href,timestamp:new Date().toISOString()});localStorage.setItem('affiliate_clicks',JSON.stringify(clicks));}});function updateActiveNavLink(){const sections=document.querySelectorAll('section[id]');const navLinks=document.querySelectorAll('.nav-link');let currentSection='';sections.forEach(section=>{const sectionTop=section.offsetTop;const sectionHeight=section.clientHeight;if(window.scrollY>=sectionTop-100){currentSection=section.getAttribute('id');}});navLinks.forEach(link=>{link.classList.remove('active');const href=link.getAttribute('href');if(href===`#${currentSection}`){link.classList.add('active');}else if(href==='index.html'&&window.scrollY<100){link.classList.add('active');}});}
+window.addEventListener('scroll',updateActiveNavLink);window.addEventListener('load',updateActiveNavLink);const heroBackground=document.querySelector('.hero-background');if(heroBackground){window.addEventListener('scroll',()=>{const scrolled=window.scrollY;const parallaxSpeed=0.5;if(scrolled<window.innerHeight){heroBackground.style.transform=`translateY(${scrolled*parallaxSpeed}px)`;}});}
+window.addEventListener('load',()=>{document.body.classList.add('loaded');});document.documentElement.style.visibility='visible';console.log('%c🏢 TerraLogic Tech','font-size: 24px; font-weight: bold; color: #2563eb;');console.log('%cWebsite loaded successfully!','font-size: 14px; color: #64748b;');console.log('%cBuilt with modern web technologies','font-size: 12px; color: #94a3b8;');if('performance'in window){window.addEventListener('load',()=>{setTimeout(()=>{const perfData=window.performance.timing;const pageLoadTime=perfData.loadEventEnd-perfData.navigationStart;console.log(`⚡ Page loaded in ${pageLoadTime}ms`);},0);});}
+const SEARCH_STOPWORDS=new Set('a an and as at by for from in is it of on or the to with your you'.split(' '));const searchRoot=document.currentScript?document.currentScript.src.replace(/js\/[^\/]*$/,''):'';const searchShards=new Map();function fetchSearchShard(name){if(!searchShards.has(name)){searchShards.set(name,fetch(`${searchRoot}search/${name}.json`)
+.then(response=>(response.ok?response.json():{}))
+.catch(()=>({})));}
+return searchShards.get(name);}
+function searchTokens(text){const folded=text.toLowerCase().normalize('NFKD').replace(/[\u0300-\u036f]/g,'');return folded.match(/[a-z0-9]+/g)||[];}
+function decodePostings(gaps){let id=0;return gaps.map(gap=>(id+=gap));}
+async function searchProducts(query,limit=8){const meta=await fetchSearchShard('meta');if(!meta.prefix)return[];const tokens=searchTokens(query).filter((token,i,all)=>
+token.length>=meta.prefix&&(i===all.length-1||!SEARCH_STOPWORDS.has(token)));if(!tokens.length)return[];const prefixes=tokens.map(token=>token.slice(0,meta.prefix));if(prefixes.some(prefix=>!meta.terms.includes(prefix)))return[];const shards=await Promise.all(prefixes.map(prefix=>fetchSearchShard(`terms/${prefix}`)));let scores=null;tokens.forEach((token,i)=>{const isLast=i===tokens.length-1;const terms=isLast?Object.keys(shards[i]).filter(term=>term.startsWith(token)):[token];const matches=new Map();terms.forEach(term=>{const postings=shards[i][term];if(!postings)return;decodePostings(postings[0]).forEach(id=>matches.set(id,3));decodePostings(postings[1]).forEach(id=>matches.set(id,Math.max(matches.get(id)||0,1)));});if(scores===null){scores=matches;}else{scores.forEach((score,id)=>{if(matches.has(id)){scores.set(id,score+matches.get(id));}else{scores.delete(id);}});}});const best=[...scores.entries()].sort((a,b)=>b[1]-a[1]||a[0]-b[0]).slice(0,limit);const docShards=await Promise.all(best.map(([id])=>fetchSearchShard(`docs/${Math.floor(id/meta.docShardSize)}`)));return best.map(([id],i)=>{const[name,category,url,price]=docShards[i][id]||[];return name?{name,url,price,category:meta.categories[category]||category}:null;}).filter(Boolean);}
+function initProductSearch(){const nav=document.querySelector('.nav');if(!nav||!window.fetch)return;const box=document.createElement('div');box.className='site-search';box.innerHTML='<input type="search" class="site-search-input" placeholder="Search products..." '+
+'aria-label="Search products" autocomplete="off"><ul class="site-search-results" hidden></ul>';nav.insertBefore(box,nav.querySelector('.nav-menu'));const input=box.querySelector('.site-search-input');const results=box.querySelector('.site-search-results');let latestQuery='';const render=(items)=>{results.innerHTML='';if(!items.length){const empty=document.createElement('li');empty.className='site-search-empty';empty.textContent='No matching products';results.appendChild(empty);}
+items.forEach(item=>{const li=document.createElement('li');const link=document.createElement('a');link.href=searchRoot+item.url;const name=document.createElement('span');name.className='site-search-name';name.textContent=item.name;const details=document.createElement('span');details.className='site-search-meta';details.textContent=[item.category,item.price].filter(Boolean).join(' · ');link.append(name,details);li.appendChild(link);results.appendChild(li);});results.hidden=false;};input.addEventListener('input',debounce(async()=>{const query=input.value.trim();latestQuery=query;if(query.length<2){results.hidden=true;return;}
+const items=await searchProducts(query);if(query===latestQuery)render(items);},120,false));input.addEventListener('focus',()=>fetchSearchShard('meta'),{once:true});input.addEventListener('keydown',(e)=>{if(e.key==='Escape')results.hidden=true;});document.addEventListener('click',(e)=>{if(!box.contains(e.target))results.hidden=true;});}
+initProductSearch();function debounce(func,wait=20,immediate=true){let timeout;return function(){const context=this;const args=arguments;const later=function(){timeout=null;if(!immediate)func.apply(context,args);};const callNow=immediate&&!timeout;clearTimeout(timeout);timeout=setTimeout(later,wait);if(callNow)func.apply(context,args);};}
+function throttle(func,limit){let inThrottle;return function(){const args=arguments;const context=this;if(!inThrottle){func.apply(context,args);inThrottle=true;setTimeout(()=>inThrottle=false,limit);}};}
+window.addEventListener('scroll',throttle(()=>{},100));
@@ -355,6 +355,145 @@ if ('performance' in window) {
   });
 }
 
+// ========================================
+// Instant Product Search
+// ========================================
+
+// The index is built by automation/search_index.py: search/meta.json, then
+// one small shard per two-letter term prefix and per block of products,
+// fetched only when a query needs them.
+const SEARCH_STOPWORDS = new Set('a an and as at by for from in is it of on or the to with your you'.split(' '));
+const searchRoot = document.currentScript ? document.currentScript.src.replace(/js\/[^\/]*$/, '') : '';
+const searchShards = new Map();
+
+function fetchSearchShard(name) {
+  if (!searchShards.has(name)) {
+    searchShards.set(name, fetch(`${searchRoot}search/${name}.json`)
+      .then(response => (response.ok ? response.json() : {}))
+      .catch(() => ({})));
+  }
+  return searchShards.get(name);
+}
+
+// Must match tokenize() in automation/search_index.py
+function searchTokens(text) {
+  const folded = text.toLowerCase().normalize('NFKD').replace(/[\u0300-\u036f]/g, '');
+  return folded.match(/[a-z0-9]+/g) || [];
+}
+
+function decodePostings(gaps) {
+  let id = 0;
+  return gaps.map(gap => (id += gap));
+}
+
+async function searchProducts(query, limit = 8) {
+  const meta = await fetchSearchShard('meta');
+  if (!meta.prefix) return [];
+
+  // Every word must match; the last one may still be being typed, so it matches as a prefix
+  const tokens = searchTokens(query).filter((token, i, all) =>
+    token.length >= meta.prefix && (i === all.length - 1 || !SEARCH_STOPWORDS.has(token)));
+  if (!tokens.length) return [];
+  const prefixes = tokens.map(token => token.slice(0, meta.prefix));
+  if (prefixes.some(prefix => !meta.terms.includes(prefix))) return [];
+  const shards = await Promise.all(prefixes.map(prefix => fetchSearchShard(`terms/${prefix}`)));
+
+  let scores = null;
+  tokens.forEach((token, i) => {
+    const isLast = i === tokens.length - 1;
+    const terms = isLast ? Object.keys(shards[i]).filter(term => term.startsWith(token)) : [token];
+    const matches = new Map();
+    terms.forEach(term => {
+      const postings = shards[i][term];
+      if (!postings) return;
+      decodePostings(postings[0]).forEach(id => matches.set(id, 3));
+      decodePostings(postings[1]).forEach(id => matches.set(id, Math.max(matches.get(id) || 0, 1)));
+    });
+
+    if (scores === null) {
+      scores = matches;
+    } else {
+      scores.forEach((score, id) => {
+        if (matches.has(id)) {
+          scores.set(id, score + matches.get(id));
+        } else {
+          scores.delete(id);
+        }
+      });
+    }
+  });
+
+  const best = [...scores.entries()].sort((a, b) => b[1] - a[1] || a[0] - b[0]).slice(0, limit);
+  const docShards = await Promise.all(best.map(([id]) => fetchSearchShard(`docs/${Math.floor(id / meta.docShardSize)}`)));
+  return best.map(([id], i) => {
+    const [name, category, url, price] = docShards[i][id] || [];
+    return name ? { name, url, price, category: meta.categories[category] || category } : null;
+  }).filter(Boolean);
+}
+
+function initProductSearch() {
+  const nav = document.querySelector('.nav');
+  if (!nav || !window.fetch) return;
+
+  const box = document.createElement('div');
+  box.className = 'site-search';
+  box.innerHTML = '<input type="search" class="site-search-input" placeholder="Search products..." ' +
+    'aria-label="Search products" autocomplete="off"><ul class="site-search-results" hidden></ul>';
+  nav.insertBefore(box, nav.querySelector('.nav-menu'));
+
+  const input = box.querySelector('.site-search-input');
+  const results = box.querySelector('.site-search-results');
+  let latestQuery = '';
+
+  const render = (items) => {
+    results.innerHTML = '';
+    if (!items.length) {
+      const empty = document.createElement('li');
+      empty.className = 'site-search-empty';
+      empty.textContent = 'No matching products';
+      results.appendChild(empty);
+    }
+    items.forEach(item => {
+      const li = document.createElement('li');
+      const link = document.createElement('a');
+      link.href = searchRoot + item.url;
+      const name = document.createElement('span');
+      name.className = 'site-search-name';
+      name.textContent = item.name;
+      const details = document.createElement('span');
+      details.className = 'site-search-meta';
+      details.textContent = [item.category, item.price].filter(Boolean).join(' · ');
+      link.append(name, details);
+      li.appendChild(link);
+      results.appendChild(li);
+    });
+    results.hidden = false;
+  };
+
+  input.addEventListener('input', debounce(async () => {
+    const query = input.value.trim();
+    latestQuery = query;
+    if (query.length < 2) {
+      results.hidden = true;
+      return;
+    }
+    const items = await searchProducts(query);
+    // Ignore answers to queries the user has already typed past
+    if (query === latestQuery) render(items);
+  }, 120, false));
+
+  // Warm the metadata as soon as the user shows interest
+  input.addEventListener('focus', () => fetchSearchShard('meta'), { once: true });
+  input.addEventListener('keydown', (e) => {
+    if (e.key === 'Escape') results.hidden = true;
+  });
+  document.addEventListener('click', (e) => {
+    if (!box.contains(e.target)) results.hidden = true;
+  });
+}
+
+initProductSearch();
+
 // ========================================
 // Utility Functions
 // ========================================
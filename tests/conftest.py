@@ -0,0 +1,9 @@
+"""
+TerraLogic Tech - Test Configuration
+The automation scripts import their siblings directly, as when run from the repository root
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'automation'))
@@ -0,0 +1,50 @@
+"""Tests for compiled product card templates"""
+
+import pickle
+
+from card_template import CardTemplate, escape_html, load_card_template
+
+
+def test_fields_are_escaped_unless_raw():
+    template = CardTemplate('<h3>{{ name }}</h3><div>{{ badge|raw }}</div>')
+    html = template.render({'name': 'Desk & "Chair" <XL>', 'badge': '<b>New</b>'})
+    assert html == '<h3>Desk &amp; &quot;Chair&quot; &lt;XL&gt;</h3><div><b>New</b></div>'
+
+
+def test_missing_fields_render_empty():
+    assert CardTemplate('[{{ name }}]').render({}) == '[]'
+
+
+def test_repeated_field_is_rendered_everywhere():
+    template = CardTemplate('<img alt="{{ name }}"><h3>{{name}}</h3>')
+    assert template.render({'name': 'Lamp'}) == '<img alt="Lamp"><h3>Lamp</h3>'
+
+
+def test_placeholders_named_like_keywords_or_locals():
+    template = CardTemplate('<a class="{{ class }}" {{ def|raw }}>{{ get }} {{ fields }} {{ escape_html }}</a>')
+    html = template.render({'class': 'card', 'def': 'data-x="1"', 'get': 'go', 'fields': 'f', 'escape_html': '<'})
+    assert html == '<a class="card" data-x="1">go f &lt;</a>'
+
+
+def test_fingerprint_follows_the_source():
+    assert CardTemplate('{{ a }}').fingerprint == CardTemplate('{{ a }}').fingerprint
+    assert CardTemplate('{{ a }}').fingerprint != CardTemplate('{{ b }}').fingerprint
+
+
+def test_template_survives_pickling():
+    template = pickle.loads(pickle.dumps(CardTemplate('<p>{{ name }}</p>')))
+    assert template.render({'name': 'A&B'}) == '<p>A&amp;B</p>'
+
+
+def test_clean_values_are_returned_unchanged():
+    assert escape_html('Plain text') == 'Plain text'
+    assert escape_html(4.5) == '4.5'
+    assert escape_html("It's") == 'It&#x27;s'
+
+
+def test_loaded_template_is_reused_until_the_file_changes(tmp_path):
+    path = tmp_path / 'card.html'
+    path.write_text('<p>{{ name }}</p>\n', encoding='utf-8')
+    first = load_card_template(str(path))
+    assert load_card_template(str(path)) is first
+    assert first.render({'name': 'X'}) == '\n<p>X</p>'
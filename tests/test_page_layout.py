@@ -0,0 +1,60 @@
+"""Tests for page paths and link rebasing"""
+
+import hashlib
+
+from page_layout import (PageShell, category_page_path, page_id, page_title, pagination_html, product_page_path,
+                         rebase_relative_urls, relative_url, relocate_urls, set_meta_description, set_title)
+
+
+def test_page_ids():
+    assert page_id({'asin': 'B000000001', 'name': 'Desk'}) == 'B000000001'
+    assert page_id({'name': 'Café Desk (Oak)'}) == 'cafe-desk-oak'
+    assert page_id({}) == 'product'
+
+
+def test_paths():
+    assert category_page_path('desks') == 'categories/desks.html'
+    assert category_page_path('desks', 3, 'de') == 'de/categories/desks/page-3.html'
+    shard = hashlib.sha1(b'B000000001').hexdigest()[:2]
+    assert product_page_path('B000000001') == f'products/{shard}/B000000001.html'
+    assert relative_url('categories/desks/page-2.html', 'categories/desks.html') == '../desks.html'
+
+
+def test_relocate_urls_keeps_targets():
+    html = ('<link href="../css/styles.css"><a href="chairs.html#top">x</a><a href="https://amazon.com/x">y</a>'
+            '<a href="#main">z</a><img src="../images/a.jpg" srcset="../images/a-240.jpg 240w, ../images/a-480.jpg 480w">')
+    moved = relocate_urls(html, 'categories/desks.html', 'categories/desks/page-2.html')
+    assert moved == ('<link href="../../css/styles.css"><a href="../chairs.html#top">x</a>'
+                     '<a href="https://amazon.com/x">y</a><a href="#main">z</a><img src="../../images/a.jpg" '
+                     'srcset="../../images/a-240.jpg 240w, ../../images/a-480.jpg 480w">')
+    assert relocate_urls(html, 'categories/desks.html', 'categories/chairs.html') == html
+
+
+def test_shell_moves_with_its_links():
+    shell = PageShell('categories/desks.html', '<a href="../index.html">', '<script src="../js/main.js">')
+    moved = shell.moved_to('products/ab/B000000001.html')
+    assert moved == PageShell('products/ab/B000000001.html', '<a href="../../index.html">',
+                              '<script src="../../js/main.js">')
+
+
+def test_rebase_only_touches_links_out_of_the_directory():
+    html = '<a href="../index.html"><a href="desks.html">'
+    assert rebase_relative_urls(html, 1) == '<a href="../../index.html"><a href="desks.html">'
+    assert rebase_relative_urls(html, 0) == html
+
+
+def test_title_and_meta_description():
+    html = '<title>\n  Old\n</title><meta name="description" content="old">'
+    html = set_meta_description(set_title(html, 'Desks & Tables'), 'Best "desks"')
+    assert page_title(html) == 'Desks &amp; Tables'
+    assert '<meta name="description" content="Best &quot;desks&quot;">' in html
+    assert page_title('<p>no title</p>') == ''
+
+
+def test_pagination_links():
+    assert pagination_html('desks', 1, 1) == ''
+    first = pagination_html('desks', 1, 3)
+    assert 'rel="prev"' not in first and 'href="desks/page-2.html" rel="next"' in first
+    middle = pagination_html('desks', 2, 3)
+    assert 'href="../desks.html" rel="prev"' in middle and 'href="page-3.html" rel="next"' in middle
+    assert 'Page 2 of 3' in middle
@@ -0,0 +1,70 @@
+"""Tests for the delta-only price history"""
+
+import os
+
+from price_history import PriceHistory, snapshot_values
+
+
+def product(asin, price='$100', rating=4.5, reviews=10, availability='Now'):
+    return {'asin': asin, 'price': price, 'rating': rating, 'review_count': reviews, 'availability': availability}
+
+
+def test_snapshot_values_are_integers():
+    assert snapshot_values(product('A', price='$150-200', rating=4.56, reviews=7)) == (15000, 20000, 46, 7, 1)
+    assert snapshot_values({'price': 'Check Amazon', 'availability': 'Unknown'}) == (-1, -1, 0, 0, 0)
+
+
+def test_first_run_records_every_product(tmp_path):
+    history = PriceHistory(str(tmp_path))
+    assert history.record([product('A'), product('B'), {'name': 'no asin'}], timestamp=100) == {'A', 'B'}
+    assert history.latest('A').price == 10000
+    assert history.last_run() == 100
+
+
+def test_unchanged_run_writes_nothing(tmp_path):
+    PriceHistory(str(tmp_path)).record([product('A'), product('B')], timestamp=100)
+    files = {name: os.path.getsize(tmp_path / name) for name in os.listdir(tmp_path)}
+
+    history = PriceHistory(str(tmp_path))
+    # Review counts alone don't earn a row
+    assert history.record([product('A', reviews=11), product('B')], timestamp=200) == set()
+    assert {name: os.path.getsize(tmp_path / name) for name in os.listdir(tmp_path)} == files
+    assert history.last_run() == 100
+
+
+def test_changed_products_get_a_row(tmp_path):
+    history = PriceHistory(str(tmp_path))
+    history.record([product('A'), product('B')], timestamp=100)
+    assert history.record([product('A', price='$90'), product('B', availability='OutOfStock')],
+                          timestamp=200) == {'A', 'B'}
+    assert history.record([product('A', price='$90-120'), product('B', availability='OutOfStock')],
+                          timestamp=300) == {'A'}
+
+    reloaded = PriceHistory(str(tmp_path))
+    assert [(row.time, row.price, row.price_high) for row in reloaded.series('A')] == [
+        (100, 10000, 10000), (200, 9000, 9000), (300, 9000, 12000)
+    ]
+    assert reloaded.changed_since(100) == {'A', 'B'}
+    assert reloaded.changed_since(200) == {'A'}
+    assert reloaded.changed_in_last_run() == {'A'}
+
+
+def test_history_without_price_high_records_no_spurious_changes(tmp_path):
+    PriceHistory(str(tmp_path)).record([product('A', price='$150-200'), product('B')], timestamp=100)
+    # A history written before the price_high column existed
+    os.remove(tmp_path / 'price_high.bin')
+
+    history = PriceHistory(str(tmp_path))
+    assert history.latest('A').price_high == -1
+    assert history.record([product('A', price='$150-200'), product('B')], timestamp=200) == set()
+    assert os.path.getsize(tmp_path / 'price_high.bin') == os.path.getsize(tmp_path / 'price.bin')
+    # A real change is still recorded, now with its high end
+    assert history.record([product('A', price='$140-200')], timestamp=300) == {'A'}
+    assert history.latest('A').price_high == 20000
+
+
+def test_time_column_stays_sorted_when_the_clock_steps_back(tmp_path):
+    history = PriceHistory(str(tmp_path))
+    history.record([product('A')], timestamp=500)
+    history.record([product('A', price='$1')], timestamp=400)
+    assert [row.time for row in history.series('A')] == [500, 500]
@@ -0,0 +1,83 @@
+"""Tests for the PA-API client's rate limiter and circuit breaker"""
+
+import pytest
+import requests
+
+from product_finder import CircuitBreaker, CircuitOpenError, PAAPIClient, RateLimiter
+
+
+class FailingSession:
+    """Stands in for requests.Session, raising the given error on every request"""
+
+    def __init__(self, error: Exception):
+        self.error = error
+        self.calls = 0
+
+    def request(self, *args, **kwargs):
+        self.calls += 1
+        raise self.error
+
+
+def half_open_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    return breaker
+
+
+def test_breaker_opens_after_threshold_failures():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+
+
+def test_half_open_breaker_lets_one_trial_through():
+    breaker = half_open_breaker()
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.allow() and breaker.allow()
+
+
+def test_failed_trial_reopens_breaker():
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=0)
+    for _ in range(5):
+        breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.trial is None and breaker.opened_at is not None
+
+
+def test_unexpected_error_does_not_leave_breaker_half_open():
+    breaker = half_open_breaker()
+    client = PAAPIClient('http://stub', breaker=breaker, session=FailingSession(RuntimeError('boom')))
+    with pytest.raises(RuntimeError):
+        client.request('POST', '/paapi5/searchitems', {})
+    assert breaker.trial is None
+    assert breaker.allow()
+
+
+def test_non_retryable_request_error_counts_as_failure():
+    breaker = half_open_breaker()
+    session = FailingSession(requests.TooManyRedirects('loop'))
+    client = PAAPIClient('http://stub', breaker=breaker, session=session)
+    with pytest.raises(requests.TooManyRedirects):
+        client.request('POST', '/paapi5/searchitems', {})
+    assert session.calls == 1
+    assert breaker.trial is None
+
+
+def test_open_breaker_refuses_requests():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    session = FailingSession(RuntimeError('not reached'))
+    client = PAAPIClient('http://stub', breaker=breaker, session=session)
+    with pytest.raises(CircuitOpenError):
+        client.request('POST', '/paapi5/searchitems', {})
+    assert session.calls == 0
+
+
+def test_unlimited_rate_still_counts_daily_quota():
+    limiter = RateLimiter(requests_per_second=0, requests_per_day=3)
+    assert [limiter.acquire() for _ in range(4)] == [True, True, True, False]
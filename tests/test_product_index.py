@@ -0,0 +1,80 @@
+"""Tests for product identities and custom description lookups"""
+
+from product_index import DEFAULT_DESCRIPTION, ProductIndex, legacy_title_key, normalize_title
+
+
+def build(descriptions, products, **options):
+    return ProductIndex(descriptions, **options).build([('desks', products)])
+
+
+def test_normalize_title_folds_accents_and_punctuation():
+    assert normalize_title('  Café Desk — 48" (Walnut) ') == 'cafe_desk_48_walnut'
+    assert legacy_title_key('Standing Desk Converter With Keyboard Tray') == 'standing_desk_converter_with_k'
+
+
+def test_description_by_asin_then_full_title():
+    index = build({'B000000001': 'By ASIN', 'Standing Desk': 'By title'},
+                  [{'asin': 'B000000001', 'name': 'Standing Desk'}, {'asin': 'B000000002', 'name': 'Standing desk!'}])
+    assert index.description({'asin': 'B000000001', 'name': 'Standing Desk'}) == 'By ASIN'
+    assert index.description({'asin': 'B000000002', 'name': 'Standing desk!'}) == 'By title'
+
+
+def test_fallbacks_without_a_custom_description():
+    index = build({}, [])
+    assert index.description({'name': 'Desk', 'description': 'Own text'}) == 'Own text'
+    assert index.description({'name': 'Desk'}) == DEFAULT_DESCRIPTION
+
+
+def test_only_ten_character_keys_are_pure_asins():
+    index = ProductIndex({'B000000001': 'ASIN', 'LED': 'Short caps', 'Monitor Arm': 'Title'})
+    assert index.by_asin == {'B000000001': 'ASIN', 'LED': 'Short caps'}
+    assert set(index.by_title) == {'led', 'monitor_arm'}
+    assert index.description({'name': 'LED'}) == 'Short caps'
+
+
+def test_fuzzy_match_needs_a_clear_winner():
+    index = build({'Ergonomic Mesh Office Chair': 'Mesh chair'}, [])
+    assert index.description({'name': 'Ergonomic Mesh Office Chairs'}) == 'Mesh chair'
+    assert index.description({'name': 'Walnut Desk'}) == DEFAULT_DESCRIPTION
+    assert build({'Ergonomic Mesh Office Chair': 'x'}, [], fuzzy=False).description(
+        {'name': 'Ergonomic Mesh Office Chairs'}) == DEFAULT_DESCRIPTION
+
+
+def test_legacy_key_is_used_for_its_one_product(capsys):
+    title = 'Standing Desk Converter With Keyboard Tray'
+    index = build({legacy_title_key(title): 'Old key'}, [{'asin': 'B000000001', 'name': title}])
+    assert index.description({'asin': 'B000000001', 'name': title}) == 'Old key'
+
+    without_asin = build({legacy_title_key(title): 'Old key'}, [{'name': title}])
+    assert without_asin.description({'name': title}) == 'Old key'
+
+    index.report()
+    without_asin.report()
+    output = capsys.readouterr().out
+    assert "rename it to 'B000000001'" in output
+    assert "rename it to 'standing_desk_converter_with_keyboard_tray'" in output
+
+
+def test_legacy_key_shared_by_several_products_is_not_used(capsys):
+    products = [{'asin': 'B000000001', 'name': 'Standing Desk Converter With Keyboard Tray'},
+                {'asin': 'B000000002', 'name': 'Standing Desk Converter With Keyboard Shelf'}]
+    index = build({'standing_desk_converter_with_k': 'Ambiguous'}, products)
+    for product in products:
+        assert index.description(product) == DEFAULT_DESCRIPTION
+
+    index.report()
+    output = capsys.readouterr().out
+    assert 'fits 2 products and was not used' in output
+    assert 'B000000001, B000000002' in output
+
+
+def test_duplicates_render_from_the_first_copy(capsys):
+    first = {'asin': 'B000000001', 'name': 'Lamp', 'price': '$30'}
+    index = ProductIndex().build([('lighting', [first]), ('desks', [dict(first, price='$35')]),
+                                  ('chairs', [{'asin': 'B000000002', 'name': 'Chair'}])])
+    assert index.duplicates == {'B000000001': ['lighting', 'desks']}
+    assert index.canonical(dict(first, price='$35')) is first
+    assert index.canonical({'name': 'Chair', 'asin': 'B000000002'})['name'] == 'Chair'
+
+    index.report()
+    assert 'copies differ; showing the one from lighting' in capsys.readouterr().out
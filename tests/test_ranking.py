@@ -0,0 +1,61 @@
+"""Tests for price parsing and candidate ranking"""
+
+import pytest
+
+from ranking import CandidateRanker, parse_price
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('$1,299.99', (1299.99, 1299.99)),
+    ('12,99 €', (12.99, 12.99)),
+    ('1.299,99 €', (1299.99, 1299.99)),
+    ('¥1299', (1299.0, 1299.0)),
+    ('$150-200', (150.0, 200.0)),
+    ('$40 - $70', (40.0, 70.0)),
+    (25, (25.0, 25.0)),
+    (19.5, (19.5, 19.5)),
+    ('Check Amazon', (None, None)),
+    ('', (None, None)),
+    (None, (None, None)),
+])
+def test_parse_price(value, expected):
+    assert parse_price(value) == expected
+
+
+def candidate(asin, price, rating, reviews):
+    return {'asin': asin, 'price': f'${price}', 'rating': rating, 'review_count': reviews}
+
+
+def test_filters_drop_candidates_and_best_come_first():
+    ranker = CandidateRanker({'min_rating': 4.0, 'price_max': 300}, tier_balance=False)
+    candidates = [candidate('A', 100, 4.5, 100), candidate('B', 500, 4.9, 5000),
+                  candidate('C', 200, 3.5, 9000), candidate('D', 150, 4.8, 2000)]
+    assert [product['asin'] for product in ranker.rank(candidates, 5)] == ['D', 'A']
+
+
+def test_tier_balance_keeps_the_best_of_each_price_tier():
+    candidates = [candidate('budget1', 10, 3.0, 10), candidate('budget2', 20, 3.1, 10),
+                  candidate('mid1', 100, 4.9, 5000), candidate('mid2', 110, 4.9, 4000),
+                  candidate('premium1', 400, 4.9, 3000), candidate('premium2', 500, 3.0, 10)]
+    unbalanced = CandidateRanker(tier_balance=False).rank(candidates, 3)
+    assert [product['asin'] for product in unbalanced] == ['mid1', 'mid2', 'premium1']
+
+    balanced = CandidateRanker().rank(candidates, 3)
+    assert [product['asin'] for product in balanced] == ['mid1', 'premium1', 'budget2']
+    assert [product['tier'] for product in balanced] == ['mid', 'premium', 'budget']
+
+
+def test_unknown_prices_fail_a_price_filter():
+    ranker = CandidateRanker({'price_min': 10})
+    assert not ranker.passes({'price': 'Check Amazon', 'rating': 5, 'review_count': 10})
+    assert ranker.passes({'price': '$15', 'rating': 5, 'review_count': 10})
+
+
+def test_unfiltered_ranker_keeps_the_scoring():
+    ranker = CandidateRanker({'min_rating': 6}, rating_weight=2.0, review_weight=0.5, tier_balance=False)
+    candidates = [candidate('A', 100, 4.0, 100), candidate('B', 100, 4.5, 100)]
+    assert ranker.rank(candidates, 2) == []
+
+    unfiltered = ranker.unfiltered()
+    assert (unfiltered.rating_weight, unfiltered.review_weight, unfiltered.tier_balance) == (2.0, 0.5, False)
+    assert [product['asin'] for product in unfiltered.rank(candidates, 2)] == ['B', 'A']
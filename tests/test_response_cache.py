@@ -0,0 +1,72 @@
+"""Tests for the PA-API response cache and its resource-group helpers"""
+
+import pytest
+
+from response_cache import ResponseCache, group_response, merge_responses, resource_groups
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'paapi.sqlite3'))
+    yield cache
+    cache.close()
+
+
+def get_items_response():
+    return {'ItemsResult': {'Items': [
+        {'ASIN': 'B000000001', 'Offers': {'price': 1}, 'ItemInfo': {'title': 'One'}},
+        {'ASIN': 'B000000002', 'Offers': {'price': 2}, 'ItemInfo': {'title': 'Two'}},
+    ]}}
+
+
+def test_put_and_get_round_trip(cache):
+    cache.put('key', 'GetItems', {'answer': 42}, ttl=60)
+    assert cache.get('key') == {'answer': 42}
+    assert cache.get('missing') is None
+
+
+def test_expired_entry_is_only_served_when_stale_is_allowed(cache):
+    cache.put('key', 'GetItems', {'answer': 42}, ttl=-1)
+    assert cache.get('key') is None
+    assert cache.get('key', allow_stale=True) == {'answer': 42}
+
+
+def test_key_ignores_parameter_order_but_not_marketplace():
+    first = ResponseCache.make_key('SearchItems', {'Keywords': 'desk', 'ItemPage': 1})
+    second = ResponseCache.make_key('SearchItems', {'ItemPage': 1, 'Keywords': 'desk'})
+    assert first == second
+    assert first != ResponseCache.make_key('SearchItems', {'Keywords': 'desk', 'ItemPage': 1}, 'www.amazon.de')
+
+
+def test_entry_ttl_is_the_shortest_of_its_groups(cache):
+    assert cache.ttl_for(['ItemInfo.Title', 'Images.Primary.Large']) == 7 * 24 * 3600
+    assert cache.ttl_for(['ItemInfo.Title', 'Offers.Listings.Price']) == 6 * 3600
+    assert cache.ttl_for([]) == cache.default_ttl
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'small.sqlite3'), max_size_mb=250 / (1024 * 1024))
+    try:
+        cache.put('old', 'GetItems', {'body': 'x' * 100}, ttl=60)
+        cache.put('new', 'GetItems', {'body': 'y' * 100}, ttl=60)
+        cache.put('newest', 'GetItems', {'body': 'z' * 100}, ttl=60)
+        assert cache.get('old') is None
+        assert cache.get('newest') is not None
+    finally:
+        cache.close()
+
+
+def test_resources_are_grouped_in_order():
+    groups = resource_groups(['ItemInfo.Title', 'Offers.Listings.Price', 'ItemInfo.Features'])
+    assert groups == {'ItemInfo': ['ItemInfo.Title', 'ItemInfo.Features'], 'Offers': ['Offers.Listings.Price']}
+
+
+def test_group_parts_merge_back_into_the_response():
+    response = get_items_response()
+    groups = ['Offers', 'ItemInfo']
+    parts = [group_response(response, group, groups) for group in groups]
+
+    assert parts[0]['ItemsResult']['Items'][0] == {'ASIN': 'B000000001', 'Offers': {'price': 1}}
+    assert merge_responses(parts) == response
+    # Splitting works on copies
+    assert response == get_items_response()
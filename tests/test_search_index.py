@@ -0,0 +1,74 @@
+"""Tests for the prefix-sharded search index"""
+
+import json
+import os
+
+import pytest
+
+from search_index import SearchIndexBuilder, delta_encode, tokenize
+
+
+CATEGORIES = {'chairs': {'name': 'Office Chairs'}, 'lighting': {'name': 'Lighting'}}
+
+
+def catalogue():
+    return {
+        'chairs': [{'asin': 'B000000001', 'name': 'Ergonomic Mesh Chair', 'price': '$199',
+                    'description': 'Lumbar support', 'features': ['Adjustable arms']}],
+        'lighting': [{'asin': 'B000000002', 'name': 'LED Desk Lamp', 'price': '$39',
+                      'description': 'Dimmable', 'features': []}],
+    }
+
+
+@pytest.fixture
+def builder(tmp_path):
+    return SearchIndexBuilder(str(tmp_path / 'search'), str(tmp_path / 'state.json'))
+
+
+def read_shard(builder, name):
+    with open(os.path.join(builder.output_dir, f'{name}.json'), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_tokenize_folds_accents_and_drops_stopwords():
+    assert tokenize('The Café Chair for a Desk, 2-pack') == ['cafe', 'chair', 'desk', 'pack']
+
+
+def test_delta_encode_sorts_and_stores_gaps():
+    assert delta_encode([9, 2, 5]) == [2, 3, 4]
+    assert delta_encode([]) == []
+
+
+def test_build_writes_term_and_doc_shards(builder):
+    counts = builder.build(catalogue(), CATEGORIES)
+    assert counts['documents'] == 2 and counts['changed'] == 2
+
+    meta = read_shard(builder, 'meta')
+    assert meta['count'] == 2 and 'ch' in meta['terms']
+    chair_id = builder.state['ids']['chairs:B000000001']
+    # Name matches and other matches are separate posting lists
+    assert read_shard(builder, 'terms/ch')['chair'] == [[chair_id], []]
+    assert read_shard(builder, 'terms/lu')['lumbar'] == [[], [chair_id]]
+    assert read_shard(builder, 'docs/0')[str(chair_id)][0] == 'Ergonomic Mesh Chair'
+
+
+def test_unchanged_catalogue_rewrites_nothing(builder, tmp_path):
+    builder.build(catalogue(), CATEGORIES)
+    state = (tmp_path / 'state.json').read_text(encoding='utf-8')
+
+    rebuilt = SearchIndexBuilder(builder.output_dir, builder.state_path)
+    counts = rebuilt.build(catalogue(), CATEGORIES)
+    assert counts['changed'] == 0 and counts['shards_written'] == 0
+    assert (tmp_path / 'state.json').read_text(encoding='utf-8') == state
+
+
+def test_document_ids_are_stable_and_removed_shards_deleted(builder):
+    builder.build(catalogue(), CATEGORIES)
+    lamp_id = builder.state['ids']['lighting:B000000002']
+
+    products = catalogue()
+    products['chairs'] = []
+    counts = builder.build(products, CATEGORIES)
+    assert counts['removed'] == 1 and counts['shards_deleted'] > 0
+    assert builder.state['ids'] == {'lighting:B000000002': lamp_id}
+    assert not os.path.exists(os.path.join(builder.output_dir, 'terms', 'er.json'))
@@ -0,0 +1,73 @@
+"""Tests for the SigV4 request signer"""
+
+import hashlib
+import hmac
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from signer import SigV4Signer, derive_signing_key
+
+
+FIXED_TIME = datetime(2024, 5, 1, 12, 30, 45, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def signer():
+    return SigV4Signer('AKIDEXAMPLE', 'wJalrXUtnFEMI/K7MDENG+bPxRfiCYEXAMPLEKEY', 'webservices.amazon.com',
+                       'us-east-1', clock=lambda: FIXED_TIME)
+
+
+def test_signing_key_matches_aws_example():
+    # From the AWS documentation's "deriving a signing key" example
+    key = derive_signing_key('wJalrXUtnFEMI/K7MDENG+bPxRfiCYEXAMPLEKEY', '20120215', 'us-east-1', 'iam')
+    assert key.hex() == 'f4780e2d9f65fa895f9c67b32ce1baf0b0d8a43505a000a1a9e090d414db404d'
+
+
+def test_post_signature_follows_sigv4(signer):
+    payload = {'Keywords': 'desk', 'PartnerTag': 'tag-20', 'ItemCount': 10}
+    signed = signer.sign_post_json('/paapi5/searchitems', 'SearchItems', payload)
+
+    body = json.dumps(payload, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    target = 'com.amazon.paapi5.v1.ProductAdvertisingAPIv1.SearchItems'
+    canonical_request = '\n'.join([
+        'POST', '/paapi5/searchitems', '',
+        'content-encoding:amz-1.0', 'host:webservices.amazon.com', 'x-amz-date:20240501T123045Z',
+        f'x-amz-target:{target}', '',
+        'content-encoding;host;x-amz-date;x-amz-target', hashlib.sha256(body).hexdigest()
+    ])
+    scope = '20240501/us-east-1/ProductAdvertisingAPI/aws4_request'
+    string_to_sign = '\n'.join(['AWS4-HMAC-SHA256', '20240501T123045Z', scope,
+                                hashlib.sha256(canonical_request.encode('utf-8')).hexdigest()])
+    key = derive_signing_key(signer.secret_key, '20240501', 'us-east-1', 'ProductAdvertisingAPI')
+    signature = hmac.new(key, string_to_sign.encode('utf-8'), hashlib.sha256).hexdigest()
+
+    assert signed.body == body
+    assert signed.headers['X-Amz-Target'] == target
+    assert signed.headers['X-Amz-Date'] == '20240501T123045Z'
+    assert signed.headers['Authorization'] == (
+        f'AWS4-HMAC-SHA256 Credential=AKIDEXAMPLE/{scope}, '
+        f'SignedHeaders=content-encoding;host;x-amz-date;x-amz-target, Signature={signature}'
+    )
+
+
+def test_signature_is_deterministic_and_covers_the_payload(signer):
+    first = signer.sign_post_json('/paapi5/getitems', 'GetItems', {'ItemIds': ['B000000001']})
+    again = signer.sign_post_json('/paapi5/getitems', 'GetItems', {'ItemIds': ['B000000001']})
+    other = signer.sign_post_json('/paapi5/getitems', 'GetItems', {'ItemIds': ['B000000002']})
+    assert first == again
+    assert first.headers['Authorization'] != other.headers['Authorization']
+
+
+def test_get_request_sorts_query_parameters(signer):
+    signed = signer.sign_get('/onca/xml', {'b': '2', 'a': '1 2'})
+    assert signed.query_string == 'a=1+2&b=2'
+    assert signed.url_path == '/onca/xml?a=1+2&b=2'
+    assert 'SignedHeaders=host,' in signed.headers['Authorization']
+
+
+def test_signed_headers_are_read_only(signer):
+    signed = signer.sign_post_json('/paapi5/searchitems', 'SearchItems', {})
+    with pytest.raises(TypeError):
+        signed.headers['Authorization'] = 'forged'
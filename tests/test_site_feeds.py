@@ -0,0 +1,80 @@
+"""Tests for the sitemap, feed and structured data"""
+
+import json
+
+import pytest
+
+from page_layout import product_page_path
+from site_feeds import SiteFeedBuilder, product_json_ld, splice_structured_data, structured_data_block
+
+
+CATEGORIES = {'desks': {'name': 'Desks'}}
+IDENTIFIERS = ['B000000003', 'B000000001', 'B000000002']
+
+
+@pytest.fixture
+def site(tmp_path):
+    for identifier in IDENTIFIERS:
+        path = tmp_path / product_page_path(identifier)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text('<html></html>', encoding='utf-8')
+    return tmp_path
+
+
+def make_builder(site) -> SiteFeedBuilder:
+    return SiteFeedBuilder('https://example.com/', sitemap_path=str(site / 'sitemap.xml'),
+                           feed_path=str(site / 'feed.xml'), state_path=str(site / 'state.json'),
+                           pages=[], output_dir=str(site))
+
+
+def build(site, identifiers):
+    manifest = {'pages': {'desks': {'products': {identifier: f'hash-{identifier}' for identifier in identifiers}}}}
+    products = {'desks': [{'asin': identifier, 'name': identifier, 'price': '$10'} for identifier in identifiers]}
+    return make_builder(site).build(products, manifest, CATEGORIES, lambda product: '')
+
+
+def test_sitemap_does_not_depend_on_manifest_order(site):
+    assert build(site, IDENTIFIERS)['files_written'] == 2
+    sitemap = (site / 'sitemap.xml').read_text(encoding='utf-8')
+    locations = [line.split('<loc>')[1].split('</loc>')[0] for line in sitemap.splitlines() if '<loc>' in line]
+    assert locations == sorted(locations) and len(locations) == 3
+
+    assert build(site, list(reversed(IDENTIFIERS)))['files_written'] == 0
+    assert (site / 'sitemap.xml').read_text(encoding='utf-8') == sitemap
+
+
+def test_changed_product_moves_only_its_own_entries(site):
+    build(site, IDENTIFIERS)
+    state = json.loads((site / 'state.json').read_text(encoding='utf-8'))
+    for entry in state['products'].values():
+        entry['updated'] = '2020-01-01T00:00:00+00:00'
+    (site / 'state.json').write_text(json.dumps(state), encoding='utf-8')
+
+    products = {'desks': [{'asin': identifier, 'name': identifier, 'price': '$10'} for identifier in IDENTIFIERS]}
+    products['desks'][0]['price'] = '$12'
+    manifest = {'pages': {'desks': {'products': {identifier: f'hash-{identifier}' for identifier in IDENTIFIERS}}}}
+    counts = make_builder(site).build(products, manifest, CATEGORIES, lambda product: '')
+    assert counts['products_changed'] == 1
+
+    state = json.loads((site / 'state.json').read_text(encoding='utf-8'))
+    unchanged = [key for key, entry in state['products'].items() if entry['updated'].startswith('2020')]
+    assert sorted(unchanged) == ['B000000001', 'B000000002']
+
+
+def test_product_json_ld_offers():
+    item = product_json_ld({'name': 'Desk', 'asin': 'B000000001', 'price_range': '$150-200',
+                            'availability': 'Now', 'rating': 4.5, 'review_count': 10}, 'A desk')
+    assert item['offers'] == {'priceCurrency': 'USD', 'url': '', '@type': 'AggregateOffer', 'lowPrice': '150.00',
+                              'highPrice': '200.00', 'availability': 'https://schema.org/InStock'}
+    assert item['aggregateRating']['ratingValue'] == 4.5
+    assert 'offers' not in product_json_ld({'name': 'Desk', 'price': 'Check Amazon'}, '')
+
+
+def test_structured_data_is_spliced_once():
+    html = '<html>\n<head>\n  <title>x</title>\n</head>\n</html>'
+    block = structured_data_block({'name': '</script>'})
+    assert '<\\/script>' in block
+
+    once = splice_structured_data(html, block)
+    assert once.count('application/ld+json') == 1
+    assert splice_structured_data(once, block) == once